@@ -1,10 +1,24 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import os
+import time
 import traceback
 
+from app.services.asset_fetcher import StylesheetCache
+from app.services.clone_cache import CloneCache
+from app.services.crawler import CrawlConfig, SiteCrawler
+from app.services.driver_pool import DriverPool, DriverPoolConfig, DriverPoolTimeout
+from app.services.instrumentation import METRICS, span
+from app.services.jobs import CloneJob, JobStore, JobWorkerPool, SUCCEEDED
+from app.services.scrape_cache import ScrapeCache
+from app.services.scrape_executor import ExecutorSaturated, ScrapeExecutor
 from app.services.scraper import AdvancedWebsiteScraper, ScrapingConfig
 from app.services.llm_cloner import (
     HighPrecisionLLMCloner,
@@ -15,8 +29,62 @@ from app.services.llm_cloner import (
 # Load environment variables
 load_dotenv()
 
+# Seconds a client is told to wait when every pooled browser stayed busy past the acquire timeout
+BROWSER_RETRY_AFTER = int(os.getenv('BROWSER_RETRY_AFTER', '5'))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm browser pool shared by all scrapes on this worker
+    pool_config = DriverPoolConfig(
+        max_size=int(os.getenv('DRIVER_POOL_SIZE', '2')),
+        warm_size=int(os.getenv('DRIVER_POOL_WARM', '1')),
+        max_pages_per_driver=int(os.getenv('DRIVER_MAX_PAGES', '50')),
+        acquire_timeout=float(os.getenv('DRIVER_ACQUIRE_TIMEOUT', '60')),
+    )
+    app.state.driver_pool = DriverPool(pool_config)
+    await asyncio.to_thread(app.state.driver_pool.start)
+
+    # Blocking scrapes run here so they never stall the event loop
+    app.state.scrape_executor = ScrapeExecutor(
+        max_workers=int(os.getenv('SCRAPE_WORKERS', str(pool_config.max_size))),
+        max_queue=int(os.getenv('SCRAPE_QUEUE_LIMIT', '4')),
+    )
+
+    # Generated HTML keyed by design context fingerprint
+    app.state.clone_cache = CloneCache(
+        os.getenv('CLONE_CACHE_DIR', '.cache/clones'),
+        max_memory_entries=int(os.getenv('CLONE_CACHE_MEMORY_ENTRIES', '128')),
+        max_disk_bytes=int(os.getenv('CLONE_CACHE_MAX_BYTES', str(256 * 1024 * 1024))),
+        ttl_seconds=float(os.getenv('CLONE_CACHE_TTL', str(7 * 24 * 3600))),
+    )
+
+    # Scraped design contexts, reused while the origin answers 304
+    app.state.scrape_cache = ScrapeCache(
+        os.getenv('SCRAPE_CACHE_DIR', '.cache/scrapes'),
+        max_disk_bytes=int(os.getenv('SCRAPE_CACHE_MAX_BYTES', str(512 * 1024 * 1024))),
+    )
+
+    # Persistent clone and crawl jobs for clients that cannot hold a connection open
+    app.state.job_store = JobStore(
+        os.getenv('JOB_DB_PATH', '.cache/jobs.sqlite3'),
+        lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', '60')),
+    )
+    app.state.job_workers = JobWorkerPool(
+        app.state.job_store,
+        run_job,
+        workers=int(os.getenv('JOB_WORKERS', '2')),
+        retry_backoff=float(os.getenv('JOB_RETRY_BACKOFF', '5')),
+        result_ttl_seconds=float(os.getenv('JOB_RESULT_TTL', str(24 * 3600))),
+    )
+    app.state.job_workers.start()
+    yield
+    await app.state.job_workers.stop()
+    app.state.job_store.close()
+    app.state.scrape_executor.shutdown()
+    await asyncio.to_thread(app.state.driver_pool.close)
+
 # Initialize FastAPI app
-app = FastAPI(title="Website Cloning API")
+app = FastAPI(title="Website Cloning API", lifespan=lifespan)
 
 # CORS settings
 app.add_middleware(
@@ -32,27 +100,98 @@ class CloneRequest(BaseModel):
     url: HttpUrl
     scrape_options: Optional[Dict[str, Any]] = None
     clone_options: Optional[Dict[str, Any]] = None
+    debug: bool = False  # Attach per-stage timings and counters to the response
 
 class CloneResponse(BaseModel):
     html: str
     message: str
+    trace: Optional[Dict[str, Any]] = None
+
+class CloneJobRequest(CloneRequest):
+    max_attempts: int = 3
+
+class BatchCloneRequest(BaseModel):
+    urls: List[HttpUrl]
+    scrape_options: Optional[Dict[str, Any]] = None
+    clone_options: Optional[Dict[str, Any]] = None
+    max_concurrency: int = 4
+    format: str = "ndjson"  # "ndjson" or "sse"
+
+class CrawlRequest(BaseModel):
+    url: HttpUrl
+    crawl_options: Optional[Dict[str, Any]] = None
+    scrape_options: Optional[Dict[str, Any]] = None
+
+class CrawlJobRequest(CrawlRequest):
+    max_attempts: int = 1  # A retried crawl starts over from the root
+
+def build_pipeline(scrape_options: Optional[Dict[str, Any]], clone_options: Optional[Dict[str, Any]],
+                   stylesheet_cache: Optional[StylesheetCache] = None):
+    """Scraper and cloner for one clone request, sharing the app-wide pool and caches."""
+    scrape_config = ScrapingConfig(**scrape_options) if scrape_options else ScrapingConfig()
+    clone_config = PrecisionCloneConfig(**clone_options) if clone_options else PrecisionCloneConfig()
+    scraper = AdvancedWebsiteScraper(
+        scrape_config,
+        driver_pool=app.state.driver_pool,
+        scrape_cache=app.state.scrape_cache,
+        stylesheet_cache=stylesheet_cache
+    )
+    cloner = HighPrecisionLLMCloner(clone_config, cache=app.state.clone_cache)
+    return scraper, cloner
+
+def build_crawler(crawl_options: Optional[Dict[str, Any]], scrape_options: Optional[Dict[str, Any]]) -> SiteCrawler:
+    """Site crawler whose page scrapes are admitted by the app-wide scrape executor."""
+    return SiteCrawler(
+        CrawlConfig(**(crawl_options or {})),
+        ScrapingConfig(**(scrape_options or {})),
+        driver_pool=app.state.driver_pool,
+        scrape_cache=app.state.scrape_cache,
+        scrape_executor=app.state.scrape_executor
+    )
+
+async def run_crawl(crawler: SiteCrawler, url: str):
+    """Run a crawl's scheduler off the event loop; cancelling stops it scheduling pages."""
+    try:
+        return await asyncio.to_thread(crawler.crawl, url)
+    except asyncio.CancelledError:
+        crawler.cancel()
+        raise
+
+async def run_job(job: CloneJob, set_stage) -> str:
+    """Job handler: dispatch on the kind of job that was queued."""
+    if job.options.get('kind') == 'crawl':
+        return await run_crawl_job(job, set_stage)
+    return await run_clone_job(job, set_stage)
+
+async def run_crawl_job(job: CloneJob, set_stage) -> str:
+    """Job handler: crawl a site and store the result as JSON."""
+    crawler = build_crawler(job.options.get('crawl_options'), job.options.get('scrape_options'))
+    with span('job.crawl'):
+        set_stage("crawling")
+        result = await run_crawl(crawler, job.url)
+    return json.dumps(result.to_dict(), default=str)
+
+async def run_clone_job(job: CloneJob, set_stage) -> str:
+    """Job handler: scrape then generate, reporting the current stage."""
+    scraper, cloner = build_pipeline(job.options.get('scrape_options'), job.options.get('clone_options'))
+    with span('job.clone'):
+        set_stage("scraping")
+        design_context = await app.state.scrape_executor.run(scraper.scrape_comprehensive, job.url)
+        set_stage("generating")
+        return await cloner.generate_pixel_perfect_html(design_context)
 
 @app.post("/api/clone", response_model=CloneResponse)
 async def clone_website(request: CloneRequest):
     try:
-        # Build config from request or use default
-        scrape_config = ScrapingConfig(**request.scrape_options) if request.scrape_options else ScrapingConfig()
-        clone_config = PrecisionCloneConfig(**request.clone_options) if request.clone_options else PrecisionCloneConfig()
+        with span('request.clone') as trace:
+            # Initialize scraper + cloner from request options or defaults
+            scraper, cloner = build_pipeline(request.scrape_options, request.clone_options)
 
-        # Initialize scraper + cloner
-        scraper = AdvancedWebsiteScraper(scrape_config)
-        cloner = HighPrecisionLLMCloner(clone_config)
+            # Scrape the design context on the bounded scrape executor
+            design_context = await app.state.scrape_executor.run(scraper.scrape_comprehensive, str(request.url))
 
-        # Scrape the design context (sync)
-        design_context = scraper.scrape_comprehensive(str(request.url))
-
-        # Generate HTML (async)
-        html = await cloner.generate_pixel_perfect_html(design_context)
+            # Generate HTML (async)
+            html = await cloner.generate_pixel_perfect_html(design_context)
 
         # Log the generated HTML for debugging
         print("--- Generated HTML ---")
@@ -61,17 +200,280 @@ async def clone_website(request: CloneRequest):
 
         return CloneResponse(
             html=html,
-            message="Website cloned successfully."
+            message="Website cloned successfully.",
+            trace=trace.to_dict() if request.debug else None
         )
 
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Scrape capacity exhausted, please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except DriverPoolTimeout:
+        raise HTTPException(
+            status_code=503,
+            detail="No browser available, please retry later.",
+            headers={"Retry-After": str(BROWSER_RETRY_AFTER)}
+        )
     except Exception as e:
         print(f"❌ Clone error: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail="Internal server error during website cloning.")
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/clone/stream")
+async def clone_website_stream(request: CloneRequest):
+    """Clone a website, streaming progress and the final pass as server-sent events."""
+    scraper, cloner = build_pipeline(request.scrape_options, request.clone_options)
+
+    # Admit the scrape before the stream starts so saturation is still a plain 503
+    try:
+        scrape_future = app.state.scrape_executor.submit(scraper.scrape_comprehensive, str(request.url))
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Scrape capacity exhausted, please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+    async def events():
+        try:
+            yield sse_event("stage", {"stage": "scrape_started"})
+            design_context = await scrape_future
+            yield sse_event("stage", {"stage": "scrape_done"})
+            async for event, data in cloner.stream_pixel_perfect_html(design_context):
+                yield sse_event(event, data)
+        except DriverPoolTimeout:
+            yield sse_event("error", {"detail": "No browser available, please retry later.",
+                                      "retry_after": BROWSER_RETRY_AFTER})
+        except Exception as e:
+            print(f"❌ Clone stream error: {e}")
+            traceback.print_exc()
+            yield sse_event("error", {"detail": "Internal server error during website cloning."})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def scrape_when_admitted(scraper: AdvancedWebsiteScraper, url: str):
+    """Run a scrape on the shared executor, waiting out saturation instead of failing."""
+    while True:
+        try:
+            return await app.state.scrape_executor.run(scraper.scrape_comprehensive, url)
+        except ExecutorSaturated as e:
+            await asyncio.sleep(e.retry_after)
+        except DriverPoolTimeout:
+            await asyncio.sleep(BROWSER_RETRY_AFTER)
+
+@app.post("/api/clone/batch")
+async def clone_website_batch(request: BatchCloneRequest):
+    """Clone many URLs with bounded concurrency, streaming each result as it completes.
+
+    Pages share the warm driver pool, and a per-batch stylesheet cache means
+    CSS common to a site is downloaded once for the whole batch.
+    """
+    if request.format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=422, detail="format must be 'ndjson' or 'sse'.")
+    urls = list(dict.fromkeys(str(url) for url in request.urls))
+    max_urls = int(os.getenv('BATCH_MAX_URLS', '100'))
+    if not urls or len(urls) > max_urls:
+        raise HTTPException(status_code=422, detail=f"Provide between 1 and {max_urls} URLs.")
+    try:
+        ScrapingConfig(**(request.scrape_options or {}))
+        PrecisionCloneConfig(**(request.clone_options or {}))
+    except TypeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    concurrency = max(1, min(request.max_concurrency, int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))))
+    semaphore = asyncio.Semaphore(concurrency)
+    stylesheet_cache = StylesheetCache()
+
+    async def clone_one(index: int, url: str) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                scraper, cloner = build_pipeline(request.scrape_options, request.clone_options, stylesheet_cache)
+                design_context = await scrape_when_admitted(scraper, url)
+                html = await cloner.generate_pixel_perfect_html(design_context)
+                result = {"status": "ok", "html": html}
+            except Exception as e:
+                print(f"❌ Batch clone error for {url}: {e}")
+                result = {"status": "error", "detail": str(e)}
+            return {"index": index, "url": url, **result, "elapsed_seconds": round(time.monotonic() - started, 3)}
+
+    def encode(event: str, data: Dict[str, Any]) -> str:
+        if request.format == "sse":
+            return sse_event(event, data)
+        return json.dumps({"event": event, **data}) + "\n"
+
+    async def results():
+        started = time.monotonic()
+        tasks = [asyncio.create_task(clone_one(i, url)) for i, url in enumerate(urls)]
+        succeeded = 0
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                succeeded += result["status"] == "ok"
+                yield encode("result", result)
+            yield encode("summary", {
+                "total": len(urls),
+                "succeeded": succeeded,
+                "failed": len(urls) - succeeded,
+                "concurrency": concurrency,
+                "elapsed_seconds": round(time.monotonic() - started, 3),
+                "stylesheet_cache": stylesheet_cache.stats()
+            })
+        finally:
+            # Client disconnected or batch finished: nothing left should keep running
+            for task in tasks:
+                task.cancel()
+
+    media_type = "text/event-stream" if request.format == "sse" else "application/x-ndjson"
+    return StreamingResponse(results(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/crawl")
+async def crawl_site(request: CrawlRequest):
+    """Scrape a whole site and return per-page design contexts plus shared tokens."""
+    try:
+        crawler = build_crawler(request.crawl_options, request.scrape_options)
+    except TypeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        # Each page is admitted by the scrape executor; long crawls belong on /api/crawl/jobs
+        result = await run_crawl(crawler, str(request.url))
+        return result.to_dict()
+    except ExecutorSaturated as e:
+        raise HTTPException(
+            status_code=503,
+            detail="Scrape capacity exhausted, please retry later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except DriverPoolTimeout:
+        raise HTTPException(
+            status_code=503,
+            detail="No browser available, please retry later.",
+            headers={"Retry-After": str(BROWSER_RETRY_AFTER)}
+        )
+    except Exception as e:
+        print(f"❌ Crawl error: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail="Internal server error during site crawl.")
+
+@app.post("/api/clone/jobs", status_code=202)
+async def create_clone_job(request: CloneJobRequest):
+    """Queue a clone and return its job id immediately."""
+    try:
+        # Reject bad options now rather than on every retry
+        ScrapingConfig(**(request.scrape_options or {}))
+        PrecisionCloneConfig(**(request.clone_options or {}))
+    except TypeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    job = app.state.job_store.create(
+        str(request.url),
+        {'kind': 'clone', 'scrape_options': request.scrape_options, 'clone_options': request.clone_options},
+        max_attempts=max(1, request.max_attempts)
+    )
+    app.state.job_workers.notify()
+    return job.to_dict()
+
+def get_job_of_kind(job_id: str, kind: str) -> CloneJob:
+    """Stored job, 404 if missing or queued through the other endpoint."""
+    job = app.state.job_store.get(job_id)
+    # Jobs queued before crawl jobs existed carry no kind and are clones
+    if job is None or job.options.get('kind', 'clone') != kind:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+async def get_job_result(job_id: str, kind: str) -> str:
+    job = get_job_of_kind(job_id, kind)
+    if job.status != SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}, no result available.")
+    # Results can be megabytes of HTML or crawl JSON; read them off the event loop
+    return await asyncio.to_thread(app.state.job_store.result, job_id)
+
+def cancel_job(job_id: str, kind: str) -> Dict[str, Any]:
+    get_job_of_kind(job_id, kind)
+    return app.state.job_workers.cancel(job_id).to_dict()
+
+@app.get("/api/clone/jobs/{job_id}")
+async def get_clone_job(job_id: str):
+    return get_job_of_kind(job_id, 'clone').to_dict()
+
+@app.get("/api/clone/jobs/{job_id}/result", response_model=CloneResponse)
+async def get_clone_job_result(job_id: str):
+    return CloneResponse(html=await get_job_result(job_id, 'clone'), message="Website cloned successfully.")
+
+@app.delete("/api/clone/jobs/{job_id}")
+async def cancel_clone_job(job_id: str):
+    return cancel_job(job_id, 'clone')
+
+@app.post("/api/crawl/jobs", status_code=202)
+async def create_crawl_job(request: CrawlJobRequest):
+    """Queue a site crawl and return its job id immediately."""
+    try:
+        CrawlConfig(**(request.crawl_options or {}))
+        ScrapingConfig(**(request.scrape_options or {}))
+    except TypeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    job = app.state.job_store.create(
+        str(request.url),
+        {'kind': 'crawl', 'crawl_options': request.crawl_options, 'scrape_options': request.scrape_options},
+        max_attempts=max(1, request.max_attempts)
+    )
+    app.state.job_workers.notify()
+    return job.to_dict()
+
+@app.get("/api/crawl/jobs/{job_id}")
+async def get_crawl_job(job_id: str):
+    return get_job_of_kind(job_id, 'crawl').to_dict()
+
+@app.get("/api/crawl/jobs/{job_id}/result")
+async def get_crawl_job_result(job_id: str):
+    return json.loads(await get_job_result(job_id, 'crawl'))
+
+@app.delete("/api/crawl/jobs/{job_id}")
+async def cancel_crawl_job(job_id: str):
+    return cancel_job(job_id, 'crawl')
+
 @app.get("/api/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {
+        "status": "healthy",
+        "driver_pool": app.state.driver_pool.stats(),
+        "scrape_executor": app.state.scrape_executor.stats(),
+        "jobs": app.state.job_workers.stats()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: per-stage histograms and counters plus pool occupancy."""
+    pool = app.state.driver_pool.stats()
+    executor = app.state.scrape_executor.stats()
+    gauges = {
+        "scrape_executor_pending": executor["pending"],
+        "scrape_executor_running": executor["running"],
+    }
+    for key, value in pool.items():
+        if isinstance(value, (int, float)):
+            gauges[f"driver_pool_{key}"] = value
+    return PlainTextResponse(METRICS.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return {
+        "clone": app.state.clone_cache.stats(),
+        "scrape": app.state.scrape_cache.stats()
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,257 @@
+import math
+import operator
+import re
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, List, Optional, Sequence
+
+from app.services.prompt_builder import render_lines
+
+# (min-width: 768px), (max-width: 47.99em)
+FEATURE_PATTERN = re.compile(r'\(\s*(min|max)-width\s*:\s*([\d.]+)\s*(px|em|rem)?\s*\)', re.IGNORECASE)
+# Range syntax: (width >= 600px), (400px < width <= 900px)
+RANGE_PATTERN = re.compile(
+    r'(?:([\d.]+)\s*(px|em|rem)?\s*(<=|>=|<|>)\s*)?\bwidth\b(?:\s*(<=|>=|<|>)\s*([\d.]+)\s*(px|em|rem)?)?',
+    re.IGNORECASE
+)
+ROOT_FONT_SIZE = 16  # px per em/rem in media queries
+# Layout properties compared between regimes, as captured by LAYOUT_SNAPSHOT_SCRIPT
+SNAPSHOT_PROPERTIES = ('display', 'flex-direction', 'grid-template-columns', 'font-size', 'position', 'float')
+MAX_DIFF_ENTRIES = 60
+
+
+def _px(value: str, unit: Optional[str]) -> float:
+    return float(value) * (ROOT_FONT_SIZE if unit and unit.lower() in ('em', 'rem') else 1)
+
+
+MIRRORED_OPS = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+COMPARISONS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+# Media features that never hold for a default desktop browser window
+NON_MATCHING_FEATURES = re.compile(
+    r'\(\s*(?:prefers-color-scheme\s*:\s*dark|prefers-reduced-motion\s*:\s*reduce|orientation\s*:\s*portrait'
+    r'|hover\s*:\s*none|pointer\s*:\s*coarse|any-pointer\s*:\s*coarse)\s*\)',
+    re.IGNORECASE
+)
+
+
+def _range_boundary(op: str, px: float) -> int:
+    """First width of the new regime for "width <op> px"."""
+    return math.ceil(px) if op in ('>=', '<') else math.floor(px) + 1
+
+
+def width_boundaries(query: str) -> List[int]:
+    """Viewport widths at which a media query starts or stops matching.
+
+    A boundary is the first width of the new regime: min-width: 768px flips
+    at 768, max-width: 767.98px flips at 768 too.
+    """
+    boundaries = []
+    for kind, value, unit in FEATURE_PATTERN.findall(query):
+        px = _px(value, unit)
+        boundaries.append(math.ceil(px) if kind.lower() == 'min' else math.floor(px) + 1)
+
+    for match in RANGE_PATTERN.finditer(query):
+        left, left_unit, left_op, right_op, right, right_unit = match.groups()
+        if left is not None:
+            # "N < width" reads as "width > N"
+            boundaries.append(_range_boundary(MIRRORED_OPS[left_op], _px(left, left_unit)))
+        if right is not None:
+            boundaries.append(_range_boundary(right_op, _px(right, right_unit)))
+    return boundaries
+
+
+def media_matches(condition: str, width: int) -> bool:
+    """Whether a media condition applies to a desktop screen of the given width.
+
+    Width features are evaluated exactly; print-only queries and features a
+    default desktop window lacks (dark scheme, touch, portrait...) never
+    match, and anything else is assumed to.
+    """
+    return any(_query_matches(query.strip().lower(), width) for query in condition.split(','))
+
+
+def _query_matches(query: str, width: int) -> bool:
+    negated = query.startswith('not ')
+    if negated:
+        query = query[4:]
+    media_type = query.split('(')[0].replace('only ', '').replace('and', '').strip()
+    matches = media_type in ('', 'all', 'screen') and not NON_MATCHING_FEATURES.search(query)
+
+    for kind, value, unit in FEATURE_PATTERN.findall(query):
+        px = _px(value, unit)
+        matches = matches and (width >= px if kind == 'min' else width <= px)
+    for match in RANGE_PATTERN.finditer(query):
+        left, left_unit, left_op, right_op, right, right_unit = match.groups()
+        if left is not None:
+            matches = matches and COMPARISONS[MIRRORED_OPS[left_op]](width, _px(left, left_unit))
+        if right is not None:
+            matches = matches and COMPARISONS[right_op](width, _px(right, right_unit))
+    return matches != negated
+
+
+def discover_breakpoints(media_queries: Iterable[str]) -> List[int]:
+    """Distinct width breakpoints used by a page's stylesheets, ascending."""
+    found = set()
+    for query in media_queries:
+        found.update(b for b in width_boundaries(query) if b > 0)
+    return sorted(found)
+
+
+@dataclass
+class LayoutRegime:
+    """A width range over which no @media width condition changes."""
+    min_width: int
+    max_width: Optional[int]  # Inclusive; None for unbounded
+    probe_width: int
+
+    @property
+    def label(self) -> str:
+        if self.max_width is None:
+            return f">={self.min_width}px" if self.min_width > 0 else "all widths"
+        if self.min_width <= 0:
+            return f"<={self.max_width}px"
+        return f"{self.min_width}-{self.max_width}px"
+
+    def contains(self, width: int) -> bool:
+        return width >= self.min_width and (self.max_width is None or width <= self.max_width)
+
+
+def plan_regimes(breakpoints: Sequence[int], preferred_widths: Sequence[int], min_width: int = 320,
+                 max_width: int = 1920, max_regimes: int = 6) -> List[LayoutRegime]:
+    """Split [min_width, max_width] at the breakpoints and pick one probe width per regime.
+
+    Regimes are probed at a preferred width (the configured desktop, tablet
+    and mobile sizes) when one falls inside, so probes can share a viewport
+    with screenshots. Past max_regimes the narrowest regimes are merged into
+    a neighbour. Returned widest first.
+    """
+    cuts = [b for b in sorted(set(breakpoints)) if min_width < b <= max_width]
+    ranges = []
+    lower = 0
+    for cut in cuts:
+        ranges.append([lower, cut - 1])
+        lower = cut
+    ranges.append([lower, None])
+
+    def span(r):
+        return (r[1] if r[1] is not None else max_width) - max(r[0], min_width)
+
+    while len(ranges) > max(1, max_regimes):
+        i = min(range(len(ranges)), key=lambda k: span(ranges[k]))
+        if i == 0 or (i < len(ranges) - 1 and span(ranges[i + 1]) < span(ranges[i - 1])):
+            ranges[i + 1][0] = ranges[i][0]
+        else:
+            ranges[i - 1][1] = ranges[i][1]
+        del ranges[i]
+
+    regimes = []
+    for low, high in ranges:
+        regime = LayoutRegime(low, high, 0)
+        preferred = next((w for w in preferred_widths if regime.contains(w)), None)
+        if preferred is None:
+            top = high if high is not None else max_width
+            preferred = (max(low, min_width) + top) // 2 if high is not None else max(low, max_width)
+        regime.probe_width = preferred
+        regimes.append(regime)
+    return list(reversed(regimes))
+
+
+def diff_layouts(base: Dict[str, Any], other: Dict[str, Any], tolerance: int = 2) -> Dict[str, Any]:
+    """What changed between two layout snapshots, keyed by element.
+
+    Only differences are kept: elements that appear or disappear, layout
+    properties that change, and boxes whose width or height change by more
+    than tolerance px without simply scaling with the viewport.
+    """
+    base_elements = base.get('elements', {})
+    other_elements = other.get('elements', {})
+    base_vw = (base.get('viewport') or {}).get('width') or 1
+    other_vw = (other.get('viewport') or {}).get('width') or 1
+    scale = other_vw / base_vw
+
+    hidden, shown, changed = [], [], {}
+    for key, before in base_elements.items():
+        after = other_elements.get(key)
+        if after is None:
+            continue
+        if before.get('visible') and not after.get('visible'):
+            hidden.append(key)
+            continue
+        if after.get('visible') and not before.get('visible'):
+            shown.append(key)
+            continue
+        if not after.get('visible'):
+            continue
+
+        delta = {}
+        for prop in SNAPSHOT_PROPERTIES:
+            if before.get(prop) != after.get(prop):
+                delta[prop] = [before.get(prop), after.get(prop)]
+        width_before, width_after = before.get('box', [0, 0, 0, 0])[2], after.get('box', [0, 0, 0, 0])[2]
+        # A width that tracks the viewport is fluid, not a breakpoint change
+        if abs(width_after - width_before) > tolerance and abs(width_after - width_before * scale) > tolerance:
+            delta['width'] = [width_before, width_after]
+        height_before, height_after = before.get('box', [0, 0, 0, 0])[3], after.get('box', [0, 0, 0, 0])[3]
+        if 'display' in delta or 'flex-direction' in delta or 'grid-template-columns' in delta:
+            if abs(height_after - height_before) > tolerance:
+                delta['height'] = [height_before, height_after]
+        if delta:
+            changed[key] = delta
+        if len(changed) >= MAX_DIFF_ENTRIES:
+            break
+
+    return {'hidden': hidden[:MAX_DIFF_ENTRIES], 'shown': shown[:MAX_DIFF_ENTRIES], 'changed': changed}
+
+
+def summarize_regimes(breakpoints: Sequence[int], regimes: Sequence[LayoutRegime],
+                      snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Responsive data for the design context: regimes plus diffs against the widest one."""
+    regimes = [regime for regime in regimes if regime.label in snapshots]
+    if not regimes:
+        return {}
+    base = regimes[0]
+    base_snapshot = snapshots[base.label]
+
+    summary = {
+        'breakpoints': list(breakpoints),
+        'base_regime': base.label,
+        'regimes': [],
+        'diffs': {},
+    }
+    for regime in regimes:
+        snapshot = snapshots[regime.label]
+        summary['regimes'].append({
+            'range': regime.label,
+            'probe_width': regime.probe_width,
+            'scroll_height': snapshot.get('scroll_height'),
+            'body_size': snapshot.get('body_size'),
+            'visible_elements': snapshot.get('visible_elements'),
+        })
+        if regime is not base:
+            summary['diffs'][regime.label] = diff_layouts(base_snapshot, snapshot)
+    return summary
+
+
+def render_breakpoint_table(responsive: Dict[str, Any]) -> str:
+    """Compact, line-oriented breakpoint table for prompts."""
+    if 'regimes' not in responsive:
+        return render_lines(responsive)  # Fixed-viewport data from older scrapes
+
+    lines = [f"Breakpoints (px): {', '.join(map(str, responsive.get('breakpoints', []))) or 'none'}"]
+    lines.append("range | probed at | page height | changes vs " + responsive.get('base_regime', 'widest'))
+    diffs = responsive.get('diffs', {})
+    for regime in responsive['regimes']:
+        diff = diffs.get(regime['range'])
+        summary = 'base layout' if diff is None else (
+            f"{len(diff['changed'])} changed, {len(diff['hidden'])} hidden, {len(diff['shown'])} shown"
+        )
+        lines.append(f"{regime['range']} | {regime['probe_width']}px | {regime.get('scroll_height')}px | {summary}")
+
+    for label, diff in diffs.items():
+        for key in diff['hidden']:
+            lines.append(f"  {label} {key}: hidden")
+        for key in diff['shown']:
+            lines.append(f"  {label} {key}: shown")
+        for key, delta in diff['changed'].items():
+            changes = ', '.join(f"{prop} {before} -> {after}" for prop, (before, after) in delta.items())
+            lines.append(f"  {label} {key}: {changes}")
+    return '\n'.join(lines)
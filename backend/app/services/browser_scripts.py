@@ -0,0 +1,216 @@
+"""JavaScript snippets executed inside the browser by the scraper.
+
+Each snippet is run with a single ``execute_script`` call so that work which
+would otherwise take one WebDriver round trip per element happens in-page.
+"""
+
+# arguments[0]: list of CSS property names, arguments[1]: max elements to scan.
+# Returns {properties: [...], rows: [[selector, [value|null, ...]], ...]}
+COMPUTED_STYLES_SCRIPT = """
+const properties = arguments[0];
+const limit = arguments[1];
+const skipped = new Set(['', 'none', 'auto']);
+
+function selectorFor(el) {
+    const tag = el.tagName.toLowerCase();
+    if (el.id) {
+        return '#' + el.id;
+    }
+    const classes = (el.getAttribute('class') || '').trim().split(/\\s+/).filter(Boolean);
+    if (classes.length) {
+        return tag + '.' + classes.slice(0, 2).join('.');
+    }
+    return tag;
+}
+
+const elements = document.querySelectorAll('*');
+const count = Math.min(elements.length, limit);
+const rows = [];
+
+for (let i = 0; i < count; i++) {
+    const el = elements[i];
+    const style = window.getComputedStyle(el);
+    if (style.visibility === 'hidden' || el.getClientRects().length === 0) {
+        continue;
+    }
+
+    const values = [];
+    let found = false;
+    for (const prop of properties) {
+        const value = style.getPropertyValue(prop);
+        if (skipped.has(value)) {
+            values.push(null);
+        } else {
+            values.push(value);
+            found = true;
+        }
+    }
+    if (found) {
+        rows.push([selectorFor(el), values]);
+    }
+}
+
+return {properties: properties, rows: rows};
+"""
+
+# Installed on every new document (Page.addScriptToEvaluateOnNewDocument) before
+# page scripts run. Wraps fetch and XMLHttpRequest so window.__scraperPending
+# counts requests still in flight, which resource timing cannot see until
+# they finish.
+NETWORK_TRACKER_SCRIPT = """
+(() => {
+    if (window.__scraperPending !== undefined) {
+        return;
+    }
+    window.__scraperPending = 0;
+    const settle = () => { window.__scraperPending = Math.max(0, window.__scraperPending - 1); };
+
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function () {
+            window.__scraperPending++;
+            try {
+                return originalFetch.apply(this, arguments).finally(settle);
+            } catch (e) {
+                settle();
+                throw e;
+            }
+        };
+    }
+
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        window.__scraperPending++;
+        this.addEventListener('loadend', settle, {once: true});
+        try {
+            return originalSend.apply(this, arguments);
+        } catch (e) {
+            settle();
+            throw e;
+        }
+    };
+})();
+"""
+
+# Async script. arguments[0]: timeout in ms, arguments[1]: quiet window in ms.
+# Resolves once the document is complete, web fonts have loaded, no fetch/XHR
+# is in flight and neither new network resources nor layout changes were seen
+# for the quiet window, or when the timeout elapses. In-flight requests are
+# only known when NETWORK_TRACKER_SCRIPT was installed; without it, and for
+# other request kinds (images, scripts, WebSockets), activity is seen only
+# once a resource completes. Returns {ready, elapsed, readyState, fontsReady,
+# pendingRequests}.
+PAGE_READY_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const timeoutMs = arguments[0];
+const quietMs = arguments[1];
+const start = performance.now();
+
+let fontsReady = !document.fonts;
+if (document.fonts) {
+    document.fonts.ready.then(() => { fontsReady = true; });
+}
+
+function layoutSignature() {
+    const body = document.body;
+    if (!body) {
+        return '';
+    }
+    return [body.scrollWidth, body.scrollHeight, document.getElementsByTagName('*').length].join(':');
+}
+
+let lastResources = -1;
+let lastLayout = '';
+let quietSince = start;
+
+function check() {
+    const now = performance.now();
+    const resources = performance.getEntriesByType('resource').length;
+    const layout = layoutSignature();
+    const pending = window.__scraperPending || 0;
+    if (pending > 0 || resources !== lastResources || layout !== lastLayout) {
+        lastResources = resources;
+        lastLayout = layout;
+        quietSince = now;
+    }
+
+    const ready = document.readyState === 'complete' && fontsReady && now - quietSince >= quietMs;
+    if (ready || now - start >= timeoutMs) {
+        done({
+            ready: ready,
+            elapsed: Math.round(now - start),
+            readyState: document.readyState,
+            fontsReady: fontsReady,
+            pendingRequests: pending
+        });
+        return;
+    }
+    setTimeout(check, 50);
+}
+
+check();
+"""
+
+# arguments[0]: max elements to snapshot.
+# Records the box and layout-relevant computed styles of landmarks, headings,
+# media, lists, forms and grid-like containers under stable keys (tag#id.class,
+# with [n] for repeats) so snapshots taken at different widths can be diffed.
+# Returns {viewport, scroll_height, body_size, visible_elements, elements}.
+LAYOUT_SNAPSHOT_SCRIPT = """
+const limit = arguments[0];
+const query = 'header, nav, main, aside, footer, section, article, h1, h2, h3, img, video, ul, ol, form, ' +
+    '[class*="container"], [class*="grid"], [class*="row"], [class*="col"], [class*="menu"], [class*="sidebar"]';
+const properties = ['display', 'flex-direction', 'grid-template-columns', 'font-size', 'position', 'float'];
+
+function keyFor(el) {
+    let key = el.tagName.toLowerCase();
+    if (el.id) {
+        key += '#' + el.id;
+    }
+    const first = (el.getAttribute('class') || '').trim().split(/\\s+/)[0];
+    if (first) {
+        key += '.' + first;
+    }
+    return key;
+}
+
+const elements = {};
+const seen = {};
+const matches = document.querySelectorAll(query);
+const count = Math.min(matches.length, limit);
+for (let i = 0; i < count; i++) {
+    const el = matches[i];
+    let key = keyFor(el);
+    seen[key] = (seen[key] || 0) + 1;
+    if (seen[key] > 1) {
+        key += '[' + seen[key] + ']';
+    }
+
+    const style = window.getComputedStyle(el);
+    const rect = el.getBoundingClientRect();
+    const entry = {
+        box: [Math.round(rect.left), Math.round(rect.top + window.scrollY), Math.round(rect.width), Math.round(rect.height)],
+        visible: style.display !== 'none' && style.visibility !== 'hidden' && el.getClientRects().length > 0
+    };
+    for (const prop of properties) {
+        entry[prop] = style.getPropertyValue(prop);
+    }
+    elements[key] = entry;
+}
+
+const body = document.body;
+let visible = 0;
+for (const el of document.querySelectorAll('body *')) {
+    if (el.getClientRects().length > 0) {
+        visible++;
+    }
+}
+
+return {
+    viewport: {width: window.innerWidth, height: window.innerHeight},
+    scroll_height: body ? body.scrollHeight : 0,
+    body_size: body ? {width: body.offsetWidth, height: body.offsetHeight} : null,
+    visible_elements: visible,
+    elements: elements
+};
+"""
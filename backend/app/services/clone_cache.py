@@ -0,0 +1,186 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Dict, Any, Optional, Tuple
+
+# Design context fields that feed the generation prompts
+PROMPT_FIELDS = (
+    'url', 'computed_styles', 'measurements', 'colors', 'typography',
+    'layout_structure', 'responsive_breakpoints', 'animations', 'interactions',
+    'elements', 'meta', 'structure', 'assets'
+)
+
+# Config fields that never change the generated HTML
+NON_OUTPUT_CONFIG_FIELDS = {'verbose_logging', 'pass_timeout_seconds'}
+
+
+def design_context_fingerprint(design_context: Dict[str, Any], config: Any) -> str:
+    """Content hash of the prompt-relevant design context plus clone config."""
+    digest = hashlib.sha256()
+
+    payload = {field: design_context.get(field) for field in PROMPT_FIELDS if field in design_context}
+    digest.update(json.dumps(payload, sort_keys=True, default=str).encode('utf-8'))
+
+    for viewport, screenshot in sorted((design_context.get('screenshots') or {}).items()):
+        digest.update(viewport.encode('utf-8'))
+        screenshot = getattr(screenshot, 'data', screenshot)
+        digest.update(screenshot if isinstance(screenshot, bytes) else str(screenshot).encode('utf-8'))
+
+    if config is not None:
+        config_data = {
+            key: value.value if isinstance(value, Enum) else value
+            for key, value in dataclasses.asdict(config).items()
+            if key not in NON_OUTPUT_CONFIG_FIELDS
+        }
+        digest.update(json.dumps(config_data, sort_keys=True, default=str).encode('utf-8'))
+
+    return digest.hexdigest()
+
+
+class CloneCache:
+    """Two-tier (memory LRU + disk) cache of generated HTML keyed by fingerprint."""
+
+    def __init__(self, directory: str, max_memory_entries: int = 128,
+                 max_disk_bytes: int = 256 * 1024 * 1024, ttl_seconds: float = 7 * 24 * 3600):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+        self._metrics = {'hits': 0, 'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached HTML for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._metrics['hits'] += 1
+                self._metrics['memory_hits'] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+        created_at, html = self._read_disk(key)
+        if html is not None and now - created_at < self.ttl_seconds:
+            with self._lock:
+                self._remember(key, created_at, html)
+                self._metrics['hits'] += 1
+                self._metrics['disk_hits'] += 1
+            return html
+
+        if html is not None:
+            self._remove_disk(key)
+        with self._lock:
+            self._metrics['misses'] += 1
+        return None
+
+    def put(self, key: str, html: str) -> None:
+        """Store generated HTML under key in both tiers."""
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, html)
+            self._metrics['stores'] += 1
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        replaced = self._size(path)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created_at': created_at, 'html': html}, f)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += self._size(path) - replaced
+        self._evict_disk()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self._metrics['hits'] + self._metrics['misses']
+            return {
+                **self._metrics,
+                'hit_rate': self._metrics['hits'] / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+            }
+
+    def _remember(self, key: str, created_at: float, html: str) -> None:
+        self._memory[key] = (created_at, html)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Tuple[float, Optional[str]]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            os.utime(path)  # mtime tracks recency for size-based eviction
+            return data['created_at'], data['html']
+        except (OSError, ValueError, KeyError):
+            return 0.0, None
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    def _remove_disk(self, key: str) -> None:
+        path = self._path(key)
+        size = self._size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+
+    def _evict_disk(self) -> None:
+        """Delete least recently used files until the store fits max_disk_bytes."""
+        with self._lock:
+            if self._disk_bytes is not None and self._disk_bytes <= self.max_disk_bytes:
+                return
+
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                continue
+
+        with self._lock:
+            self._disk_bytes = total
+            self._metrics['evictions'] += evicted
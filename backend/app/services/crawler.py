@@ -0,0 +1,318 @@
+import posixpath
+import threading
+import xml.etree.ElementTree as ET
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import parse_qsl, urldefrag, urlencode, urljoin, urlparse, urlunparse
+import requests
+
+from app.services.asset_fetcher import AssetFetcher, StylesheetCache
+from app.services.design_context import DesignContext
+from app.services.driver_pool import DriverPool
+from app.services.scrape_cache import ScrapeCache
+from app.services.scrape_executor import ExecutorSaturated, ScrapeExecutor
+from app.services.scraper import AdvancedWebsiteScraper, ScrapingConfig
+
+# Links that never lead to an HTML page worth cloning
+NON_PAGE_EXTENSIONS = frozenset((
+    '.pdf', '.zip', '.gz', '.tar', '.dmg', '.exe', '.jpg', '.jpeg', '.png', '.gif', '.webp',
+    '.svg', '.ico', '.mp4', '.webm', '.mp3', '.css', '.js', '.json', '.xml', '.txt'
+))
+TRACKING_PARAM_PREFIXES = ('utm_', 'fbclid', 'gclid', 'mc_')
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+
+def normalize_url(url: str, keep_query: bool = True) -> Optional[str]:
+    """Canonical form of an http(s) URL used to dedupe crawl targets.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, resolves dot segments and sorts the
+    query. Returns None for anything that is not http(s).
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    if scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+
+    host = parsed.hostname.lower()
+    port = parsed.port
+    if port and (scheme, port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{port}"
+
+    path = posixpath.normpath(parsed.path).rstrip('/') if parsed.path else ''
+    path = path or '/'
+
+    query = ''
+    if keep_query and parsed.query:
+        params = [
+            (k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True)
+            if not k.lower().startswith(TRACKING_PARAM_PREFIXES)
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunparse((scheme, host, path, '', query, ''))
+
+
+@dataclass
+class CrawlConfig:
+    """Configuration for crawling a site."""
+    max_pages: int = 20
+    max_depth: int = 2  # Link hops from the root; sitemap entries count as depth 1
+    use_sitemap: bool = True
+    follow_links: bool = True
+    keep_query: bool = False  # Treat ?a=1 and ?a=2 as different pages
+    max_workers: int = 4  # Parallel page scrapes, each holding one pooled browser (capped at the pool size)
+    per_host_concurrency: int = 2
+    sitemap_timeout: float = 10.0
+    max_sitemap_bytes: int = 10 * 1024 * 1024  # Per sitemap file; larger ones are skipped
+    max_sitemaps: int = 10  # Sitemap files read, index included
+    shared_threshold: float = 0.5  # Fraction of pages a color/style must appear on to count as shared
+
+
+@dataclass
+class SiteCrawlResult:
+    """Design contexts for every crawled page plus site-wide shared tokens."""
+    root_url: str
+    pages: Dict[str, DesignContext] = field(default_factory=dict)
+    depths: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+    shared_palette: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    shared_typography: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    stylesheet_cache: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'root_url': self.root_url,
+            'pages': {url: ctx.to_dict() for url, ctx in self.pages.items()},
+            'depths': self.depths,
+            'errors': self.errors,
+            'shared_palette': self.shared_palette,
+            'shared_typography': self.shared_typography,
+            'stylesheet_cache': self.stylesheet_cache,
+        }
+
+
+class SiteCrawler:
+    """Breadth-first crawler that runs the full scraper on every same-origin page.
+
+    Seeds come from the root URL and, optionally, its sitemap.xml. Pages are
+    scraped in parallel, each scrape leasing a browser from the shared driver
+    pool, with a per-host cap so one origin is not hammered. With a
+    scrape_executor every page is admitted there like any other scrape, so a
+    crawl competes fairly with clone requests instead of bypassing the limit.
+    All scrapes share one stylesheet cache, so site-wide CSS is fetched once.
+    """
+
+    def __init__(self, config: Optional[CrawlConfig] = None, scraping_config: Optional[ScrapingConfig] = None,
+                 driver_pool: Optional[DriverPool] = None, scrape_cache: Optional[ScrapeCache] = None,
+                 scrape_executor: Optional[ScrapeExecutor] = None):
+        self.config = config or CrawlConfig()
+        self.scraping_config = scraping_config or ScrapingConfig()
+        self.driver_pool = driver_pool
+        self.scrape_cache = scrape_cache
+        self.scrape_executor = scrape_executor
+        self.stylesheet_cache = StylesheetCache()
+        self.session = requests.Session()
+        self.fetcher = AssetFetcher(self.session, read_timeout=self.config.sitemap_timeout)
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def workers(self) -> int:
+        """Pages scraped at once; more than the pool has browsers would only queue on acquire."""
+        workers = self.config.max_workers
+        if self.driver_pool is not None:
+            workers = min(workers, self.driver_pool.config.max_size)
+        return max(1, workers)
+
+    def cancel(self) -> None:
+        """Stop scheduling pages; scrapes already running finish normally."""
+        self._cancelled.set()
+
+    def crawl(self, root_url: str) -> SiteCrawlResult:
+        root_url = root_url.strip()
+        root = normalize_url(root_url, self.config.keep_query)
+        if root is None:
+            raise ValueError(f"Not an http(s) URL: {root_url}")
+        self._origin = self._origin_of(root)
+        result = SiteCrawlResult(root_url=root_url)
+
+        # Normalized URLs only dedupe; pages are fetched exactly as they were linked
+        seen = {root}
+        frontier: List[Tuple[str, int]] = [(root_url, 0)]
+        if self.config.use_sitemap:
+            for url in self._sitemap_urls(root):
+                key = self._crawlable(url)
+                if key and key not in seen:
+                    seen.add(key)
+                    frontier.append((url, 1))
+
+        print(f"Crawling {root_url} (up to {self.config.max_pages} pages, depth {self.config.max_depth})")
+        workers = self.workers
+        running: Dict[Future, Tuple[str, int, threading.BoundedSemaphore]] = {}
+        scheduled = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='crawl') as executor:
+            while (frontier or running) and not self._cancelled.is_set():
+                retry_after = None
+                while frontier and len(running) < workers and scheduled < self.config.max_pages:
+                    url, depth = frontier[0]
+                    # Take the host slot here, so a slow host never parks executor workers
+                    slot = self._host_slot(url)
+                    if not slot.acquire(blocking=False):
+                        break
+                    try:
+                        future = self._submit(executor, url)
+                    except ExecutorSaturated as e:
+                        slot.release()
+                        if not (running or result.pages or result.errors):
+                            raise  # Not even the root page was admitted: let the caller back off
+                        retry_after = e.retry_after
+                        break
+                    frontier.pop(0)
+                    running[future] = (url, depth, slot)
+                    scheduled += 1
+                if not running:
+                    if retry_after is None:
+                        break
+                    # Poll rather than sleep the full estimate; a slot often frees up sooner
+                    self._cancelled.wait(min(retry_after, 1.0))
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, depth, slot = running.pop(future)
+                    slot.release()
+                    try:
+                        ctx = future.result()
+                    except Exception as e:
+                        result.errors[url] = str(e)
+                        continue
+                    result.pages[url] = ctx
+                    result.depths[url] = depth
+
+                    if self.config.follow_links and depth < self.config.max_depth:
+                        for link in self._page_links(ctx):
+                            key = self._crawlable(link)
+                            if key and key not in seen:
+                                seen.add(key)
+                                frontier.append((link, depth + 1))
+
+            for future in running:
+                future.cancel()  # Only reached when cancelled
+
+        self._summarize(result)
+        print(f"Crawl finished: {len(result.pages)} pages, {len(result.errors)} errors")
+        return result
+
+    def _submit(self, executor: ThreadPoolExecutor, url: str) -> Future:
+        if self.scrape_executor is not None:
+            return self.scrape_executor.submit_from_thread(self._scrape_page, url)
+        return executor.submit(self._scrape_page, url)
+
+    def _scrape_page(self, url: str) -> DesignContext:
+        scraper = AdvancedWebsiteScraper(
+            self.scraping_config,
+            driver_pool=self.driver_pool,
+            scrape_cache=self.scrape_cache,
+            stylesheet_cache=self.stylesheet_cache
+        )
+        return scraper.scrape_comprehensive(url)
+
+    def _page_links(self, ctx: DesignContext) -> List[str]:
+        """Absolute links found in a scraped document, as written (fragments dropped)."""
+        if ctx.soup is None:
+            return []
+        return [urldefrag(urljoin(ctx.url, anchor['href'])).url for anchor in ctx.soup.find_all('a', href=True)]
+
+    def _sitemap_urls(self, root: str) -> List[str]:
+        """Page URLs listed in /sitemap.xml, following one level of sitemap index.
+
+        Each file is capped at max_sitemap_bytes, at most max_sitemaps files are
+        read and collection stops at four times max_pages URLs.
+        """
+        limit = self.config.max_pages * 4
+        urls: List[str] = []
+        pending = [urljoin(root, '/sitemap.xml')]
+        visited = set()
+        while pending and len(urls) < limit and len(visited) < self.config.max_sitemaps:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in visited:
+                continue
+            visited.add(sitemap_url)
+            try:
+                tree = ET.fromstring(self.fetcher.fetch_text(sitemap_url, self.config.max_sitemap_bytes))
+            except Exception as e:
+                print(f"Warning: Could not read sitemap {sitemap_url}: {e}")
+                continue
+
+            is_index = tree.tag == f'{SITEMAP_NS}sitemapindex'
+            for loc in tree.iter(f'{SITEMAP_NS}loc'):
+                href = (loc.text or '').strip()
+                if is_index:
+                    if len(pending) < self.config.max_sitemaps:
+                        pending.append(href)
+                elif self._crawlable(href):
+                    urls.append(href)
+                    if len(urls) >= limit:
+                        break
+        return urls
+
+    def _crawlable(self, url: str) -> Optional[str]:
+        normalized = normalize_url(url, self.config.keep_query)
+        if normalized is None or self._origin_of(normalized) != self._origin:
+            return None
+        if posixpath.splitext(urlparse(normalized).path)[1].lower() in NON_PAGE_EXTENSIONS:
+            return None
+        return normalized
+
+    def _summarize(self, result: SiteCrawlResult) -> None:
+        """Build the shared palette and typography tables across all pages."""
+        page_count = len(result.pages)
+        if not page_count:
+            return
+        threshold = max(1, round(page_count * self.config.shared_threshold))
+
+        palette: Dict[str, Counter] = {}
+        for ctx in result.pages.values():
+            for category, values in (ctx.colors or {}).items():
+                if isinstance(values, list):
+                    palette.setdefault(category, Counter()).update(set(values))
+        result.shared_palette = {
+            category: [
+                {'color': color, 'pages': count}
+                for color, count in counter.most_common() if count >= threshold
+            ]
+            for category, counter in palette.items()
+        }
+
+        typography: Dict[str, Counter] = {}
+        for ctx in result.pages.values():
+            for selector, styles in (ctx.typography or {}).items():
+                typography.setdefault(selector, Counter())[tuple(sorted(styles.items()))] += 1
+        for selector, counter in typography.items():
+            styles, count = counter.most_common(1)[0]
+            if count >= threshold:
+                result.shared_typography[selector] = {
+                    'styles': dict(styles),
+                    'pages': count,
+                    'variants': len(counter)
+                }
+
+        result.stylesheet_cache = self.stylesheet_cache.stats()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.config.per_host_concurrency)
+                self._host_slots[host] = slot
+            return slot
+
+    @staticmethod
+    def _origin_of(url: str) -> Tuple[str, str]:
+        parsed = urlparse(url)
+        return parsed.scheme, parsed.netloc
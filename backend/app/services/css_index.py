@@ -0,0 +1,358 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+# Structural characters the scanner stops at; everything else is copied in bulk
+SIGNIFICANT = re.compile(r'/\*|["\'{};]|\burl\(', re.IGNORECASE)
+AT_KEYWORD = re.compile(r'@(-[a-z]+-)?([a-z-]+)', re.IGNORECASE)
+COLOR_PATTERN = re.compile(
+    r'#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{4}|[0-9a-fA-F]{3})\b'
+    r'|(?:rgba?|hsla?)\([^)]*\)',
+)
+VENDOR_PREFIX = re.compile(r'^-(?:webkit|moz|ms|o)-')
+# Grouping at-rules whose blocks contain ordinary style rules
+GROUPING_AT_RULES = frozenset(('media', 'supports', 'layer', 'container', 'document', 'scope', 'starting-style'))
+
+Declaration = Tuple[str, str, bool]  # (property, value, important)
+
+
+@dataclass
+class StyleRule:
+    selectors: Tuple[str, ...]
+    declarations: List[Declaration]
+    media: Tuple[str, ...] = ()  # Enclosing @media conditions, outermost first
+
+
+@dataclass
+class Keyframes:
+    name: str
+    frames: List[Tuple[str, List[Declaration]]]
+    media: Tuple[str, ...] = ()
+
+    def text(self) -> str:
+        """Compact CSS for the keyframe blocks."""
+        return ' '.join(
+            f"{selector} {{ {'; '.join(f'{p}: {v}' for p, v, _ in declarations)} }}"
+            for selector, declarations in self.frames
+        )
+
+
+@dataclass
+class CssIndex:
+    """Rules of one or more stylesheets, parsed once and queried by extractors."""
+    rules: List[StyleRule] = field(default_factory=list)
+    keyframes: List[Keyframes] = field(default_factory=list)
+    font_faces: List[Dict[str, str]] = field(default_factory=list)
+    media_queries: List[str] = field(default_factory=list)  # Unique conditions in source order
+    custom_properties: Dict[str, str] = field(default_factory=dict)  # Last definition wins
+    imports: List[str] = field(default_factory=list)
+
+    @classmethod
+    def merge(cls, indexes: Iterable['CssIndex']) -> 'CssIndex':
+        merged = cls()
+        seen_media = set()
+        for index in indexes:
+            merged.rules.extend(index.rules)
+            merged.keyframes.extend(index.keyframes)
+            merged.font_faces.extend(index.font_faces)
+            merged.custom_properties.update(index.custom_properties)
+            merged.imports.extend(index.imports)
+            for query in index.media_queries:
+                if query not in seen_media:
+                    seen_media.add(query)
+                    merged.media_queries.append(query)
+        return merged
+
+    def declarations(self, *properties: str, unprefixed: bool = True) -> Iterator[Tuple[StyleRule, str, str]]:
+        """(rule, property, value) for declarations of the given properties (all if none).
+
+        A property matches itself and its longhands, e.g. 'transition' also
+        yields 'transition-duration'; vendor prefixes are ignored when
+        unprefixed is set.
+        """
+        prefixes = tuple(p + '-' for p in properties)
+        for rule in self.rules:
+            for prop, value, _ in rule.declarations:
+                name = VENDOR_PREFIX.sub('', prop) if unprefixed and prop[0] == '-' else prop
+                if not properties or name in properties or name.startswith(prefixes):
+                    yield rule, prop, value
+
+    def color_values(self) -> Dict[str, int]:
+        """Color literals used in declarations, with usage counts, in first-seen order."""
+        counts: Dict[str, int] = {}
+        for rule in self.rules:
+            for _, value, _ in rule.declarations:
+                for match in COLOR_PATTERN.finditer(value):
+                    color = match.group()
+                    counts[color] = counts.get(color, 0) + 1
+        for value in self.custom_properties.values():
+            for match in COLOR_PATTERN.finditer(value):
+                counts[match.group()] = counts.get(match.group(), 0) + 1
+        return counts
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'rules': len(self.rules),
+            'keyframes': len(self.keyframes),
+            'font_faces': len(self.font_faces),
+            'media_queries': len(self.media_queries),
+            'custom_properties': len(self.custom_properties),
+        }
+
+
+def tokenize(css: str) -> Iterator[str]:
+    """Split CSS into '{', '}', ';' and the text between them.
+
+    Comments are dropped; quoted strings and url(...) tokens are kept intact,
+    so braces or semicolons inside them (e.g. data URIs) never end a
+    declaration or block. The scanner jumps between significant characters
+    with a regex instead of walking every character.
+    """
+    pos = 0
+    length = len(css)
+    chunk: List[str] = []
+    while pos < length:
+        match = SIGNIFICANT.search(css, pos)
+        if match is None:
+            chunk.append(css[pos:])
+            break
+        start = match.start()
+        if start > pos:
+            chunk.append(css[pos:start])
+        token = match.group()
+
+        if token == '/*':
+            end = css.find('*/', start + 2)
+            pos = length if end == -1 else end + 2
+            chunk.append(' ')
+        elif token in ('"', "'"):
+            end = start + 1
+            while end < length:
+                char = css[end]
+                if char == '\\':
+                    end += 2
+                    continue
+                if char == token or char == '\n':
+                    break
+                end += 1
+            chunk.append(css[start:end + 1])
+            pos = end + 1
+        elif len(token) > 1:
+            # url( ... ) up to its closing parenthesis, honouring quotes and escapes
+            end = start + len(token)
+            quote = None
+            while end < length:
+                char = css[end]
+                if char == '\\':
+                    end += 2
+                    continue
+                if quote:
+                    if char == quote:
+                        quote = None
+                elif char in ('"', "'"):
+                    quote = char
+                elif char == ')':
+                    break
+                end += 1
+            chunk.append(css[start:end + 1])
+            pos = end + 1
+        else:
+            text = ''.join(chunk)
+            if text.strip():
+                yield text
+            chunk = []
+            yield token
+            pos = start + 1
+
+    text = ''.join(chunk)
+    if text.strip():
+        yield text
+
+
+def parse_declaration(text: str) -> Optional[Declaration]:
+    prop, sep, value = text.partition(':')
+    prop = prop.strip()
+    if not sep or not prop:
+        return None
+    if not prop.startswith('--'):
+        prop = prop.lower()
+    value = value.strip()
+    important = False
+    if value.lower().endswith('!important'):
+        important = True
+        value = value[:-len('!important')].rstrip()
+    return prop, value, important
+
+
+def split_selectors(prelude: str) -> Tuple[str, ...]:
+    """Split a selector list on top-level commas (not those inside :is(), :not()...)."""
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return tuple(' '.join(s.split()) for s in selectors if s.strip())
+
+
+def _nest(parents: Tuple[str, ...], children: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Resolve CSS nesting: '&' stands for the parent, otherwise a descendant."""
+    resolved = []
+    for parent in parents:
+        for child in children:
+            resolved.append(child.replace('&', parent) if '&' in child else f"{parent} {child}")
+    return tuple(resolved)
+
+
+class _Frame:
+    __slots__ = ('kind', 'name', 'selectors', 'media', 'declarations', 'frames')
+
+    def __init__(self, kind: str, name: str = '', selectors: Tuple[str, ...] = (), media: Tuple[str, ...] = ()):
+        self.kind = kind
+        self.name = name
+        self.selectors = selectors
+        self.media = media
+        self.declarations: List[Declaration] = []
+        self.frames: List[Tuple[str, List[Declaration]]] = []
+
+
+def parse_stylesheet(css: str) -> CssIndex:
+    """Parse one stylesheet into a CssIndex in a single pass over its tokens."""
+    index = CssIndex()
+    seen_media = set()
+    stack = [_Frame('root')]
+    pending = ''
+
+    for token in tokenize(css):
+        frame = stack[-1]
+        if token == '{':
+            prelude, pending = ' '.join(pending.split()), ''
+            block = _open_block(prelude, frame, index, seen_media)
+            if block.selectors and block.kind in ('rule', 'group'):
+                # Registered on open so a rule precedes its nested rules in cascade order
+                index.rules.append(StyleRule(block.selectors, block.declarations, block.media))
+            stack.append(block)
+        elif token == ';':
+            _statement(pending, frame, index)
+            pending = ''
+        elif token == '}':
+            _statement(pending, frame, index)
+            pending = ''
+            if len(stack) > 1:
+                _close_block(stack.pop(), stack[-1], index)
+        else:
+            pending += token
+
+    _statement(pending, stack[-1], index)
+    # Unterminated blocks at EOF are closed implicitly, as browsers do
+    while len(stack) > 1:
+        _close_block(stack.pop(), stack[-1], index)
+    index.rules = [rule for rule in index.rules if rule.declarations]
+    return index
+
+
+def _open_block(prelude: str, parent: _Frame, index: CssIndex, seen_media: set) -> _Frame:
+    if parent.kind == 'keyframes':
+        return _Frame('frame', name=prelude, media=parent.media)
+    if prelude.startswith('@'):
+        match = AT_KEYWORD.match(prelude)
+        name = match.group(2).lower() if match else ''
+        condition = prelude[match.end():].strip() if match else ''
+        if name == 'media':
+            if condition not in seen_media:
+                seen_media.add(condition)
+                index.media_queries.append(condition)
+            return _Frame('group', selectors=parent.selectors, media=parent.media + (condition,))
+        if name in GROUPING_AT_RULES:
+            return _Frame('group', selectors=parent.selectors, media=parent.media)
+        if name == 'keyframes':
+            return _Frame('keyframes', name=condition.strip('"\''), media=parent.media)
+        if name == 'font-face':
+            return _Frame('font-face')
+        return _Frame('ignored')  # @page, @property, @counter-style...
+    if parent.kind == 'ignored':
+        return _Frame('ignored')
+
+    selectors = split_selectors(prelude)
+    if parent.selectors:
+        selectors = _nest(parent.selectors, selectors)
+    return _Frame('rule', selectors=selectors, media=parent.media)
+
+
+def _statement(text: str, frame: _Frame, index: CssIndex) -> None:
+    text = text.strip()
+    if not text:
+        return
+    if frame.kind == 'root' or (frame.kind == 'group' and not frame.selectors):
+        if text[:7].lower() == '@import':
+            index.imports.append(text[7:].strip())
+        return
+    declaration = parse_declaration(text)
+    if declaration is not None:
+        frame.declarations.append(declaration)
+
+
+def _close_block(frame: _Frame, parent: _Frame, index: CssIndex) -> None:
+    if frame.kind == 'rule' or frame.kind == 'group':
+        # The StyleRule was registered on open and shares this declaration list
+        for prop, value, _ in frame.declarations:
+            if prop.startswith('--'):
+                index.custom_properties[prop] = value
+    elif frame.kind == 'frame':
+        parent.frames.append((frame.name, frame.declarations))
+    elif frame.kind == 'keyframes':
+        index.keyframes.append(Keyframes(frame.name, frame.frames, frame.media))
+    elif frame.kind == 'font-face':
+        index.font_faces.append({prop: value for prop, value, _ in frame.declarations})
+
+
+class CssIndexCache:
+    """Thread-safe LRU of parsed stylesheets keyed by content hash.
+
+    Identical stylesheets (a site's shared CSS across pages, batches and
+    crawls) are parsed once per process.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CssIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, css: str) -> CssIndex:
+        key = hashlib.sha1(css.encode('utf-8', errors='replace')).hexdigest()
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return index
+            self.misses += 1
+
+        index = parse_stylesheet(css)
+        with self._lock:
+            self._entries[key] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+CSS_INDEX_CACHE = CssIndexCache()
+
+
+def build_css_index(sheets: Iterable[str], cache: Optional[CssIndexCache] = CSS_INDEX_CACHE) -> CssIndex:
+    """Merged index over stylesheets in cascade order, parsing each sheet at most once."""
+    parse = cache.get if cache is not None else parse_stylesheet
+    return CssIndex.merge(parse(css) for css in sheets if css)
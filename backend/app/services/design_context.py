@@ -0,0 +1,143 @@
+import dataclasses
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional, Sequence
+
+# Large payloads that are carried alongside the context but never serialized into prompts
+BLOB_FIELDS = frozenset(('html', 'soup', 'styles', 'screenshots'))
+
+# Prompt sections in the order they are worth spending characters on
+PROMPT_SECTION_PRIORITY = (
+    'url', 'computed_styles', 'measurements', 'typography', 'colors',
+    'layout_structure', 'responsive_breakpoints', 'animations', 'interactions',
+    'meta', 'structure', 'elements', 'assets'
+)
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def _fit(value: Any, budget: int) -> Optional[str]:
+    """Compact JSON for value within budget characters, dropping trailing items if needed."""
+    encoded = _compact(value)
+    if len(encoded) <= budget:
+        return encoded
+
+    if isinstance(value, Mapping):
+        parts, used = [], 2
+        for key, item in value.items():
+            part = f"{_compact(str(key))}:{_compact(item)}"
+            if used + len(part) + 1 > budget:
+                break
+            parts.append(part)
+            used += len(part) + 1
+        return '{' + ','.join(parts) + '}' if parts else None
+
+    if isinstance(value, (list, tuple)):
+        parts, used = [], 2
+        for item in value:
+            part = _compact(item)
+            if used + len(part) + 1 > budget:
+                break
+            parts.append(part)
+            used += len(part) + 1
+        return '[' + ','.join(parts) + ']' if parts else None
+
+    return None
+
+
+@dataclass(slots=True, eq=False)
+class DesignContext(Mapping):
+    """Typed result of a comprehensive scrape.
+
+    Behaves as a read-mostly mapping so existing ``context['key']`` and
+    ``context.get('key')`` call sites keep working. The raw HTML, parsed soup,
+    stylesheet text and screenshots are kept out of band (see BLOB_FIELDS) and
+    are skipped by the prompt serializer and by to_dict.
+    """
+    url: str
+    html: str = ''
+    soup: Any = None
+    styles: Dict[str, Any] = field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
+    structure: Dict[str, Any] = field(default_factory=dict)
+    elements: List[Dict[str, Any]] = field(default_factory=list)
+    computed_styles: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    measurements: Dict[str, Any] = field(default_factory=dict)
+    typography: Dict[str, Any] = field(default_factory=dict)
+    colors: Dict[str, Any] = field(default_factory=dict)
+    layout_structure: Dict[str, Any] = field(default_factory=dict)
+    responsive_breakpoints: Dict[str, Any] = field(default_factory=dict)
+    animations: Dict[str, Any] = field(default_factory=dict)
+    interactions: Dict[str, Any] = field(default_factory=dict)
+    assets: Dict[str, Any] = field(default_factory=dict)
+    screenshots: Dict[str, Any] = field(default_factory=dict)
+    extraction_timestamp: float = 0.0
+    scraper_version: str = '2.0'
+    extras: Dict[str, Any] = field(default_factory=dict)  # Anything without a dedicated field
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'DesignContext':
+        """Build a context from a plain dict, keeping unknown keys in extras."""
+        if isinstance(data, DesignContext):
+            return data
+        names = {f.name for f in dataclasses.fields(cls)} - {'extras'}
+        known = {k: v for k, v in data.items() if k in names}
+        extras = {k: v for k, v in data.items() if k not in names}
+        return cls(**known, extras=extras)
+
+    def to_dict(self, include_blobs: bool = False) -> Dict[str, Any]:
+        """Plain dict view; blobs are omitted unless requested."""
+        return {
+            key: self[key] for key in self
+            if include_blobs or key not in BLOB_FIELDS
+        }
+
+    def to_prompt_json(self, budget: int = 3000, sections: Sequence[str] = PROMPT_SECTION_PRIORITY) -> str:
+        """Compact JSON of the prompt-relevant sections, in priority order, within budget characters.
+
+        Sections that do not fit whole are trimmed item by item; empty
+        sections and blobs are skipped entirely.
+        """
+        parts, used = [], 2
+        for name in sections:
+            if name in BLOB_FIELDS:
+                continue
+            value = self.get(name)
+            if not value:
+                continue
+            prefix = f"{_compact(name)}:"
+            remaining = budget - used - len(prefix) - 1
+            if remaining <= 2:
+                break
+            encoded = _fit(value, remaining)
+            if encoded is None:
+                continue
+            parts.append(prefix + encoded)
+            used += len(prefix) + len(encoded) + 1
+        return '{' + ','.join(parts) + '}'
+
+    def __getitem__(self, key: str) -> Any:
+        if key != 'extras' and key in _FIELD_NAMES:
+            return getattr(self, key)
+        return self.extras[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key != 'extras' and key in _FIELD_NAMES:
+            setattr(self, key, value)
+        else:
+            self.extras[key] = value
+
+    def __iter__(self) -> Iterator[str]:
+        for name in _FIELD_NAMES:
+            if name != 'extras':
+                yield name
+        yield from self.extras
+
+    def __len__(self) -> int:
+        return len(_FIELD_NAMES) - 1 + len(self.extras)
+
+
+_FIELD_NAMES = tuple(f.name for f in dataclasses.fields(DesignContext))
@@ -0,0 +1,239 @@
+import functools
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+STRUCTURAL_ELEMENTS = ('header', 'nav', 'main', 'article', 'section', 'aside', 'footer')
+NON_CONTENT_ELEMENTS = ('script', 'style', 'meta', 'link')
+META_NAMES = ('description', 'keywords', 'author', 'viewport', 'charset')
+MAX_ELEMENTS = 200
+# String types Tag.get_text() collects for ordinary tags
+DEFAULT_TEXT_TYPES = frozenset((NavigableString, CData))
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_parser(name: str = 'auto') -> str:
+    """Map a configured parser name to one that is installed.
+
+    'auto' prefers lxml, then html5-parser, and falls back to the stdlib parser.
+    """
+    if name != 'auto':
+        return name
+    if importlib.util.find_spec('lxml') is not None:
+        return 'lxml'
+    if importlib.util.find_spec('html5_parser') is not None:
+        return 'html5-parser'
+    return 'html.parser'
+
+
+def make_soup(content: str, parser: str = 'auto') -> BeautifulSoup:
+    """Parse HTML with the configured parser backend."""
+    parser = resolve_parser(parser)
+    if parser == 'html5-parser':
+        from html5_parser import parse
+        return parse(content, treebuilder='soup', return_root=False)
+    return BeautifulSoup(content, parser)
+
+
+def generate_css_selector(element: Tag) -> str:
+    """Generate a CSS selector for an element."""
+    selector_parts = [element.name]
+
+    if element.get('id'):
+        selector_parts.append(f"#{element.get('id')}")
+
+    if element.get('class'):
+        classes = element.get('class')
+        if isinstance(classes, list):
+            selector_parts.append('.' + '.'.join(classes))
+
+    return ''.join(selector_parts)
+
+
+@dataclass
+class DomAnalysis:
+    """Everything the scraper derives from the static DOM."""
+    internal_css: List[str] = field(default_factory=list)
+    stylesheet_urls: List[str] = field(default_factory=list)
+    css_sources: List[Tuple[str, Any]] = field(default_factory=list)  # ('internal', index) or ('external', url) in document order
+    inline_styles: List[Dict[str, Any]] = field(default_factory=list)
+    meta: Dict[str, str] = field(default_factory=dict)
+    structure: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    elements: List[Dict[str, Any]] = field(default_factory=list)
+    assets: Dict[str, List[Dict[str, Any]]] = field(default_factory=lambda: {
+        'images': [], 'icons': [], 'videos': [], 'fonts': []
+    })
+
+
+class DomAnalyzer:
+    """Single-pass visitor over a parsed document.
+
+    One walk of the tree resolves image URLs and collects CSS sources, meta
+    tags, structural landmarks, the element summary and assets. Tag-specific
+    work lives in ``visit_<tag>`` methods.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+
+    def analyze(self, soup: BeautifulSoup) -> DomAnalysis:
+        self.analysis = DomAnalysis()
+        self._title: Optional[Tag] = None
+        self._meta_tags: List[Tag] = []
+        self._tags_seen = 0
+
+        nodes = list(soup.descendants)
+        self._measure_subtrees(nodes)
+
+        for node in nodes:
+            if not isinstance(node, Tag):
+                continue
+            visitor = getattr(self, f'visit_{node.name}', None)
+            if visitor is not None:
+                visitor(node)
+            self._visit_any(node)
+
+        self._finish_meta()
+        return self.analysis
+
+    def _visit_any(self, tag: Tag) -> None:
+        if tag.get('style') is not None:
+            self.analysis.inline_styles.append({
+                'element': tag.name,
+                'selector': generate_css_selector(tag),
+                'styles': tag.get('style')
+            })
+
+        if tag.name in STRUCTURAL_ELEMENTS:
+            self.analysis.structure.setdefault(tag.name, []).append({
+                'classes': tag.get('class', []),
+                'id': tag.get('id'),
+                'children_count': self._child_count.get(id(tag), 0),
+                'text_content_length': self._text_length_of(tag)
+            })
+
+        self._tags_seen += 1
+        if self._tags_seen <= MAX_ELEMENTS and tag.name not in NON_CONTENT_ELEMENTS:
+            elem_info = {
+                'tag': tag.name,
+                'classes': tag.get('class', []),
+                'id': tag.get('id'),
+                'text_length': self._text_length_of(tag),
+                'has_children': self._child_count.get(id(tag), 0) > 0,
+                'attributes': {k: v for k, v in tag.attrs.items() if k not in ['class', 'id']}
+            }
+            if tag.get('style'):
+                elem_info['inline_styles'] = tag.get('style')
+            self.analysis.elements.append(elem_info)
+
+    def _measure_subtrees(self, nodes: List[Any]) -> None:
+        """Compute stripped text length and child-tag count for every tag.
+
+        Walking the pre-order node list backwards visits each node after all
+        of its descendants, so totals are pushed up to parents in one linear
+        pass instead of calling get_text() on every ancestor.
+        """
+        text_length: Dict[int, int] = {}
+        child_count: Dict[int, int] = {}
+        for node in reversed(nodes):
+            parent = node.parent
+            if parent is None:
+                continue
+            parent_id = id(parent)
+            if isinstance(node, Tag):
+                text_length[parent_id] = text_length.get(parent_id, 0) + text_length.get(id(node), 0)
+                child_count[parent_id] = child_count.get(parent_id, 0) + 1
+            elif type(node) in DEFAULT_TEXT_TYPES:
+                text_length[parent_id] = text_length.get(parent_id, 0) + len(node.strip())
+        self._text_length = text_length
+        self._child_count = child_count
+
+    def _text_length_of(self, tag: Tag) -> int:
+        """len(tag.get_text(strip=True)), served from the subtree totals."""
+        string_types = getattr(tag, 'interesting_string_types', DEFAULT_TEXT_TYPES)
+        if set(string_types) != DEFAULT_TEXT_TYPES:
+            # <script>, <template>, <rt>... collect their own string types
+            return len(tag.get_text(strip=True))
+        return self._text_length.get(id(tag), 0)
+
+    def visit_img(self, tag: Tag) -> None:
+        src = tag.get('src')
+        if not src:
+            return
+        # Convert relative image URLs to absolute URLs
+        tag['src'] = urljoin(self.base_url, src)
+        self.analysis.assets['images'].append({
+            'src': tag['src'],
+            'alt': tag.get('alt', ''),
+            'width': tag.get('width'),
+            'height': tag.get('height'),
+            'loading': tag.get('loading'),
+            'sizes': tag.get('sizes'),
+            'srcset': tag.get('srcset')
+        })
+
+    def visit_svg(self, tag: Tag) -> None:
+        self.analysis.assets['icons'].append({
+            'type': 'svg',
+            'viewBox': tag.get('viewBox'),
+            'width': tag.get('width'),
+            'height': tag.get('height'),
+            'content': str(tag)[:200]  # First 200 chars
+        })
+
+    def visit_video(self, tag: Tag) -> None:
+        self.analysis.assets['videos'].append({
+            'src': tag.get('src'),
+            'poster': tag.get('poster'),
+            'width': tag.get('width'),
+            'height': tag.get('height'),
+            'autoplay': tag.get('autoplay') is not None,
+            'controls': tag.get('controls') is not None
+        })
+
+    def visit_style(self, tag: Tag) -> None:
+        if tag.string:
+            self.analysis.css_sources.append(('internal', len(self.analysis.internal_css)))
+            self.analysis.internal_css.append(tag.string)
+
+    def visit_link(self, tag: Tag) -> None:
+        rel = tag.get('rel') or []
+        if isinstance(rel, str):
+            rel = rel.split()
+        href = tag.get('href')
+        if href and 'stylesheet' in rel:
+            url = urljoin(self.base_url, href)
+            self.analysis.css_sources.append(('external', url))
+            self.analysis.stylesheet_urls.append(url)
+
+    def visit_title(self, tag: Tag) -> None:
+        if self._title is None:
+            self._title = tag
+
+    def visit_meta(self, tag: Tag) -> None:
+        self._meta_tags.append(tag)
+
+    def _finish_meta(self) -> None:
+        meta = self.analysis.meta
+        if self._title is not None:
+            meta['title'] = self._title.string
+
+        for name in META_NAMES:
+            tag = (
+                next((t for t in self._meta_tags if t.get('name') == name), None)
+                or next((t for t in self._meta_tags if t.get('property') == name), None)
+            )
+            if tag:
+                meta[name] = tag.get('content', '')
+
+        # Open Graph and Twitter meta
+        for tag in self._meta_tags:
+            prop = tag.get('property')
+            if prop and prop.startswith('og:'):
+                meta[prop] = tag.get('content', '')
+        for tag in self._meta_tags:
+            name = tag.get('name')
+            if name and name.startswith('twitter:'):
+                meta[name] = tag.get('content', '')
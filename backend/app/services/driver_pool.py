@@ -0,0 +1,224 @@
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+from app.services.browser_scripts import NETWORK_TRACKER_SCRIPT
+
+
+def create_chrome_driver(width: int = 1920, height: int = 1080) -> webdriver.Chrome:
+    """Launch a headless Chrome instance with the scraper's standard options."""
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument(f'--window-size={width},{height}')
+    # Network events let the scraper see which requests its resource policy blocked
+    chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    driver = webdriver.Chrome(options=chrome_options)
+    # Lets the readiness check see fetch/XHR still in flight on every page this driver loads
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_SCRIPT})
+    return driver
+
+
+class DriverPoolTimeout(Exception):
+    """Raised when no driver becomes available within the acquire timeout."""
+
+
+@dataclass
+class DriverPoolConfig:
+    """Configuration for the shared headless Chrome pool."""
+    max_size: int = 2
+    warm_size: int = 1  # Drivers launched up front when the pool starts
+    max_pages_per_driver: int = 50  # Recycle a browser after this many page loads
+    acquire_timeout: float = 60.0
+    window_width: int = 1920
+    window_height: int = 1080
+
+
+class PooledDriver:
+    """A pooled WebDriver plus the bookkeeping needed to recycle it."""
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+        self.leases = 0
+        self.created_at = time.time()
+
+
+class DriverPool:
+    """Bounded pool of warm headless Chrome drivers leased out per scrape."""
+
+    def __init__(self, config: Optional[DriverPoolConfig] = None):
+        self.config = config or DriverPoolConfig()
+        self._cond = threading.Condition()
+        self._idle: List[PooledDriver] = []
+        self._size = 0
+        self._closed = False
+        self._metrics = {
+            'leases': 0,
+            'created': 0,
+            'recycled': 0,
+            'unhealthy': 0,
+            'timeouts': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+        }
+
+    def start(self) -> None:
+        """Launch the warm drivers."""
+        for _ in range(min(self.config.warm_size, self.config.max_size)):
+            with self._cond:
+                self._size += 1
+            try:
+                pooled = self._create()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                print(f"Warning: Could not warm up Chrome driver pool: {e}")
+                return
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """Lease a healthy driver, waiting for one to free up if the pool is full."""
+        timeout = self.config.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        pooled = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool is closed")
+                if self._idle:
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.config.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    if not self._idle and self._size >= self.config.max_size:
+                        self._metrics['timeouts'] += 1
+                        raise DriverPoolTimeout(f"No browser available after {timeout:.0f}s")
+
+            waited = time.monotonic() - started
+            self._metrics['leases'] += 1
+            self._metrics['queue_wait_total'] += waited
+            self._metrics['queue_wait_max'] = max(self._metrics['queue_wait_max'], waited)
+
+        if pooled is not None and not self._is_healthy(pooled):
+            with self._cond:
+                self._metrics['unhealthy'] += 1
+            self._quit(pooled)
+            pooled = None
+
+        if pooled is None:
+            try:
+                pooled = self._create()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        pooled.leases += 1
+        return pooled
+
+    def release(self, pooled: PooledDriver, pages: int = 0, discard: bool = False) -> None:
+        """Return a leased driver, resetting its state or recycling it."""
+        pooled.pages += pages
+        recycle = discard or self._closed or pooled.pages >= self.config.max_pages_per_driver
+        if not recycle:
+            try:
+                self._reset(pooled)
+            except Exception:
+                recycle = True
+
+        if recycle:
+            self._quit(pooled)
+            with self._cond:
+                self._size -= 1
+                self._metrics['recycled'] += 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Context manager yielding a leased driver."""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+
+    def close(self) -> None:
+        """Quit every idle driver; leased drivers are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool occupancy and queue-wait metrics."""
+        with self._cond:
+            leases = self._metrics['leases']
+            return {
+                **self._metrics,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.config.max_size,
+                'queue_wait_avg': self._metrics['queue_wait_total'] / leases if leases else 0.0,
+            }
+
+    def _create(self) -> PooledDriver:
+        driver = create_chrome_driver(self.config.window_width, self.config.window_height)
+        with self._cond:
+            self._metrics['created'] += 1
+        return PooledDriver(driver)
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _reset(self, pooled: PooledDriver) -> None:
+        """Clear cookies, cache and storage of every origin so the next lease starts clean.
+
+        WebDriver's own calls only reach the origin currently loaded, so the
+        whole browser is cleared through DevTools where available.
+        """
+        driver = pooled.driver
+        if hasattr(driver, 'execute_cdp_cmd'):
+            driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+            driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': '*', 'storageTypes': 'all'})
+        else:
+            driver.delete_all_cookies()
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass  # about:blank and opaque origins have no storage
+        driver.get('about:blank')
+        driver.set_window_size(self.config.window_width, self.config.window_height)
+
+    def _quit(self, pooled: PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
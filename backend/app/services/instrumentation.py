@@ -0,0 +1,209 @@
+import contextvars
+import functools
+import os
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('current_span', default=None)
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process right now, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * PAGE_SIZE
+
+
+class Span:
+    """A timed pipeline stage with its own counters and totals that roll up into its parent.
+
+    rss_delta is the change in process RSS over the stage; the process is
+    shared, so stages running concurrently see each other's allocations.
+    """
+
+    def __init__(self, name: str, parent: Optional['Span'] = None, **attributes):
+        self.name = name
+        self.parent = parent
+        self.attributes = attributes
+        self.counters: Dict[str, float] = {}  # Incremented while this span was current
+        self.totals: Dict[str, float] = {}  # counters plus those of every descendant
+        self.children: List['Span'] = []
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self._rss_start = current_rss_bytes()
+        self.rss_delta: Optional[int] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def incr(self, counter: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+            self.totals[counter] = self.totals.get(counter, 0) + amount
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.start
+        rss = current_rss_bytes()
+        if rss is not None and self._rss_start is not None:
+            self.rss_delta = rss - self._rss_start
+        if self.parent is not None:
+            with self._lock:
+                totals = dict(self.totals)
+            with self.parent._lock:
+                self.parent.children.append(self)
+                for counter, value in totals.items():
+                    self.parent.totals[counter] = self.parent.totals.get(counter, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            'name': self.name,
+            'duration_ms': round(self.duration * 1000, 2) if self.duration is not None else None,
+            'counters': dict(self.counters),
+            'totals': dict(self.totals),
+            'rss_delta_mb': round(self.rss_delta / (1024 * 1024), 1) if self.rss_delta is not None else None,
+        }
+        if self.attributes:
+            data['attributes'] = self.attributes
+        if self.error:
+            data['error'] = self.error
+        if self.children:
+            data['children'] = [child.to_dict() for child in sorted(self.children, key=lambda c: c.start)]
+        return data
+
+
+@contextmanager
+def span(name: str, activate: bool = True, **attributes) -> Iterator[Span]:
+    """Time a stage as a child of the current span and report it to METRICS.
+
+    The current span lives in a context variable, so stages started in
+    asyncio tasks or in threads launched with a copied context (ScrapeExecutor,
+    asyncio.to_thread) nest under the span that was current when they started.
+    Async generators that yield inside a stage pass activate=False and count
+    on the span directly, since the context variable would leak to the
+    consumer at every yield.
+    """
+    current = Span(name, parent=_current_span.get(), **attributes)
+    token = _current_span.set(current) if activate else None
+    try:
+        yield current
+    except BaseException as e:
+        current.error = type(e).__name__
+        raise
+    finally:
+        if token is not None:
+            _current_span.reset(token)
+        current.finish()
+        METRICS.observe(current)
+
+
+def incr(counter: str, amount: float = 1) -> None:
+    """Add to a counter on the current span; a no-op outside any span."""
+    current = _current_span.get()
+    if current is not None:
+        current.incr(counter, amount)
+
+
+def instrument_driver(driver: Any) -> Any:
+    """Count WebDriver round trips by wrapping the instance's execute method.
+
+    Idempotent, so pooled drivers are only wrapped once; each command is
+    attributed to whichever span is current when it is issued.
+    """
+    if getattr(driver, '_instrumented', False):
+        return driver
+    execute = driver.execute
+
+    @functools.wraps(execute)
+    def counting_execute(driver_command, params=None):
+        incr('webdriver_commands')
+        return execute(driver_command, params)
+
+    driver.execute = counting_execute
+    driver._instrumented = True
+    return driver
+
+
+class MetricsRegistry:
+    """Aggregates finished spans into Prometheus text exposition format."""
+
+    def __init__(self, prefix: str = 'clone'):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[tuple, float] = {}
+        self._errors: Dict[str, int] = {}
+
+    def observe(self, finished: Span) -> None:
+        with self._lock:
+            histogram = self._durations.setdefault(finished.name, {
+                'buckets': [0] * len(DURATION_BUCKETS), 'count': 0, 'sum': 0.0
+            })
+            histogram['count'] += 1
+            histogram['sum'] += finished.duration
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if finished.duration <= bound:
+                    histogram['buckets'][i] += 1
+            # Own counters only: totals would count a command once per enclosing stage
+            for counter, value in finished.counters.items():
+                key = (finished.name, counter)
+                self._counters[key] = self._counters.get(key, 0) + value
+            if finished.error:
+                self._errors[finished.name] = self._errors.get(finished.name, 0) + 1
+
+    def render(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Prometheus text format; gauges are extra point-in-time values to include."""
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_stage_duration_seconds Duration of pipeline stages.",
+            f"# TYPE {p}_stage_duration_seconds histogram",
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._durations.items()):
+                for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+                    lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'{p}_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'{p}_stage_duration_seconds_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+                lines.append(f'{p}_stage_duration_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+            lines.append(f"# HELP {p}_stage_errors_total Pipeline stages that raised.")
+            lines.append(f"# TYPE {p}_stage_errors_total counter")
+            for stage, count in sorted(self._errors.items()):
+                lines.append(f'{p}_stage_errors_total{{stage="{stage}"}} {count}')
+
+            for counter in sorted({counter for _, counter in self._counters}):
+                lines.append(f"# TYPE {p}_{counter}_total counter")
+                for (stage, name), value in sorted(self._counters.items()):
+                    if name == counter:
+                        lines.append(f'{p}_{counter}_total{{stage="{stage}"}} {value:g}')
+
+        lines.append("# TYPE process_peak_rss_bytes gauge")
+        lines.append(f"process_peak_rss_bytes {peak_rss_bytes()}")
+        rss = current_rss_bytes()
+        if rss is not None:
+            lines.append("# TYPE process_rss_bytes gauge")
+            lines.append(f"process_rss_bytes {rss}")
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
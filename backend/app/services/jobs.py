@@ -0,0 +1,349 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.services.driver_pool import DriverPoolTimeout
+from app.services.scrape_executor import ExecutorSaturated
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    stage TEXT,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    not_before REAL NOT NULL DEFAULT 0,
+    error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL,
+    owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, not_before, created_at);
+"""
+# Columns added after the first release, for databases created before them
+MIGRATIONS = {
+    'owner': 'ALTER TABLE jobs ADD COLUMN owner TEXT',
+    'lease_expires': 'ALTER TABLE jobs ADD COLUMN lease_expires REAL',
+}
+
+
+@dataclass
+class CloneJob:
+    """A queued clone request and its progress."""
+    id: str
+    status: str
+    url: str
+    options: Dict[str, Any] = field(default_factory=dict)
+    stage: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 3
+    error: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'url': self.url,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobStore:
+    """SQLite-backed persistent job queue shared by every process on the database.
+
+    One connection is shared behind a lock. Statements can wait on other
+    processes' write locks, so async callers should run them in a thread.
+    A running job is leased to the store that claimed it until lease_expires;
+    the owner renews the lease while it works, and only jobs whose lease ran
+    out (their process died) are put back on the queue.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 60.0):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.owner = uuid.uuid4().hex
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._conn.execute(statement)
+
+    def create(self, url: str, options: Dict[str, Any], max_attempts: int) -> CloneJob:
+        now = time.time()
+        job = CloneJob(
+            id=uuid.uuid4().hex, status=QUEUED, url=url, options=options,
+            max_attempts=max_attempts, created_at=now, updated_at=now
+        )
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO jobs (id, status, url, options, max_attempts, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job.id, job.status, url, json.dumps(options), max_attempts, now, now)
+            )
+        return job
+
+    def get(self, job_id: str) -> Optional[CloneJob]:
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def result(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute('SELECT result FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return row['result'] if row else None
+
+    def claim(self) -> Optional[CloneJob]:
+        """Atomically move the oldest runnable queued job to running."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT * FROM jobs WHERE status = ? AND not_before <= ? ORDER BY created_at LIMIT 1',
+                    (QUEUED, now)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute('COMMIT')
+                    return None
+                self._conn.execute(
+                    'UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ?, owner = ?, '
+                    'lease_expires = ? WHERE id = ?',
+                    (RUNNING, now, self.owner, now + self.lease_seconds, row['id'])
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        job = self._job(row)
+        job.status = RUNNING
+        job.attempts += 1
+        return job
+
+    def set_stage(self, job_id: str, stage: str) -> None:
+        self._update(job_id, 'stage = ?, updated_at = ?', (stage, time.time()), only_status=RUNNING)
+
+    def succeed(self, job_id: str, html: str) -> None:
+        now = time.time()
+        self._update(job_id, 'status = ?, stage = NULL, result = ?, error = NULL, updated_at = ?, finished_at = ?',
+                     (SUCCEEDED, html, now, now), only_status=RUNNING)
+
+    def fail(self, job_id: str, error: str) -> None:
+        now = time.time()
+        self._update(job_id, 'status = ?, error = ?, updated_at = ?, finished_at = ?',
+                     (FAILED, error, now, now), only_status=RUNNING)
+
+    def requeue(self, job_id: str, error: Optional[str], delay: float, count_attempt: bool = True) -> None:
+        """Put a running job back on the queue after delay seconds."""
+        attempts = '' if count_attempt else ', attempts = attempts - 1'
+        self._update(job_id, f'status = ?, stage = NULL, error = ?, not_before = ?, updated_at = ?{attempts}',
+                     (QUEUED, error, time.time() + delay, time.time()), only_status=RUNNING)
+
+    def cancel(self, job_id: str) -> Optional[CloneJob]:
+        """Cancel a job that has not finished yet; returns the job as stored afterwards."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, updated_at = ?, finished_at = ? "
+                f"WHERE id = ? AND status NOT IN ({','.join('?' * len(FINISHED_STATES))})",
+                (CANCELLED, now, now, job_id, *FINISHED_STATES)
+            )
+        return self.get(job_id)
+
+    def renew(self, job_ids: List[str]) -> None:
+        """Extend the leases of running jobs this store owns."""
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET lease_expires = ? WHERE owner = ? AND status = ? "
+                f"AND id IN ({','.join('?' * len(job_ids))})",
+                (time.time() + self.lease_seconds, self.owner, RUNNING, *job_ids)
+            )
+
+    def requeue_expired(self) -> int:
+        """Requeue running jobs whose owner stopped renewing their lease."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE jobs SET status = ?, stage = NULL, owner = NULL, updated_at = ? '
+                'WHERE status = ? AND (lease_expires IS NULL OR lease_expires < ?)',
+                (QUEUED, time.time(), RUNNING, time.time())
+            )
+        return cursor.rowcount
+
+    def purge(self, ttl_seconds: float) -> int:
+        """Delete finished jobs (and their results) older than ttl_seconds."""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({','.join('?' * len(FINISHED_STATES))}) AND finished_at < ?",
+                (*FINISHED_STATES, time.time() - ttl_seconds)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) AS n FROM jobs GROUP BY status').fetchall()
+        return {row['status']: row['n'] for row in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _update(self, job_id: str, assignments: str, params: tuple, only_status: str) -> None:
+        # Guarded by status and owner so a cancelled job is never resurrected by a
+        # late worker, nor a recovered job overwritten by the worker that lost it
+        with self._lock:
+            self._conn.execute(
+                f'UPDATE jobs SET {assignments} WHERE id = ? AND status = ? AND owner = ?',
+                (*params, job_id, only_status, self.owner)
+            )
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> CloneJob:
+        return CloneJob(
+            id=row['id'], status=row['status'], url=row['url'], options=json.loads(row['options']),
+            stage=row['stage'], attempts=row['attempts'], max_attempts=row['max_attempts'],
+            error=row['error'], created_at=row['created_at'], updated_at=row['updated_at'],
+            finished_at=row['finished_at']
+        )
+
+
+# handler(job, set_stage) -> generated HTML
+JobHandler = Callable[[CloneJob, Callable[[str], None]], Awaitable[str]]
+
+
+class JobWorkerPool:
+    """Async workers that drain a JobStore through a handler.
+
+    Failed attempts are retried with exponential backoff until max_attempts;
+    a saturated scrape executor requeues the job without spending an attempt.
+    Cancelling a running job cancels its task. Store calls run in threads so
+    a busy database never blocks the event loop.
+    """
+
+    def __init__(self, store: JobStore, handler: JobHandler, workers: int = 2,
+                 poll_interval: float = 1.0, retry_backoff: float = 5.0,
+                 result_ttl_seconds: float = 24 * 3600):
+        self.store = store
+        self.handler = handler
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.result_ttl_seconds = result_ttl_seconds
+        self.logger = logging.getLogger(__name__)
+        self._tasks: list = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self) -> None:
+        # Running jobs stay marked running and are requeued once their lease expires
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after a job has been enqueued."""
+        self._wakeup.set()
+
+    def cancel(self, job_id: str) -> Optional[CloneJob]:
+        job = self.store.cancel(job_id)
+        task = self._running.get(job_id)
+        if task is not None and job is not None and job.status == CANCELLED:
+            task.cancel()
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {'workers': self.workers, 'active': len(self._running), 'jobs': self.store.counts()}
+
+    async def _worker(self) -> None:
+        while True:
+            job = await asyncio.to_thread(self.store.claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self.handler(job, lambda stage: self.store.set_stage(job.id, stage)))
+            self._running[job.id] = task
+            try:
+                html = await task
+                await asyncio.to_thread(self.store.succeed, job.id, html)
+            except asyncio.CancelledError:
+                if self._stopping:
+                    raise
+                self.logger.info(f"Job {job.id} cancelled")
+            except ExecutorSaturated as e:
+                await asyncio.to_thread(self.store.requeue, job.id, None, e.retry_after, count_attempt=False)
+            except DriverPoolTimeout:
+                # Browsers busy is back-pressure too, not a failure of this job
+                await asyncio.to_thread(self.store.requeue, job.id, None, self.retry_backoff, count_attempt=False)
+            except Exception as e:
+                self.logger.error(f"Job {job.id} attempt {job.attempts} failed: {e!r}")
+                if job.attempts < job.max_attempts:
+                    await asyncio.to_thread(
+                        self.store.requeue, job.id, str(e), self.retry_backoff * 2 ** (job.attempts - 1)
+                    )
+                else:
+                    await asyncio.to_thread(self.store.fail, job.id, str(e))
+            finally:
+                self._running.pop(job.id, None)
+
+    async def _heartbeat(self) -> None:
+        """Renew this process's leases and recover jobs whose owner died."""
+        while True:
+            await asyncio.to_thread(self.store.renew, list(self._running))
+            recovered = await asyncio.to_thread(self.store.requeue_expired)
+            if recovered:
+                self.logger.warning(f"Requeued {recovered} job(s) whose worker stopped renewing its lease")
+                self.notify()
+            await asyncio.sleep(self.store.lease_seconds / 3)
+
+    async def _janitor(self) -> None:
+        while True:
+            purged = await asyncio.to_thread(self.store.purge, self.result_ttl_seconds)
+            if purged:
+                self.logger.info(f"Purged {purged} expired job(s)")
+            await asyncio.sleep(min(self.result_ttl_seconds, 3600))
@@ -1,25 +1,26 @@
 import google.generativeai as genai
 import os
-from typing import Dict, Any, Optional, List, Tuple
-import json
+from typing import Dict, Any, AsyncIterator, Optional, List, Tuple
 import asyncio
 import logging
 from dataclasses import dataclass, field
 import re
 from enum import Enum
-import base64
-from PIL import Image
-import io
 
-def make_json_safe(obj):
-    if isinstance(obj, dict):
-        return {k: make_json_safe(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_json_safe(v) for v in obj]
-    elif 'bs4' in str(type(obj)):  # Catch BeautifulSoup, Tag, etc.
-        return str(obj)
-    else:
-        return obj
+from app.services.clone_cache import CloneCache, design_context_fingerprint
+from app.services.breakpoints import render_breakpoint_table
+from app.services.design_context import DesignContext
+from app.services.instrumentation import Span, incr, span
+from app.services.prompt_builder import (
+    PromptBuilder,
+    estimate_tokens,
+    render_compact,
+    render_interned_styles,
+    render_lines,
+    strip_default_styles,
+    truncate_to_tokens
+)
+from app.services.screenshots import as_screenshot
 
 
 class CloneAccuracy(Enum):
@@ -53,17 +54,64 @@ class PrecisionCloneConfig:
     include_accessibility: bool = True
     preserve_exact_dimensions: bool = True
     use_screenshots: bool = True  # New: Use screenshots for visual reference
+    pass_timeout_seconds: float = 120.0  # Upper bound for each Gemini pass
+    use_cache: bool = True  # Reuse HTML generated for an identical design context
+    
+    # Prompt token budgets per pass
+    structure_prompt_tokens: int = 6000
+    visual_prompt_tokens: int = 4000
+    refinement_prompt_tokens: int = 8000
+    single_pass_prompt_tokens: int = 8000
     
     # Debug options
     include_debug_comments: bool = False
     verbose_logging: bool = True
 
+class StreamingFenceFilter:
+    """Strips markdown code fences from streamed model output line by line.
+
+    Text is released as soon as a line is complete, so clients see tokens
+    with at most one line of delay; the final cleaned document is still
+    produced by _clean_html_response once the stream finishes.
+    """
+
+    def __init__(self):
+        self._partial = ''
+
+    def feed(self, chunk: str) -> str:
+        lines = (self._partial + chunk).split('\n')
+        self._partial = lines.pop()
+        return ''.join(self._filter(line) + '\n' for line in lines if self._keep(line))
+
+    def flush(self) -> str:
+        line, self._partial = self._partial, ''
+        return self._filter(line) if self._keep(line) else ''
+
+    @staticmethod
+    def _keep(line: str) -> bool:
+        return not re.fullmatch(r'\s*```(html)?\s*', line)
+
+    @staticmethod
+    def _filter(line: str) -> str:
+        return re.sub(r'^```html', '', line)
+
+
 class HighPrecisionLLMCloner:
-    def __init__(self, config: Optional[PrecisionCloneConfig] = None):
-        """Initialize the high-precision LLM cloner with Gemini."""
+    def __init__(self, config: Optional[PrecisionCloneConfig] = None, cache: Optional[CloneCache] = None,
+                 model: Optional[Any] = None):
+        """Initialize the high-precision LLM cloner with Gemini.
+        
+        model replaces the Gemini client with anything exposing a compatible
+        generate_content(), e.g. a deterministic stub for benchmarks.
+        """
         self.config = config or PrecisionCloneConfig()
+        self.cache = cache
         self.logger = self._setup_logger()
         
+        if model is not None:
+            self.model = model
+            return
+        
         # Configure Gemini
         api_key = os.getenv('GEMINI_API_KEY')
         if not api_key:
@@ -96,42 +144,202 @@ class HighPrecisionLLMCloner:
     
     async def generate_pixel_perfect_html(self, design_context: Dict[str, Any]) -> str:
         """Generate pixel-perfect HTML with enhanced Gemini prompting."""
+        with span('clone'):
+            return await self._generate_pixel_perfect_html(design_context)
+    
+    async def _generate_pixel_perfect_html(self, design_context: Dict[str, Any]) -> str:
         try:
+            design_context = DesignContext.from_dict(design_context)
             self.logger.info(f"Starting pixel-perfect generation for {design_context.get('url', 'unknown URL')}")
             
             # Enhanced validation
             self._validate_comprehensive_context(design_context)
             
+            cache_key = None
+            if self.cache is not None and self.config.use_cache:
+                cache_key = design_context_fingerprint(design_context, self.config)
+                cached_html = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached_html is not None:
+                    self.logger.info(f"Clone cache hit ({cache_key[:12]}), skipping generation")
+                    return cached_html
+            
             if self.config.multi_pass_generation:
-                return await self._multi_pass_generation(design_context)
+                html, fell_back = await self._multi_pass_generation(design_context)
             else:
-                return await self._single_pass_generation(design_context)
+                html, fell_back = await self._single_pass_generation(design_context), False
+            
+            # A fallback draft is a degraded answer; the next request should try again
+            if cache_key is not None and not fell_back:
+                await asyncio.to_thread(self.cache.put, cache_key, html)
+            
+            return html
                 
         except Exception as e:
             self.logger.error(f"Error in pixel-perfect generation: {str(e)}")
             raise Exception(f"Error generating pixel-perfect HTML: {str(e)}")
     
-    async def _multi_pass_generation(self, design_context: Dict[str, Any]) -> str:
-        """Generate multiple versions with different approaches."""
-        self.logger.info("Starting multi-pass generation")
+    async def stream_pixel_perfect_html(self, design_context: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Generate HTML like generate_pixel_perfect_html, yielding (event, data) progress events.
+
+        Emits 'stage' events as passes start and finish, 'token' events with
+        text of the final pass as the model produces it, and a closing 'done'
+        event with the cleaned document.
+        """
+        design_context = DesignContext.from_dict(design_context)
+        self._validate_comprehensive_context(design_context)
+        
+        cache_key = None
+        if self.cache is not None and self.config.use_cache:
+            cache_key = design_context_fingerprint(design_context, self.config)
+            cached_html = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached_html is not None:
+                self.logger.info(f"Clone cache hit ({cache_key[:12]}), skipping generation")
+                yield 'done', {'html': cached_html, 'cached': True}
+                return
+        
+        if self.config.multi_pass_generation:
+            passes = {
+                asyncio.ensure_future(self._run_pass("Structure", self._generate_structure_focused(design_context))): 'structure',
+                asyncio.ensure_future(self._run_pass("Visual", self._generate_visual_focused(design_context))): 'visual'
+            }
+            for name in passes.values():
+                yield 'stage', {'stage': f'{name}_started'}
+            drafts_html: Dict[str, Optional[str]] = {}
+            try:
+                pending = set(passes)
+                while pending:
+                    finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        name = passes[task]
+                        drafts_html[name] = task.result()
+                        yield 'stage', {'stage': f'{name}_done', 'ok': drafts_html[name] is not None}
+            finally:
+                for task in passes:
+                    task.cancel()
+            drafts = self._collect_drafts(drafts_html.get('structure'), drafts_html.get('visual'))
+            if not drafts:
+                raise Exception("Both structure and visual passes failed")
+            fell_back = len(drafts) < 2
+            prompt = self._create_refinement_prompt(design_context, drafts)
+            yield 'stage', {'stage': 'refinement_started'}
+        else:
+            drafts = []
+            fell_back = False
+            prompt = self._create_comprehensive_prompt(design_context)
+            yield 'stage', {'stage': 'generation_started'}
+        
+        fences = StreamingFenceFilter()
+        chunks = []
+        try:
+            with span('clone.refinement' if drafts else 'clone.single_pass', activate=False) as stage:
+                async for chunk in self._stream_generate(prompt, stage):
+                    chunks.append(chunk)
+                    text = fences.feed(chunk)
+                    if text:
+                        yield 'token', {'text': text}
+            text = fences.flush()
+            if text:
+                yield 'token', {'text': text}
+            html = self._clean_html_response(''.join(chunks))
+        except Exception as e:
+            if not drafts:
+                raise
+            self.logger.error(f"Streaming refinement failed: {e!r}")
+            # Fall back to the better draft, as the non-streaming refinement does
+            html = max((draft for _, draft in drafts), key=len)
+            fell_back = True
+        
+        if cache_key is not None and not fell_back:
+            await asyncio.to_thread(self.cache.put, cache_key, html)
+        yield 'done', {'html': html, 'cached': False}
+    
+    async def _stream_generate(self, prompt: str, stage: Optional[Span] = None) -> AsyncIterator[str]:
+        """Yield response text chunks from a streaming Gemini call.
+
+        The SDK's stream is a blocking iterator, so it is drained on a worker
+        thread and handed to the event loop through a queue. The whole stream
+        must finish within pass_timeout_seconds, like a non-streaming pass, so
+        a model trickling tokens cannot hold the response open indefinitely.
+        Token usage is recorded on stage (or the current span) once the stream ends.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        deadline = loop.time() + self.config.pass_timeout_seconds
+        cancelled = False
+        done = object()
+        usage = None
+        received = []
+        
+        def produce():
+            nonlocal usage
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True):
+                    if cancelled:
+                        return
+                    usage = getattr(chunk, 'usage_metadata', None) or usage
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+        
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"Streamed pass exceeded {self.config.pass_timeout_seconds}s")
+                item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                if item is done:
+                    self._record_usage(prompt, usage, ''.join(received), stage)
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                if item:
+                    received.append(item)
+                    yield item
+        finally:
+            # Stop the producer at its next chunk if the client went away
+            cancelled = True
+            producer.cancel()
+    
+    async def _multi_pass_generation(self, design_context: Dict[str, Any]) -> Tuple[str, bool]:
+        """Generate multiple versions with different approaches.
         
-        # Pass 1: Structure-focused
-        structure_html = await self._generate_structure_focused(design_context)
+        Returns the HTML and whether it fell back: a draft pass failed or the
+        refinement did and the better draft was returned instead.
+        """
+        self.logger.info("Starting multi-pass generation")
         
-        # Pass 2: Visual-focused with screenshots
-        visual_html = await self._generate_visual_focused(design_context)
+        # Pass 1 + 2: Structure- and visual-focused drafts are independent, so run them concurrently
+        structure_html, visual_html = await asyncio.gather(
+            self._run_pass("Structure", self._generate_structure_focused(design_context)),
+            self._run_pass("Visual", self._generate_visual_focused(design_context))
+        )
+        if not structure_html and not visual_html:
+            raise Exception("Both structure and visual passes failed")
         
         # Pass 3: Refinement pass
-        refined_html = await self._generate_refinement_pass(design_context, structure_html, visual_html)
+        refined_html, refined = await self._generate_refinement_pass(design_context, structure_html, visual_html)
         
-        return refined_html
+        return refined_html, not (refined and structure_html and visual_html)
+    
+    async def _run_pass(self, name: str, pass_coro) -> Optional[str]:
+        """Await a generation pass under the per-pass timeout; None if it fails."""
+        try:
+            with span(f'clone.{name.lower()}'):
+                return await asyncio.wait_for(pass_coro, timeout=self.config.pass_timeout_seconds)
+        except asyncio.TimeoutError:
+            self.logger.error(f"{name} pass timed out after {self.config.pass_timeout_seconds}s")
+        except Exception as e:
+            self.logger.error(f"{name} pass failed: {e}")
+        return None
     
     async def _generate_structure_focused(self, design_context: Dict[str, Any]) -> str:
         """Generate HTML focusing on structure and layout."""
         prompt = self._create_structure_prompt(design_context)
         
         try:
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            response = await self._generate(prompt)
             return self._clean_html_response(response.text)
         except Exception as e:
             self.logger.error(f"Structure generation failed: {e}")
@@ -144,51 +352,85 @@ class HighPrecisionLLMCloner:
         # Add screenshots if available
         if self.config.use_screenshots and 'screenshots' in design_context:
             screenshots = design_context['screenshots']
-            for viewport, screenshot_data in screenshots.items():
-                if screenshot_data.startswith('data:image'):
-                    # Extract base64 data
-                    image_data = screenshot_data.split(',')[1]
-                    image_bytes = base64.b64decode(image_data)
-                    
-                    # Create PIL Image
-                    image = Image.open(io.BytesIO(image_bytes))
-                    
-                    prompt_parts.append(f"\n\n🖼️ SCREENSHOT ({viewport.upper()}):")
-                    prompt_parts.append(image)
-                    prompt_parts.append(f"This is the {viewport} view of the website. Recreate this EXACTLY.")
+            for key, value in screenshots.items():
+                # Encoded bytes go to the model as-is; older contexts may still hold data URIs
+                screenshot = as_screenshot(value)
+                if screenshot is None:
+                    continue
+                label = screenshot.label(key)
+                prompt_parts.append(f"\n\n🖼️ SCREENSHOT ({label}):")
+                prompt_parts.append(screenshot.to_part())
+                prompt_parts.append(f"This is the {label.lower()} view of the website. Recreate this EXACTLY.")
         
         try:
-            response = await asyncio.to_thread(self.model.generate_content, prompt_parts)
+            response = await self._generate(prompt_parts)
             return self._clean_html_response(response.text)
         except Exception as e:
             self.logger.error(f"Visual generation failed: {e}")
             # Fallback without images
-            response = await asyncio.to_thread(self.model.generate_content, prompt_parts[0])
+            response = await self._generate(prompt_parts[0])
             return self._clean_html_response(response.text)
     
     async def _generate_refinement_pass(self, design_context: Dict[str, Any], 
-                                       structure_html: str, visual_html: str) -> str:
-        """Final refinement pass combining best of both approaches."""
-        prompt = f"""
+                                       structure_html: Optional[str], visual_html: Optional[str]) -> Tuple[str, bool]:
+        """Final refinement pass combining best of both approaches; False if it fell back to a draft."""
+        drafts = self._collect_drafts(structure_html, visual_html)
+        prompt = self._create_refinement_prompt(design_context, drafts)
+        
+        try:
+            with span('clone.refinement'):
+                response = await asyncio.wait_for(
+                    self._generate(prompt),
+                    timeout=self.config.pass_timeout_seconds
+                )
+            return self._clean_html_response(response.text), True
+        except Exception as e:
+            self.logger.error(f"Refinement generation failed: {e!r}")
+            # Return the better of the available drafts
+            return max((html for _, html in drafts), key=len), False
+    
+    async def _generate(self, prompt: Any) -> Any:
+        """Call Gemini on a worker thread and record token usage on the current span."""
+        response = await asyncio.to_thread(self.model.generate_content, prompt)
+        self._record_usage(prompt, getattr(response, 'usage_metadata', None), response.text or '')
+        return response
+    
+    def _record_usage(self, prompt: Any, usage: Any, response_text: str, stage: Optional[Span] = None) -> None:
+        """Count one model call's tokens, estimating when the SDK reports none."""
+        count = stage.incr if stage is not None else incr
+        if usage is not None and getattr(usage, 'prompt_token_count', None) is not None:
+            count('prompt_tokens', usage.prompt_token_count)
+            count('response_tokens', usage.candidates_token_count or 0)
+        else:
+            parts = prompt if isinstance(prompt, list) else [prompt]
+            count('prompt_tokens', sum(estimate_tokens(part) for part in parts if isinstance(part, str)))
+            count('response_tokens', estimate_tokens(response_text))
+        count('llm_calls')
+    
+    def _collect_drafts(self, structure_html: Optional[str], visual_html: Optional[str]) -> List[Tuple[str, str]]:
+        """Labelled drafts that actually produced HTML."""
+        return [
+            (label, html) for label, html in (
+                ("Structure-focused", structure_html),
+                ("Visual-focused", visual_html)
+            ) if html
+        ]
+    
+    def _create_refinement_prompt(self, design_context: Dict[str, Any], drafts: List[Tuple[str, str]]) -> str:
+        """Create the refinement prompt from the available drafts."""
+        intro = (
+            "I have two draft versions generated with different approaches:"
+            if len(drafts) > 1 else
+            "I have one draft version to refine:"
+        )
+        
+        header = f"""
 🎯 FINAL REFINEMENT PASS - PIXEL PERFECT WEBSITE CLONE
 
 You are tasked with creating the FINAL, PIXEL-PERFECT version of a website clone.
-I have two draft versions generated with different approaches:
-
-VERSION 1 (Structure-focused):
-```html
-{structure_html[:4000]}...
-```
-
-VERSION 2 (Visual-focused):
-```html
-{visual_html[:4000]}...
-```
-
-DESIGN CONTEXT:
-{json.dumps(make_json_safe(design_context), indent=2)[:3000]}...
-
-🎯 YOUR MISSION:
+{intro}
+"""
+        footer = """🎯 YOUR MISSION:
 Create a FINAL version that combines the best elements from both versions while achieving PIXEL-PERFECT accuracy.
 
 🔥 CRITICAL REQUIREMENTS:
@@ -221,20 +463,24 @@ OUTPUT: Return ONLY the complete, pixel-perfect HTML document.
 NO explanations, NO markdown formatting, NO additional text.
 """
         
-        try:
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
-            return self._clean_html_response(response.text)
-        except Exception as e:
-            self.logger.error(f"Refinement generation failed: {e}")
-            # Return the better of the two versions
-            return visual_html if len(visual_html) > len(structure_html) else structure_html
+        # Drafts get most of the budget, the design context fills what is left
+        budget = self.config.refinement_prompt_tokens
+        available = budget - estimate_tokens(header) - estimate_tokens(footer)
+        draft_tokens = int(available * 0.75) // len(drafts)
+        builder = PromptBuilder(budget)
+        for i, (label, html) in enumerate(drafts, 1):
+            builder.add(f"VERSION {i} ({label}):", f"```html\n{truncate_to_tokens(html, draft_tokens)}\n```", priority=0)
+        context_tokens = max(available - draft_tokens * len(drafts), 0)
+        builder.add("DESIGN CONTEXT:", design_context.to_prompt_json(context_tokens * 4), priority=1)
+        return builder.build(header, footer)
     
     async def _single_pass_generation(self, design_context: Dict[str, Any]) -> str:
         """Single pass generation with comprehensive prompting."""
         prompt = self._create_comprehensive_prompt(design_context)
         
         try:
-            response = await asyncio.to_thread(self.model.generate_content, prompt)
+            with span('clone.single_pass'):
+                response = await self._generate(prompt)
             return self._clean_html_response(response.text)
         except Exception as e:
             self.logger.error(f"Single pass generation failed: {e}")
@@ -242,114 +488,74 @@ NO explanations, NO markdown formatting, NO additional text.
     
     def _create_structure_prompt(self, design_context: Dict[str, Any]) -> str:
         """Create structure-focused prompt."""
-        return f"""
+        header = f"""
 🏗️ STRUCTURE-PERFECT WEBSITE CLONE
 
 Create a pixel-perfect HTML structure for: {design_context.get('url', 'website')}
-
-LAYOUT STRUCTURE:
-{json.dumps(design_context.get('layout_structure', {}), indent=2)}
-
-COMPUTED STYLES:
-{json.dumps(design_context.get('computed_styles', {}), indent=2)}
-
-MEASUREMENTS:
-{json.dumps(design_context.get('measurements', {}), indent=2)}
-
-ELEMENTS:
-{json.dumps(design_context.get('elements', [])[:20], indent=2)}
-
-🎯 FOCUS: Perfect HTML structure with semantic elements and exact CSS layout.
+"""
+        footer = """🎯 FOCUS: Perfect HTML structure with semantic elements and exact CSS layout.
 Create a complete, self-contained HTML document with embedded CSS.
 """
+        builder = PromptBuilder(self.config.structure_prompt_tokens)
+        builder.add("LAYOUT STRUCTURE:", render_lines(design_context.get('layout_structure', {})), priority=2)
+        builder.add("COMPUTED STYLES:", render_interned_styles(design_context.get('computed_styles', {})), priority=0)
+        builder.add("MEASUREMENTS:", render_lines(design_context.get('measurements', {})), priority=1)
+        builder.add("ELEMENTS:", render_lines(design_context.get('elements', [])), priority=3)
+        builder.add("BREAKPOINTS:", render_breakpoint_table(design_context.get('responsive_breakpoints', {})), priority=3)
+        return builder.build(header, footer)
     
     def _create_visual_prompt(self, design_context: Dict[str, Any]) -> str:
         """Create visual-focused prompt."""
-        return f"""
+        header = f"""
 🎨 VISUAL-PERFECT WEBSITE CLONE
 
 Target URL: {design_context.get('url', 'website')}
-
-COLORS (EXACT MATCH REQUIRED):
-{json.dumps(design_context.get('colors', {}), indent=2)}
-
-TYPOGRAPHY (PIXEL-PERFECT):
-{json.dumps(design_context.get('typography', {}), indent=2)}
-
-VISUAL STYLES:
-{json.dumps(design_context.get('computed_styles', {}), indent=2)}
-
-ANIMATIONS & INTERACTIONS:
-{json.dumps(design_context.get('animations', {}), indent=2)}
-
-🎯 FOCUS: Perfect visual appearance with exact colors, fonts, and styling.
+"""
+        footer = """🎯 FOCUS: Perfect visual appearance with exact colors, fonts, and styling.
 The screenshots above show EXACTLY how it should look.
 Match every visual detail precisely.
 """
+        builder = PromptBuilder(self.config.visual_prompt_tokens)
+        builder.add("COLORS (EXACT MATCH REQUIRED):", render_lines(design_context.get('colors', {})), priority=0)
+        builder.add("TYPOGRAPHY (PIXEL-PERFECT):", render_lines(design_context.get('typography', {})), priority=1)
+        builder.add("VISUAL STYLES:", render_interned_styles(design_context.get('computed_styles', {})), priority=2)
+        builder.add("ANIMATIONS & INTERACTIONS:", render_lines(design_context.get('animations', {})), priority=3)
+        return builder.build(header, footer)
     
     def _create_comprehensive_prompt(self, design_context: Dict[str, Any]) -> str:
         """Create comprehensive single-pass prompt."""
-        sections = []
-        
-        sections.append("🚀 PIXEL-PERFECT WEBSITE CLONE GENERATOR")
-        sections.append("=" * 60)
-        sections.append(f"Target: {design_context.get('url', 'website')}")
-        sections.append("")
+        header = [
+            "🚀 PIXEL-PERFECT WEBSITE CLONE GENERATOR",
+            "=" * 60,
+            f"Target: {design_context.get('url', 'website')}",
+            "",
+        ]
         
         # Add visual reference if screenshots available
-        if 'screenshots' in design_context and design_context['screenshots']:
-            sections.append("📸 VISUAL REFERENCE:")
-            sections.append("The provided screenshots show EXACTLY how the website should look.")
-            sections.append("Your HTML must match these visuals PERFECTLY.")
-            sections.append("")
-        
-        # Critical measurements
-        if 'measurements' in design_context:
-            sections.append("📏 EXACT MEASUREMENTS (CRITICAL):")
-            for selector, measurements in design_context['measurements'].items():
-                sections.append(f"  {selector}: {measurements}")
-            sections.append("")
-        
-        # Color specifications
-        if 'colors' in design_context:
-            sections.append("🎨 COLOR PALETTE (EXACT VALUES):")
-            colors = design_context['colors']
-            for category, color_list in colors.items():
-                if color_list:
-                    sections.append(f"  {category}: {color_list[:5]}")  # Show first 5
-            sections.append("")
-        
-        # Typography
-        if 'typography' in design_context:
-            sections.append("📝 TYPOGRAPHY (PIXEL-PERFECT):")
-            for element, styles in design_context['typography'].items():
-                sections.append(f"  {element}:")
-                for prop, value in styles.items():
-                    if value and value != 'none':
-                        sections.append(f"    {prop}: {value}")
-            sections.append("")
-        
-        # Layout structure
-        if 'layout_structure' in design_context:
-            sections.append("🏗️ LAYOUT STRUCTURE:")
-            sections.append(json.dumps(design_context['layout_structure'], indent=2))
-            sections.append("")
-        
-        # Computed styles (most critical)
-        if 'computed_styles' in design_context:
-            sections.append("💎 COMPUTED STYLES (EXACT VALUES):")
-            styles = design_context['computed_styles']
-            for selector, style_props in list(styles.items())[:15]:  # Limit to first 15
-                sections.append(f"  {selector}:")
-                for prop, value in style_props.items():
-                    sections.append(f"    {prop}: {value}")
-                sections.append("")
-        
-        # Responsive breakpoints
-        if 'responsive_breakpoints' in design_context:
-            sections.append("📱 RESPONSIVE BREAKPOINTS:")
-            sections.append(json.dumps(design_context['responsive_breakpoints'], indent=2))
-            sections.append("")
+        if design_context.get('screenshots'):
+            header.extend([
+                "📸 VISUAL REFERENCE:",
+                "The provided screenshots show EXACTLY how the website should look.",
+                "Your HTML must match these visuals PERFECTLY.",
+                "",
+            ])
+        
+        typography_lines = []
+        for element, styles in design_context.get('typography', {}).items():
+            declarations = strip_default_styles({p: v for p, v in styles.items() if v != 'none'})
+            if declarations:
+                typography_lines.append(f"  {element}: {render_compact(declarations)}")
+        
+        builder = PromptBuilder(self.config.single_pass_prompt_tokens)
+        # Computed styles (most critical) first in rank, then measurements and palette
+        builder.add("📏 EXACT MEASUREMENTS (CRITICAL):", render_lines(design_context.get('measurements', {})), priority=1)
+        builder.add("🎨 COLOR PALETTE (EXACT VALUES):", render_lines(
+            {category: colors for category, colors in design_context.get('colors', {}).items() if colors}
+        ), priority=2)
+        builder.add("📝 TYPOGRAPHY (PIXEL-PERFECT):", '\n'.join(typography_lines), priority=3)
+        builder.add("🏗️ LAYOUT STRUCTURE:", render_lines(design_context.get('layout_structure', {})), priority=4)
+        builder.add("💎 COMPUTED STYLES (EXACT VALUES):", render_interned_styles(design_context.get('computed_styles', {})), priority=0)
+        builder.add("📱 RESPONSIVE BREAKPOINTS:", render_breakpoint_table(design_context.get('responsive_breakpoints', {})), priority=4)
         
         # Critical instructions
         instructions = [
@@ -384,9 +590,7 @@ Match every visual detail precisely.
             "The HTML must be complete and self-contained with embedded CSS.",
         ]
         
-        sections.extend(instructions)
-        
-        return "\n".join(sections)
+        return builder.build("\n".join(header), "\n".join(instructions))
     
     def _validate_comprehensive_context(self, design_context: Dict[str, Any]) -> None:
         """Enhanced validation for comprehensive data."""
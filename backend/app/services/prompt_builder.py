@@ -0,0 +1,202 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+# Computed values that match the browser default and tell the model nothing
+DEFAULT_STYLE_VALUES = {
+    'position': {'static'},
+    'top': {'auto'}, 'left': {'auto'}, 'right': {'auto'}, 'bottom': {'auto'},
+    'z-index': {'auto'},
+    'opacity': {'1'},
+    'transform': {'none'},
+    'transition': {'all 0s ease 0s', 'all', 'none 0s ease 0s'},
+    'margin': {'0px'},
+    'padding': {'0px'},
+    'border': {'0px none rgb(0, 0, 0)', '0px none', 'none'},
+    'flex-direction': {'row'},
+    'justify-content': {'normal'},
+    'align-items': {'normal'},
+    'background-color': {'rgba(0, 0, 0, 0)', 'transparent'},
+    'text-align': {'start'},
+    'font-style': {'normal'},
+    'letter-spacing': {'normal'},
+    'text-transform': {'none'},
+}
+
+# Property groups interned separately so selectors can share e.g. typography
+# while differing in box metrics
+STYLE_GROUPS = (
+    ('box', ('width', 'height', 'margin', 'padding', 'border')),
+    ('layout', ('display', 'position', 'top', 'left', 'right', 'bottom', 'z-index',
+                'flex-direction', 'justify-content', 'align-items')),
+    ('type', ('font-family', 'font-size', 'font-weight', 'line-height', 'text-align', 'color')),
+    ('paint', ('background-color', 'opacity', 'transform', 'transition')),
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English, CSS and JSON)."""
+    return math.ceil(len(text) / 4)
+
+
+def strip_default_styles(styles: Dict[str, str]) -> Dict[str, str]:
+    """Drop properties whose value is the browser default."""
+    return {
+        prop: value for prop, value in styles.items()
+        if value and value not in DEFAULT_STYLE_VALUES.get(prop, ())
+    }
+
+
+def intern_styles(computed_styles: Dict[str, Dict[str, str]]) -> Tuple[Dict[str, Dict[str, str]], Dict[str, List[str]]]:
+    """Split style maps into property groups and share identical groups as classes.
+
+    Returns (classes, selectors): class name -> declarations, and selector ->
+    the class names that together reproduce its non-default styles.
+    """
+    classes: Dict[str, Dict[str, str]] = {}
+    class_by_key: Dict[Tuple, str] = {}
+    group_counts: Dict[str, int] = {}
+    selectors: Dict[str, List[str]] = {}
+    grouped = {prop for _, props in STYLE_GROUPS for prop in props}
+
+    for selector, styles in computed_styles.items():
+        styles = strip_default_styles(styles)
+        groups = [
+            (group, {p: styles[p] for p in props if p in styles})
+            for group, props in STYLE_GROUPS
+        ]
+        groups.append(('misc', {p: v for p, v in styles.items() if p not in grouped}))
+
+        names = []
+        for group, declarations in groups:
+            if not declarations:
+                continue
+            key = (group, tuple(sorted(declarations.items())))
+            name = class_by_key.get(key)
+            if name is None:
+                group_counts[group] = group_counts.get(group, 0) + 1
+                name = f"{group}{group_counts[group]}"
+                class_by_key[key] = name
+                classes[name] = declarations
+            names.append(name)
+        if names:
+            selectors[selector] = names
+
+    return classes, selectors
+
+
+def render_interned_styles(computed_styles: Dict[str, Dict[str, str]]) -> str:
+    """Compact CSS-like rendering of computed styles with shared classes.
+
+    Groups used by more than one selector are listed once as classes; groups
+    unique to a selector are written inline on that selector's line, so a cut
+    at any line boundary still leaves complete, self-describing entries.
+    """
+    classes, selectors = intern_styles(computed_styles)
+    uses: Dict[str, int] = {}
+    for names in selectors.values():
+        for name in names:
+            uses[name] = uses.get(name, 0) + 1
+
+    lines = ["Shared style classes (default values omitted):"]
+    for name, declarations in classes.items():
+        if uses.get(name, 0) > 1:
+            lines.append(f".{name} {{ {_declarations(declarations)} }}")
+    lines.append("Selectors -> shared classes + own styles:")
+    for selector, names in selectors.items():
+        shared = [n for n in names if uses[n] > 1]
+        own = {}
+        for name in names:
+            if uses[name] == 1:
+                own.update(classes[name])
+        entry = ' '.join(f".{n}" for n in shared)
+        if own:
+            entry = f"{entry} {{ {_declarations(own)} }}".strip()
+        lines.append(f"{selector} -> {entry}")
+    return '\n'.join(lines)
+
+
+def _declarations(declarations: Dict[str, str]) -> str:
+    return '; '.join(f"{prop}: {value}" for prop, value in declarations.items())
+
+
+def render_compact(value: Any) -> str:
+    """Compact JSON for small structured sections."""
+    return json.dumps(value, separators=(',', ':'), default=str)
+
+
+def render_lines(value: Any) -> str:
+    """One compact JSON entry per line, so sections can be cut at item boundaries."""
+    if isinstance(value, dict):
+        return '\n'.join(f"{key}: {render_compact(item)}" for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return '\n'.join(render_compact(item) for item in value)
+    return render_compact(value)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens using the same ratio as estimate_tokens."""
+    max_chars = max_tokens * 4
+    return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+
+@dataclass
+class PromptSection:
+    title: str
+    body: str
+    priority: int  # Lower is more important
+
+
+class PromptBuilder:
+    """Assembles a prompt from ranked sections within a token budget.
+
+    Header and footer are always kept. Sections are admitted whole in priority
+    order while they fit. The first one that does not fit is cut at a line
+    boundary if enough budget is left for it to be useful, and everything
+    less important is dropped. Admitted sections keep the order they were
+    added in.
+    """
+
+    def __init__(self, token_budget: int, count_tokens: Callable[[str], int] = estimate_tokens,
+                 min_section_tokens: int = 64):
+        self.token_budget = token_budget
+        self.count_tokens = count_tokens
+        self.min_section_tokens = min_section_tokens
+        self.sections: List[PromptSection] = []
+
+    def add(self, title: str, body: Optional[str], priority: int) -> 'PromptBuilder':
+        if body:
+            self.sections.append(PromptSection(title, body, priority))
+        return self
+
+    def build(self, header: str, footer: str = '') -> str:
+        remaining = self.token_budget - self.count_tokens(header) - self.count_tokens(footer)
+        admitted: Dict[int, str] = {}
+
+        for index, section in sorted(enumerate(self.sections), key=lambda item: item[1].priority):
+            text = f"{section.title}\n{section.body}\n"
+            cost = self.count_tokens(text)
+            if cost <= remaining:
+                admitted[index] = text
+                remaining -= cost
+                continue
+            if remaining >= self.min_section_tokens:
+                admitted[index] = self._truncate(section, remaining)
+            break
+
+        body = '\n'.join(admitted[i] for i in sorted(admitted))
+        return f"{header}\n{body}\n{footer}" if footer else f"{header}\n{body}"
+
+    def _truncate(self, section: PromptSection, budget: int) -> str:
+        marker = "... (truncated)"
+        kept = [section.title]
+        used = self.count_tokens(section.title + marker) + 2
+        for line in section.body.splitlines():
+            cost = self.count_tokens(line) + 1
+            if used + cost > budget:
+                break
+            kept.append(line)
+            used += cost
+        kept.append(marker)
+        return '\n'.join(kept) + '\n'
@@ -0,0 +1,178 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+# Analytics, ad and tracking hosts; none of them affect what the extractors measure
+TRACKER_DOMAINS = (
+    'google-analytics.com', 'googletagmanager.com', 'googleadservices.com', 'googlesyndication.com',
+    'doubleclick.net', 'adservice.google.com', 'facebook.net', 'facebook.com/tr',
+    'hotjar.com', 'clarity.ms', 'segment.com', 'segment.io', 'mixpanel.com', 'amplitude.com',
+    'fullstory.com', 'heapanalytics.com', 'nr-data.net', 'quantserve.com', 'scorecardresearch.com',
+    'taboola.com', 'outbrain.com', 'criteo.com', 'adnxs.com', 'tiktok.com/i18n/pixel', 'snap.licdn.com',
+)
+# Audio and video payloads; posters and the <video> box still render without them
+MEDIA_EXTENSIONS = ('mp4', 'webm', 'ogv', 'ogg', 'mov', 'm4v', 'mkv', 'avi', 'mp3', 'wav', 'flac', 'm4a', 'm3u8')
+# Blocked request types whose size is worth measuring; probing trackers would itself be a tracking hit
+MEASURABLE_TYPES = ('Media', 'Image')
+
+
+# Second-level labels under which registrations happen, e.g. example.co.uk
+PUBLIC_SECOND_LEVEL = frozenset(('co', 'com', 'net', 'org', 'ac', 'gov', 'edu', 'ne', 'or'))
+
+
+def registrable_domain(host: str) -> str:
+    """Approximate registrable domain of a host: example.com for www.example.com, example.co.uk for a.example.co.uk."""
+    labels = host.lower().rstrip('.').split('.')
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in PUBLIC_SECOND_LEVEL:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+def domain_patterns(domains: Iterable[str], target_url: Optional[str] = None) -> List[str]:
+    """DevTools URL patterns matching a host, its subdomains and an optional path prefix.
+
+    Setting target_url leaves out domains belonging to the target's own site:
+    setBlockedURLs blocks documents and stylesheets too, so cloning
+    segment.com must not block segment.com.
+    """
+    own = registrable_domain(urlparse(target_url).hostname or '') if target_url else None
+    patterns = []
+    for domain in domains:
+        host = domain.partition('/')[0]
+        if own and (host == own or host.endswith('.' + own)):
+            continue
+        suffix = '*' if '/' in domain else '/*'
+        patterns.append(f"*://{domain}{suffix}")
+        patterns.append(f"*://*.{domain}{suffix}")
+    return patterns
+
+
+def extension_patterns(extensions: Iterable[str]) -> List[str]:
+    """DevTools URL patterns matching file extensions, with or without a query string."""
+    patterns = []
+    for extension in extensions:
+        patterns.append(f"*.{extension}")
+        patterns.append(f"*.{extension}?*")
+    return patterns
+
+
+def sized_image_urls(images: Sequence[Dict[str, Any]], base_url: str) -> List[str]:
+    """URLs of <img> elements whose width and height attributes fix their box.
+
+    Blocking these leaves layout unchanged: the browser sizes a missing image
+    from its attributes exactly as it would the loaded one. srcset candidates
+    are included since the browser may pick any of them.
+    """
+    urls = []
+    for image in images:
+        width, height = str(image.get('width') or ''), str(image.get('height') or '')
+        if not (width.isdigit() and height.isdigit()):
+            continue
+        if image.get('src'):
+            urls.append(image['src'])
+        for candidate in (image.get('srcset') or '').split(','):
+            candidate = candidate.strip().split(' ')[0]
+            if candidate:
+                urls.append(urljoin(base_url, candidate))
+    return list(dict.fromkeys(urls))
+
+
+def matches_domain(url: str, domains: Iterable[str]) -> bool:
+    """Whether url is on one of the domains (or a subdomain), honouring path prefixes."""
+    parsed = urlparse(url)
+    host = (parsed.hostname or '').lower()
+    for domain in domains:
+        domain_host, _, path = domain.partition('/')
+        if host != domain_host and not host.endswith('.' + domain_host):
+            continue
+        if not path or parsed.path.lstrip('/').startswith(path):
+            return True
+    return False
+
+
+class ResourceBlocker:
+    """Blocks requests in a Chrome session through DevTools and reports what was blocked.
+
+    Patterns are installed with Network.setBlockedURLs, which applies to every
+    later navigation of the session. Blocked requests are read back from the
+    driver's performance log (see create_chrome_driver).
+    """
+
+    def __init__(self, driver: Any):
+        self.driver = driver
+        self.active = False
+
+    def apply(self, patterns: List[str]) -> bool:
+        """Install the patterns; returns False if the driver has no DevTools access."""
+        if not hasattr(self.driver, 'execute_cdp_cmd'):
+            return False
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        except Exception as e:
+            print(f"Warning: Request blocking unavailable: {e}")
+            return False
+        self.drain()  # Drop log entries left over from a previous lease
+        self.active = bool(patterns)
+        return True
+
+    def clear(self) -> None:
+        if not self.active:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+        except Exception:
+            pass
+        self.active = False
+
+    def drain(self) -> List[Dict[str, str]]:
+        """Requests blocked since the last drain, as {'url', 'type'} dicts."""
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return []  # Performance logging not enabled for this driver
+
+        requests_by_id: Dict[str, Dict[str, str]] = {}
+        blocked = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            params = message.get('params', {})
+            if message.get('method') == 'Network.requestWillBeSent':
+                requests_by_id[params.get('requestId')] = {
+                    'url': params.get('request', {}).get('url', ''),
+                    'type': params.get('type', 'Other'),
+                }
+            elif message.get('method') == 'Network.loadingFailed' and params.get('blockedReason') == 'inspector':
+                request = requests_by_id.get(params.get('requestId'))
+                if request is not None:
+                    blocked.append(request)
+        return blocked
+
+
+def estimate_bytes(session: requests.Session, urls: List[str], timeout: Tuple[float, float],
+                   max_requests: int = 40, max_workers: int = 8) -> Tuple[int, int]:
+    """Sum of Content-Length over HEAD requests for up to max_requests URLs.
+
+    Returns (bytes, urls measured); URLs without a declared length are skipped,
+    so the total is a lower bound.
+    """
+    def content_length(url: str) -> Optional[int]:
+        try:
+            response = session.head(url, allow_redirects=True, timeout=timeout)
+        except requests.RequestException:
+            return None
+        declared = response.headers.get('Content-Length', '')
+        return int(declared) if response.ok and declared.isdigit() else None
+
+    urls = list(dict.fromkeys(urls))[:max_requests]
+    if not urls:
+        return 0, 0
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='blocked-size') as executor:
+        lengths = [length for length in executor.map(content_length, urls) if length is not None]
+    return sum(lengths), len(lengths)
@@ -0,0 +1,162 @@
+import dataclasses
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services.design_context import DesignContext
+
+
+@dataclass
+class ScrapeCacheEntry:
+    """A cached design context plus the HTTP validators of its document."""
+    context: DesignContext
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Request headers that revalidate this entry with the origin."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ScrapeCache:
+    """Persistent store of scraped design contexts keyed by URL and ScrapingConfig.
+
+    Entries are only reused after the origin confirms the document is unchanged
+    (HTTP 304), so the TTL merely bounds how long validators are kept around.
+    """
+
+    def __init__(self, directory: str, max_disk_bytes: int = 512 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 3600):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._metrics = {'revalidated': 0, 'modified': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        os.makedirs(directory, exist_ok=True)
+        self._disk_bytes = sum(size for _, size, _ in self._entries())  # Running total; walked only at startup and eviction
+
+    @staticmethod
+    def key(url: str, config: Any) -> str:
+        """Cache key for a URL scraped with a given config."""
+        config_data = dataclasses.asdict(config) if dataclasses.is_dataclass(config) else config
+        payload = json.dumps({'url': url, 'config': config_data}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[ScrapeCacheEntry]:
+        """Load the entry for key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+        if time.time() - entry.stored_at >= self.ttl_seconds:
+            self._remove(path)
+            return None
+        if not entry.etag and not entry.last_modified:
+            return None  # Nothing to revalidate with
+        return entry
+
+    def put(self, key: str, context: DesignContext, etag: Optional[str],
+            last_modified: Optional[str]) -> None:
+        """Store a design context; the live soup is dropped and rebuilt on load."""
+        if not etag and not last_modified:
+            return
+        entry = ScrapeCacheEntry(
+            context=dataclasses.replace(context, soup=None),
+            etag=etag,
+            last_modified=last_modified,
+            stored_at=time.time()
+        )
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        replaced = self._size(path)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._disk_bytes += self._size(path) - replaced
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        self.record('stores')
+        if over_budget:
+            self._evict()
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome: revalidated, modified or misses."""
+        with self._lock:
+            self._metrics[outcome] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pickle")
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except OSError:
+            return 0
+
+    def _remove(self, path: str) -> None:
+        size = self._size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(mtime, size, path) of every stored entry."""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.pickle'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self) -> None:
+        """Delete the oldest entries until the store fits max_disk_bytes.
+
+        Only called once the running total exceeds the budget; the walk also
+        resyncs the total with entries written or removed by other processes.
+        """
+        files = self._entries()
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            evicted += 1
+
+        with self._lock:
+            self._disk_bytes = total
+            self._metrics['evictions'] += evicted
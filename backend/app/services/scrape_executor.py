@@ -0,0 +1,97 @@
+import asyncio
+import contextvars
+import functools
+import math
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the scrape executor has no free slot for a new job."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Scrape executor is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ScrapeExecutor:
+    """Bounded thread pool that runs blocking scrapes off the event loop.
+
+    At most ``max_workers`` scrapes run at once and at most ``max_queue`` more
+    wait for a worker; anything beyond that is rejected immediately with
+    ExecutorSaturated so callers can answer with a fast 503.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 4):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scrape')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._avg_duration = 30.0  # Seed estimate until real scrapes complete
+        self._metrics = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0}
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on a worker thread and await its result."""
+        return await self.submit(fn, *args, **kwargs)
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> "asyncio.Future[Any]":
+        """Admit fn(*args, **kwargs) and return a future for its result.
+
+        Admission is decided synchronously, so callers can reject a request
+        before committing to a response (e.g. a stream) by catching
+        ExecutorSaturated here.
+        """
+        return asyncio.wrap_future(self.submit_from_thread(fn, *args, **kwargs))
+
+    def submit_from_thread(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Like submit, for callers without an event loop (e.g. a crawl's scheduler thread)."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._metrics['rejected'] += 1
+                raise ExecutorSaturated(self._retry_after())
+            self._pending += 1
+            self._metrics['submitted'] += 1
+
+        # Carry the caller's context (request-scoped state) into the worker thread
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        started = time.monotonic()
+        try:
+            future = self._executor.submit(call)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # Release the slot when the work finishes, not when the caller stops waiting
+        future.add_done_callback(functools.partial(self._on_done, started))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of executor occupancy."""
+        with self._lock:
+            return {
+                **self._metrics,
+                'pending': self._pending,
+                'running': min(self._pending, self.max_workers),
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'avg_duration': round(self._avg_duration, 3),
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, started: float, future: Future) -> None:
+        duration = time.monotonic() - started
+        with self._lock:
+            self._pending -= 1
+            self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            key = 'failed' if future.cancelled() or future.exception() else 'completed'
+            self._metrics[key] += 1
+
+    def _retry_after(self) -> int:
+        # Roughly how long until a queue slot frees up
+        waves = (self._pending - self.max_workers + 1) / self.max_workers
+        return max(1, math.ceil(self._avg_duration * max(waves, 1 / self.max_workers)))
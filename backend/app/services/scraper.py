@@ -1,24 +1,52 @@
 import requests
 from bs4 import BeautifulSoup
-import json
 from typing import Dict, Any, List, Optional, Tuple
-import re
-import cssutils
-from urllib.parse import urljoin, urlparse
-import logging
+import dataclasses
 from dataclasses import dataclass
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import time
-import base64
-from PIL import Image
-import io
 
-# Suppress cssutils warnings
-cssutils.log.setLevel(logging.ERROR)
+from app.services.asset_fetcher import AssetFetcher, StylesheetCache, cascade_order
+from app.services.css_index import CssIndex, build_css_index
+from app.services.instrumentation import incr, instrument_driver, span
+from app.services.design_context import DesignContext
+from app.services.dom_analyzer import DomAnalysis, DomAnalyzer, make_soup
+from app.services.breakpoints import LayoutRegime, discover_breakpoints, plan_regimes, summarize_regimes
+from app.services.browser_scripts import COMPUTED_STYLES_SCRIPT, LAYOUT_SNAPSHOT_SCRIPT, PAGE_READY_SCRIPT
+from app.services.driver_pool import DriverPool, DriverPoolTimeout, create_chrome_driver
+from app.services.resource_policy import (
+    MEASURABLE_TYPES,
+    MEDIA_EXTENSIONS,
+    TRACKER_DOMAINS,
+    ResourceBlocker,
+    domain_patterns,
+    estimate_bytes,
+    extension_patterns,
+    matches_domain,
+    sized_image_urls
+)
+from app.services.scrape_cache import ScrapeCache
+from app.services.screenshots import Screenshot, encode_screenshot
+from app.services.static_styles import StaticCascade, needs_javascript, static_interactions
+
+# Properties read by the computed-styles extraction, in the browser or from the static cascade
+COMPUTED_STYLE_PROPERTIES = [
+    'width', 'height', 'margin', 'padding', 'border', 'position',
+    'top', 'left', 'right', 'bottom', 'display', 'flex-direction',
+    'justify-content', 'align-items', 'background-color', 'color',
+    'font-family', 'font-size', 'font-weight', 'line-height',
+    'text-align', 'z-index', 'opacity', 'transform', 'transition'
+]
+MEASURED_SELECTORS = [
+    'body', 'header', 'main', 'footer', 'nav',
+    '.container', '.wrapper', '.content',
+    'h1', 'h2', 'h3', 'button', 'a'
+]
+TEXT_SELECTORS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'span', 'a', 'button', 'label']
+LAYOUT_CONTAINER_SELECTOR = 'body > *, header, main, footer, nav, .container, .wrapper'
+
 
 @dataclass
 class ScrapingConfig:
@@ -29,177 +57,504 @@ class ScrapingConfig:
     extract_animations: bool = True
     extract_responsive_data: bool = True
     extract_interactions: bool = True
+    html_parser: str = 'auto'  # 'auto', 'lxml', 'html5-parser', 'html5lib' or 'html.parser'
     max_css_file_size: int = 1024 * 1024  # 1MB
+    css_fetch_workers: int = 8
+    css_per_host_connections: int = 4
+    fetch_connect_timeout: float = 5.0
+    fetch_read_timeout: float = 15.0
+    follow_css_imports: bool = True
+    max_css_import_depth: int = 3
     screenshot_width: int = 1920
     screenshot_height: int = 1080
     mobile_width: int = 375
     mobile_height: int = 667
     tablet_width: int = 768
     tablet_height: int = 1024
+    use_scrape_cache: bool = True  # Reuse the last scrape when the document answers 304
+    emulate_viewports: bool = True  # Switch viewports via DevTools instead of reloading
+    readiness_timeout: float = 10.0  # Upper bound when waiting for a page to settle
+    network_idle_ms: int = 300  # Quiet window with no new resources or layout changes
+    single_page_load: bool = True  # Load the page once per viewport and share it across extractors
+    batch_computed_styles: bool = True  # Read computed styles in one in-browser script call
+    max_computed_style_elements: int = 100
+    discover_breakpoints: bool = True  # Probe one viewport per @media layout regime instead of three fixed sizes
+    max_breakpoint_probes: int = 6
+    min_probe_width: int = 320
+    max_layout_snapshot_elements: int = 150
+    block_resources: bool = True  # Block media, ads and trackers during browser loads
+    blocked_domains: Tuple[str, ...] = TRACKER_DOMAINS
+    blocked_extensions: Tuple[str, ...] = MEDIA_EXTENSIONS
+    blocked_url_patterns: Tuple[str, ...] = ()  # Extra DevTools patterns, e.g. '*://cdn.example.com/hero/*'
+    block_sized_images: bool = True  # Skip <img> downloads with fixed width/height when no screenshots are taken
+    estimate_blocked_bytes: bool = False  # HEAD blocked media and image URLs to report bytes saved
+    max_blocked_size_probes: int = 40
+    screenshot_format: str = 'webp'  # 'webp', 'jpeg' or 'png'
+    screenshot_quality: int = 80
+    screenshot_max_width: int = 1280  # Downscale wider captures; the model sees little beyond this
+    screenshot_tiles: int = 0  # Extra viewport-height tiles below the fold for the desktop view
+    render_mode: str = 'browser'  # 'browser', 'static' (no Chrome; styles from the CSS cascade) or 'auto'
+    static_min_text_chars: int = 200  # Less server-rendered text than this on a scripted page means client rendering
 
 class AdvancedWebsiteScraper:
-    def __init__(self, config: Optional[ScrapingConfig] = None):
+    def __init__(self, config: Optional[ScrapingConfig] = None, driver_pool: Optional[DriverPool] = None,
+                 scrape_cache: Optional[ScrapeCache] = None, stylesheet_cache: Optional[StylesheetCache] = None):
         """Initialize the advanced website scraper."""
         self.config = config or ScrapingConfig()
+        self.driver_pool = driver_pool
+        self.scrape_cache = scrape_cache
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
+        self.fetcher = AssetFetcher(
+            self.session,
+            max_workers=self.config.css_fetch_workers,
+            per_host_connections=self.config.css_per_host_connections,
+            connect_timeout=self.config.fetch_connect_timeout,
+            read_timeout=self.config.fetch_read_timeout,
+            stylesheet_cache=stylesheet_cache
+        )
         self.driver = None
+        self._lease = None
+        self._lease_start_loads = 0
+        self.page_loads = 0
+        self._loaded_url = None
+        self._window_size = None
+        self._emulated_viewport = None
+        self._blocker = None
         
-    def scrape_comprehensive(self, url: str) -> Dict[str, Any]:
+    def scrape_comprehensive(self, url: str) -> DesignContext:
         """Scrape a website comprehensively for pixel-perfect cloning."""
+        with span('scrape', url=url):
+            return self._scrape_comprehensive(url)
+    
+    def _scrape_comprehensive(self, url: str) -> DesignContext:
         try:
             print(f"Starting comprehensive scrape of {url}")
             
-            # Initialize Selenium driver for dynamic content
-            self._setup_selenium()
+            # Revalidate a previous scrape before paying for a browser session
+            cache_key = None
+            response = None
+            if self.scrape_cache is not None and self.config.use_scrape_cache:
+                cache_key = self.scrape_cache.key(url, self.config)
+                with span('scrape.revalidate'):
+                    cached_context, response = self._revalidate_cached(url, cache_key)
+                if cached_context is not None:
+                    return cached_context
             
             # Step 1: Basic HTML scraping with BeautifulSoup
-            html_data = self._scrape_basic_html(url)
+            with span('scrape.basic_html'):
+                html_data = self._scrape_basic_html(url, response)
+            
+            # Parse every stylesheet once; the CSS-derived extractors query this index
+            with span('scrape.css_index'):
+                css_index = self._build_css_index(url, html_data['styles'])
+            
+            # Server-rendered pages can skip the browser and read styles from the cascade
+            render_mode, render_reason = self._choose_render_mode(html_data['soup'])
+            static = None
+            if render_mode == 'static':
+                with span('scrape.static_cascade'):
+                    static = StaticCascade(html_data['soup'], css_index, self.config.screenshot_width)
+            else:
+                # Initialize Selenium driver for dynamic content
+                with span('scrape.setup_driver'):
+                    self._setup_selenium()
+                if self.driver is None:
+                    render_mode, render_reason = 'html-only', 'browser unavailable'
+                
+                # Keep video, trackers and (when unseen) sized images out of every browser load
+                if self.config.block_resources:
+                    with span('scrape.resource_policy'):
+                        self._apply_resource_policy(url, html_data['assets'])
             
             # Step 2: Extract computed styles using Selenium
-            computed_styles = self._extract_computed_styles(url) if self.config.extract_computed_styles else {}
+            computed_styles = {}
+            if self.config.extract_computed_styles:
+                with span('scrape.computed_styles'):
+                    if static is not None:
+                        computed_styles = static.computed_styles(
+                            COMPUTED_STYLE_PROPERTIES, self.config.max_computed_style_elements
+                        )
+                    else:
+                        computed_styles = self._extract_computed_styles(url)
             
             # Step 3: Extract precise measurements
-            measurements = self._extract_measurements(url)
+            with span('scrape.measurements'):
+                if static is not None:
+                    measurements = static.measurements(MEASURED_SELECTORS)
+                else:
+                    measurements = self._extract_measurements(url)
             
             # Step 4: Extract typography information
-            typography = self._extract_typography(url) if self.config.extract_fonts else {}
+            typography = {}
+            if self.config.extract_fonts:
+                with span('scrape.typography'):
+                    if static is not None:
+                        typography = static.typography(TEXT_SELECTORS)
+                    else:
+                        typography = self._extract_typography(url)
             
             # Step 5: Extract color palette
-            colors = self._extract_comprehensive_colors(html_data['styles'], computed_styles)
+            with span('scrape.colors'):
+                colors = self._extract_comprehensive_colors(css_index, computed_styles)
             
             # Step 6: Extract layout structure with positioning
-            layout_structure = self._extract_layout_structure(url)
+            with span('scrape.layout'):
+                if static is not None:
+                    layout_structure = static.layout_structure(LAYOUT_CONTAINER_SELECTOR)
+                else:
+                    layout_structure = self._extract_layout_structure(url)
             
             # Step 7: Extract responsive breakpoints
-            responsive_data = self._extract_responsive_data(url) if self.config.extract_responsive_data else {}
+            # (in snapshot mode this runs in the viewport pass after step 11)
+            responsive_data = {}
+            if self.config.extract_responsive_data and static is not None:
+                # Without a browser only the stylesheets' breakpoints are known
+                responsive_data = {'breakpoints': discover_breakpoints(css_index.media_queries)}
+            elif self.config.extract_responsive_data and not self.config.single_page_load:
+                with span('scrape.responsive'):
+                    responsive_data = self._extract_responsive_data(url, css_index)
             
             # Step 8: Extract animations and transitions
-            animations = self._extract_animations(html_data['styles']) if self.config.extract_animations else {}
+            animations = {}
+            if self.config.extract_animations:
+                with span('scrape.animations'):
+                    animations = self._extract_animations(css_index)
             
             # Step 9: Extract interactive elements
-            interactions = self._extract_interactions(url) if self.config.extract_interactions else {}
+            interactions = {}
+            if self.config.extract_interactions:
+                with span('scrape.interactions'):
+                    if static is not None:
+                        interactions = static_interactions(html_data['soup'])
+                    else:
+                        interactions = self._extract_interactions(url)
             
             # Step 10: Extract assets (images, icons, etc.)
-            assets = self._extract_assets(url, html_data['soup'])
+            # (collected during the single DOM pass in step 1)
+            assets = html_data.pop('assets')
             
-            # Step 11: Take screenshots
-            screenshots = self._take_screenshots(url) if self.config.include_screenshots else {}
+            # Step 11: Take screenshots (only with a browser)
+            screenshots = {}
+            if static is None and self.config.single_page_load:
+                # One load per viewport feeds both responsive data and screenshots;
+                # the desktop extractors above all shared the first load
+                with span('scrape.viewports'):
+                    responsive_data, screenshots = self._capture_viewports(url, css_index)
+            elif static is None and self.config.include_screenshots:
+                with span('scrape.screenshots'):
+                    screenshots = self._take_screenshots(url)
             
             # Combine all data
-            comprehensive_context = {
+            comprehensive_context = DesignContext(
                 **html_data,
-                'computed_styles': computed_styles,
-                'measurements': measurements,
-                'typography': typography,
-                'colors': colors,
-                'layout_structure': layout_structure,
-                'responsive_breakpoints': responsive_data,
-                'animations': animations,
-                'interactions': interactions,
-                'assets': assets,
-                'screenshots': screenshots,
-                'extraction_timestamp': time.time(),
-                'scraper_version': '2.0'
-            }
+                computed_styles=computed_styles,
+                measurements=measurements,
+                typography=typography,
+                colors=colors,
+                layout_structure=layout_structure,
+                responsive_breakpoints=responsive_data,
+                animations=animations,
+                interactions=interactions,
+                assets=assets,
+                screenshots=screenshots,
+                extraction_timestamp=time.time(),
+                scraper_version='2.0'
+            )
+            comprehensive_context['render_mode'] = {'mode': render_mode, 'reason': render_reason}
+            size_probes = []
+            if self._blocker is not None:
+                with span('scrape.blocked_report'):
+                    comprehensive_context['blocked_resources'], size_probes = self._blocked_resource_report()
+            
+            # Hand the browser back before the HTTP size probes rather than hold it idle
+            self._cleanup_selenium()
+            if size_probes:
+                with span('scrape.blocked_bytes'):
+                    self._estimate_blocked_bytes(comprehensive_context['blocked_resources'], size_probes)
+            
+            # A scrape that lost its browser is incomplete; don't let it answer later 304s
+            if cache_key is not None and render_mode != 'html-only':
+                self.scrape_cache.put(
+                    cache_key, comprehensive_context,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
             
             return comprehensive_context
             
+        except DriverPoolTimeout:
+            raise
         except Exception as e:
             raise Exception(f"Error in comprehensive scraping: {str(e)}")
         finally:
             self._cleanup_selenium()
     
+    def _choose_render_mode(self, soup: BeautifulSoup) -> Tuple[str, str]:
+        """Decide between a browser scrape and the static cascade, with the reason.
+        
+        In auto mode a page goes static only when no screenshots are wanted
+        and its HTML shows no sign of client-side rendering.
+        """
+        mode = self.config.render_mode
+        if mode in ('browser', 'static'):
+            return mode, 'configured'
+        if mode != 'auto':
+            print(f"Warning: Unknown render_mode {mode!r}, using the browser")
+            return 'browser', 'configured'
+        if self.config.include_screenshots:
+            return 'browser', 'screenshots requested'
+        reason = needs_javascript(soup, self.config.static_min_text_chars)
+        if reason is not None:
+            return 'browser', reason
+        return 'static', 'server-rendered HTML'
+    
     def _setup_selenium(self):
-        """Setup Selenium WebDriver."""
+        """Setup Selenium WebDriver, leasing a warm one when a pool is configured."""
         if self.driver is None:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument(f'--window-size={self.config.screenshot_width},{self.config.screenshot_height}')
-            
             try:
-                self.driver = webdriver.Chrome(options=chrome_options)
+                if self.driver_pool is not None:
+                    self._lease = self.driver_pool.acquire()
+                    self._lease_start_loads = self.page_loads
+                    self.driver = self._lease.driver
+                else:
+                    self.driver = create_chrome_driver(self.config.screenshot_width, self.config.screenshot_height)
+                instrument_driver(self.driver)
+                self._window_size = (self.config.screenshot_width, self.config.screenshot_height)
+                if self._lease is not None:
+                    pool_size = (self.driver_pool.config.window_width, self.driver_pool.config.window_height)
+                    if pool_size != self._window_size:
+                        self.driver.set_window_size(*self._window_size)
+            except DriverPoolTimeout:
+                raise  # Every browser is busy; the caller answers 503 rather than scraping blind
             except Exception as e:
+                # Chrome missing or failing to start: degrade to the HTML-only extractors
                 print(f"Warning: Could not initialize Chrome driver: {e}")
                 print("Some features requiring JavaScript execution will be unavailable")
     
     def _cleanup_selenium(self):
-        """Cleanup Selenium WebDriver."""
-        if self.driver:
+        """Cleanup Selenium WebDriver, returning leased drivers to the pool."""
+        if self._blocker is not None:
+            self._blocker.clear()
+            self._blocker = None
+        if self._lease is not None:
+            self._clear_viewport_emulation()
+            self.driver_pool.release(self._lease, pages=self.page_loads - self._lease_start_loads)
+            self._lease = None
+            self.driver = None
+        elif self.driver:
             self.driver.quit()
             self.driver = None
+        self._loaded_url = None
+        self._window_size = None
+        self._emulated_viewport = None
+    
+    def _apply_resource_policy(self, url: str, assets: Dict[str, Any]):
+        """Block media, trackers and, when nothing is screenshotted, sized images.
+        
+        Stylesheets and fonts are never targeted, so computed styles and text
+        metrics are unaffected. Images are only blocked when screenshots are
+        off, since a screenshot would show them missing, and only when their
+        width and height attributes keep the layout identical.
+        """
+        if not self.driver:
+            return
+        patterns = domain_patterns(self.config.blocked_domains, url)
+        patterns += extension_patterns(self.config.blocked_extensions)
+        patterns += list(self.config.blocked_url_patterns)
+        if self.config.block_sized_images and not self.config.include_screenshots:
+            patterns += sized_image_urls(assets.get('images', []), url)
+        
+        blocker = ResourceBlocker(self.driver)
+        if blocker.apply(patterns):
+            self._blocker = blocker
+    
+    def _blocked_resource_report(self) -> Tuple[Dict[str, Any], List[str]]:
+        """Requests blocked during this scrape by type, plus the URLs whose size may be probed.
+        
+        Only media and image URLs off the blocked tracker domains are probed;
+        a HEAD to a tracker would register the very hit the block prevented.
+        """
+        blocked = self._blocker.drain()
+        by_type: Dict[str, int] = {}
+        for request in blocked:
+            by_type[request['type']] = by_type.get(request['type'], 0) + 1
+        incr('blocked_requests', len(blocked))
+        
+        size_probes = []
+        if self.config.estimate_blocked_bytes:
+            size_probes = [
+                request['url'] for request in blocked
+                if request['type'] in MEASURABLE_TYPES and not matches_domain(request['url'], self.config.blocked_domains)
+            ]
+        return {'requests': len(blocked), 'by_type': by_type}, size_probes
+    
+    def _estimate_blocked_bytes(self, report: Dict[str, Any], urls: List[str]):
+        """Add a lower bound of the bytes blocking saved, from HEAD Content-Length."""
+        saved, measured = estimate_bytes(
+            self.session, urls, self.fetcher.timeout,
+            max_requests=self.config.max_blocked_size_probes, max_workers=self.config.css_fetch_workers
+        )
+        report['bytes_saved'] = saved
+        report['bytes_measured_requests'] = measured
+        incr('bytes_saved', saved)
+    
+    def _emulate_viewport(self, viewport: Tuple[int, int]) -> bool:
+        """Resize the layout viewport of the loaded page via Chrome DevTools."""
+        if not hasattr(self.driver, 'execute_cdp_cmd'):
+            return False
+        try:
+            self.driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+                'width': viewport[0],
+                'height': viewport[1],
+                'deviceScaleFactor': 1,
+                'mobile': False
+            })
+        except Exception as e:
+            print(f"Warning: Viewport emulation unavailable, reloading instead: {e}")
+            return False
+        self._emulated_viewport = viewport
+        return True
     
-    def _scrape_basic_html(self, url: str) -> Dict[str, Any]:
+    def _clear_viewport_emulation(self):
+        """Drop any DevTools viewport override so the window size applies again."""
+        if self._emulated_viewport is None:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Emulation.clearDeviceMetricsOverride', {})
+        except Exception:
+            pass
+        self._emulated_viewport = None
+    
+    def _wait_for_page_ready(self) -> Dict[str, Any]:
+        """Wait until the page has loaded, fonts are ready and layout has settled.
+        
+        Bounded by readiness_timeout, so fast pages return in milliseconds while
+        slow ones still get time to render.
+        """
+        timeout_ms = int(self.config.readiness_timeout * 1000)
+        try:
+            self.driver.set_script_timeout(self.config.readiness_timeout + 5)
+            state = self.driver.execute_async_script(
+                PAGE_READY_SCRIPT, timeout_ms, self.config.network_idle_ms
+            ) or {}
+        except Exception as e:
+            print(f"Warning: Page readiness check failed: {e}")
+            return {}
+        
+        if not state.get('ready'):
+            print(f"Warning: Page not settled after {state.get('elapsed')}ms, continuing")
+        return state
+    
+    def _viewports(self) -> List[Tuple[str, int, int]]:
+        """Viewports sampled for responsive data and screenshots."""
+        return [
+            ('desktop', self.config.screenshot_width, self.config.screenshot_height),
+            ('tablet', self.config.tablet_width, self.config.tablet_height),
+            ('mobile', self.config.mobile_width, self.config.mobile_height)
+        ]
+    
+    def _load_page(self, url: str, viewport: Optional[Tuple[int, int]] = None) -> bool:
+        """Navigate to url at the given viewport size.
+        
+        In snapshot mode the already-loaded document is reused when neither the
+        URL nor the viewport changed; with viewport emulation enabled a viewport
+        change on the loaded document is applied through DevTools instead of a
+        reload. Returns True if a navigation happened.
+        """
+        viewport = viewport or (self.config.screenshot_width, self.config.screenshot_height)
+        reusable = self.config.single_page_load and self._loaded_url == url
+        if reusable and viewport == (self._emulated_viewport or self._window_size):
+            return False
+        if reusable and self.config.emulate_viewports and self._emulate_viewport(viewport):
+            return False
+        
+        self._clear_viewport_emulation()
+        if viewport != self._window_size:
+            self.driver.set_window_size(*viewport)
+            self._window_size = viewport
+        
+        self.driver.get(url)
+        self._loaded_url = url
+        self.page_loads += 1
+        incr('page_loads')
+        return True
+    
+    def _revalidate_cached(self, url: str, cache_key: str) -> Tuple[Optional[DesignContext], requests.Response]:
+        """Conditionally fetch url; return the cached context if the origin answers 304.
+        
+        The response is returned as well so a 200 can be reused by the full scrape.
+        """
+        entry = self.scrape_cache.get(cache_key)
+        headers = entry.conditional_headers() if entry else {}
+        response = self.session.get(url, headers=headers, timeout=self.fetcher.timeout)
+        incr('bytes_fetched', len(response.content))
+        
+        if entry is None:
+            self.scrape_cache.record('misses')
+            return None, response
+        if response.status_code != 304:
+            self.scrape_cache.record('modified')
+            return None, response
+        
+        self.scrape_cache.record('revalidated')
+        print(f"Document unchanged (304), reusing cached scrape of {url}")
+        context = dataclasses.replace(entry.context)
+        context.soup, _ = self._parse_html(url, context.html)
+        return context, response
+    
+    def _parse_html(self, url: str, content: str) -> Tuple[BeautifulSoup, DomAnalysis]:
+        """Parse page HTML and analyze it in a single traversal.
+        
+        The traversal also resolves image URLs against the page URL.
+        """
+        soup = make_soup(content, self.config.html_parser)
+        return soup, DomAnalyzer(url).analyze(soup)
+    
+    def _scrape_basic_html(self, url: str, response: Optional[requests.Response] = None) -> Dict[str, Any]:
         """Enhanced basic HTML scraping."""
-        response = self.session.get(url)
+        if response is None:
+            response = self.session.get(url, timeout=self.fetcher.timeout)
+            incr('bytes_fetched', len(response.content))
         response.raise_for_status()
         content = response.text
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # Convert relative image URLs to absolute URLs
-        for img_tag in soup.find_all('img'):
-            src = img_tag.get('src')
-            if src:
-                img_tag['src'] = urljoin(url, src)
+        soup, analysis = self._parse_html(url, content)
         
         # Extract all CSS (inline, internal, and external)
-        styles = self._extract_all_css(url, soup)
-        
-        # Extract comprehensive meta information
-        meta_info = self._extract_comprehensive_meta(soup)
-        
-        # Extract detailed structure
-        structure = self._extract_detailed_structure(soup)
+        styles = self._extract_all_css(url, analysis)
         
         return {
             'url': url,
             'html': content,
             'soup': soup,  # Keep for further processing
             'styles': styles,
-            'meta': meta_info,
-            'structure': structure,
-            'elements': self._extract_all_elements(soup)
+            'meta': analysis.meta,
+            'structure': analysis.structure,
+            'elements': analysis.elements,
+            'assets': analysis.assets
         }
     
-    def _extract_all_css(self, base_url: str, soup: BeautifulSoup) -> Dict[str, str]:
+    def _extract_all_css(self, base_url: str, analysis: DomAnalysis) -> Dict[str, Any]:
         """Extract all CSS from the page including external stylesheets."""
         styles = {
-            'inline': [],
-            'internal': [],
-            'external': {}
+            'inline': analysis.inline_styles,
+            'internal': analysis.internal_css,
+            'external': {},
+            'order': [list(source) for source in analysis.css_sources]  # Document order of <style> and <link>
         }
         
-        # Internal CSS
-        for style_tag in soup.find_all('style'):
-            if style_tag.string:
-                styles['internal'].append(style_tag.string)
-        
-        # External CSS
-        for link in soup.find_all('link', rel='stylesheet'):
-            href = link.get('href')
-            if href:
-                try:
-                    css_url = urljoin(base_url, href)
-                    css_response = self.session.get(css_url)
-                    if css_response.status_code == 200 and len(css_response.content) < self.config.max_css_file_size:
-                        styles['external'][css_url] = css_response.text
-                    else:
-                        styles['external'][css_url] = f"/* CSS file too large or unavailable: {css_url} */"
-                except Exception as e:
-                    styles['external'][href] = f"/* Error loading CSS: {str(e)} */"
-        
-        # Inline styles
-        for element in soup.find_all(style=True):
-            styles['inline'].append({
-                'element': element.name,
-                'selector': self._generate_css_selector(element),
-                'styles': element.get('style')
-            })
+        # External CSS, fetched concurrently along with any @import chains
+        fetched_before = self.fetcher.bytes_fetched
+        styles['external'] = self.fetcher.fetch_stylesheets(
+            analysis.stylesheet_urls,
+            self.config.max_css_file_size,
+            follow_imports=self.config.follow_css_imports,
+            max_import_depth=self.config.max_css_import_depth,
+            inline_sources=[(base_url, css) for css in styles['internal']]
+        )
+        incr('bytes_fetched', self.fetcher.bytes_fetched - fetched_before)
         
         return styles
     
@@ -209,24 +564,21 @@ class AdvancedWebsiteScraper:
             return {}
         
         try:
-            self.driver.get(url)
+            self._load_page(url)
             WebDriverWait(self.driver, 10).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
+            important_properties = COMPUTED_STYLE_PROPERTIES
+            
+            if self.config.batch_computed_styles:
+                return self._extract_computed_styles_batched(important_properties)
+            
             # Get all visible elements
             elements = self.driver.find_elements(By.CSS_SELECTOR, "*")
             computed_styles = {}
             
-            important_properties = [
-                'width', 'height', 'margin', 'padding', 'border', 'position',
-                'top', 'left', 'right', 'bottom', 'display', 'flex-direction',
-                'justify-content', 'align-items', 'background-color', 'color',
-                'font-family', 'font-size', 'font-weight', 'line-height',
-                'text-align', 'z-index', 'opacity', 'transform', 'transition'
-            ]
-            
-            for i, element in enumerate(elements[:100]):  # Limit to first 100 elements
+            for i, element in enumerate(elements[:self.config.max_computed_style_elements]):
                 try:
                     if element.is_displayed():
                         tag_name = element.tag_name
@@ -258,23 +610,32 @@ class AdvancedWebsiteScraper:
             print(f"Error extracting computed styles: {e}")
             return {}
     
+    def _extract_computed_styles_batched(self, properties: List[str]) -> Dict[str, Dict[str, str]]:
+        """Extract computed styles for visible elements in a single script call."""
+        table = self.driver.execute_script(
+            COMPUTED_STYLES_SCRIPT, properties, self.config.max_computed_style_elements
+        ) or {}
+        
+        names = table.get('properties', properties)
+        computed_styles = {}
+        for selector, values in table.get('rows', []):
+            computed_styles[selector] = {
+                prop: value for prop, value in zip(names, values) if value is not None
+            }
+        
+        return computed_styles
+    
     def _extract_measurements(self, url: str) -> Dict[str, str]:
         """Extract precise measurements of key elements."""
         if not self.driver:
             return {}
         
         try:
-            self.driver.get(url)
+            self._load_page(url)
             measurements = {}
             
             # Key elements to measure
-            key_selectors = [
-                'body', 'header', 'main', 'footer', 'nav',
-                '.container', '.wrapper', '.content',
-                'h1', 'h2', 'h3', 'button', 'a'
-            ]
-            
-            for selector in key_selectors:
+            for selector in MEASURED_SELECTORS:
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if elements:
@@ -303,13 +664,11 @@ class AdvancedWebsiteScraper:
             return {}
         
         try:
-            self.driver.get(url)
+            self._load_page(url)
             typography = {}
             
             # Text elements to analyze
-            text_selectors = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'span', 'a', 'button', 'label']
-            
-            for selector in text_selectors:
+            for selector in TEXT_SELECTORS:
                 try:
                     elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if elements:
@@ -335,35 +694,26 @@ class AdvancedWebsiteScraper:
             print(f"Error extracting typography: {e}")
             return {}
     
-    def _extract_comprehensive_colors(self, styles: Dict[str, Any], computed_styles: Dict[str, Dict[str, str]]) -> Dict[str, str]:
+    def _build_css_index(self, url: str, styles: Dict[str, Any]) -> CssIndex:
+        """Index internal and external stylesheets in cascade order."""
+        internal = styles.get('internal') if isinstance(styles.get('internal'), list) else []
+        external = styles.get('external') if isinstance(styles.get('external'), dict) else {}
+        order = styles.get('order')
+        if order is None:
+            # Contexts scraped before document order was recorded
+            return build_css_index(internal + list(external.values()))
+        sources = [(url, internal[key]) if kind == 'internal' else (key, None) for kind, key in order]
+        return build_css_index(cascade_order(url, sources, external))
+    
+    def _extract_comprehensive_colors(self, css_index: CssIndex, computed_styles: Dict[str, Dict[str, str]]) -> Dict[str, str]:
         """Extract comprehensive color palette from all sources."""
-        colors = {}
-        color_pattern = re.compile(r'#([0-9a-fA-F]{3}|[0-9a-fA-F]{6})|rgb\([^)]+\)|rgba\([^)]+\)|hsl\([^)]+\)|hsla\([^)]+\)')
-        
-        # Extract from CSS styles
-        all_css = ""
-        if isinstance(styles.get('internal'), list):
-            all_css += " ".join(styles['internal'])
-        if isinstance(styles.get('external'), dict):
-            all_css += " ".join(styles['external'].values())
-        
-        # Find all color values
-        found_colors = color_pattern.findall(all_css)
-        
-        # Extract from computed styles
-        for selector, style_props in computed_styles.items():
-            for prop, value in style_props.items():
-                if 'color' in prop.lower() and value:
-                    colors[f"{selector}_{prop}"] = value
-        
-        # Create a clean color palette
-        unique_colors = set()
-        for match in re.finditer(color_pattern, all_css):
-            unique_colors.add(match.group())
+        # Most used stylesheet colors first
+        usage = css_index.color_values()
+        unique_colors = sorted(usage, key=usage.get, reverse=True)
         
         # Organize colors by type
         organized_colors = {
-            'primary_colors': list(unique_colors)[:10],  # First 10 unique colors
+            'primary_colors': unique_colors[:10],  # Ten most used colors
             'background_colors': [],
             'text_colors': [],
             'border_colors': []
@@ -378,9 +728,9 @@ class AdvancedWebsiteScraper:
             if 'border-color' in style_props:
                 organized_colors['border_colors'].append(style_props['border-color'])
         
-        # Remove duplicates
+        # Remove duplicates, keeping first-seen order
         for category in organized_colors:
-            organized_colors[category] = list(set(organized_colors[category]))
+            organized_colors[category] = list(dict.fromkeys(organized_colors[category]))
         
         return organized_colors
     
@@ -390,7 +740,7 @@ class AdvancedWebsiteScraper:
             return {}
         
         try:
-            self.driver.get(url)
+            self._load_page(url)
             
             layout = {
                 'page_structure': {},
@@ -400,7 +750,7 @@ class AdvancedWebsiteScraper:
             }
             
             # Analyze main layout containers
-            containers = self.driver.find_elements(By.CSS_SELECTOR, 'body > *, header, main, footer, nav, .container, .wrapper')
+            containers = self.driver.find_elements(By.CSS_SELECTOR, LAYOUT_CONTAINER_SELECTOR)
             
             for container in containers:
                 try:
@@ -439,7 +789,7 @@ class AdvancedWebsiteScraper:
             print(f"Error extracting layout structure: {e}")
             return {}
     
-    def _extract_responsive_data(self, url: str) -> Dict[str, Any]:
+    def _extract_responsive_data(self, url: str, css_index: Optional[CssIndex] = None) -> Dict[str, Any]:
         """Extract responsive design information."""
         if not self.driver:
             return {}
@@ -447,29 +797,29 @@ class AdvancedWebsiteScraper:
         try:
             responsive_data = {}
             
-            # Test different viewport sizes
-            viewports = [
-                ('desktop', self.config.screenshot_width, self.config.screenshot_height),
-                ('tablet', self.config.tablet_width, self.config.tablet_height),
-                ('mobile', self.config.mobile_width, self.config.mobile_height)
-            ]
-            
-            for viewport_name, width, height in viewports:
-                self.driver.set_window_size(width, height)
-                self.driver.get(url)
-                time.sleep(2)  # Wait for responsive changes
-                
-                # Capture key measurements at this viewport
-                body = self.driver.find_element(By.TAG_NAME, 'body')
-                responsive_data[viewport_name] = {
-                    'viewport_size': {'width': width, 'height': height},
-                    'body_size': body.size,
-                    'scroll_height': self.driver.execute_script("return document.body.scrollHeight"),
-                    'visible_elements': len(self.driver.find_elements(By.CSS_SELECTOR, "*:not([style*='display: none'])")),
-                }
+            if self.config.discover_breakpoints and css_index is not None:
+                # One probe per layout regime found in the stylesheets' @media rules
+                breakpoints, regimes, probes = self._plan_probes(css_index)
+                snapshots = {}
+                for width, probe in probes:
+                    if probe['regimes']:
+                        self._load_page(url, (width, probe['height']))
+                        self._wait_for_page_ready()
+                        self._snapshot_regimes(probe['regimes'], snapshots)
+                responsive_data = summarize_regimes(breakpoints, regimes, snapshots)
+            else:
+                # Test different viewport sizes
+                for viewport_name, width, height in self._viewports():
+                    self._load_page(url, (width, height))
+                    self._wait_for_page_ready()  # Wait for responsive changes
+                    
+                    # Capture key measurements at this viewport
+                    responsive_data[viewport_name] = self._measure_viewport(width, height)
             
             # Reset to default size
+            self._clear_viewport_emulation()
             self.driver.set_window_size(self.config.screenshot_width, self.config.screenshot_height)
+            self._window_size = (self.config.screenshot_width, self.config.screenshot_height)
             
             return responsive_data
             
@@ -477,7 +827,99 @@ class AdvancedWebsiteScraper:
             print(f"Error extracting responsive data: {e}")
             return {}
     
-    def _extract_animations(self, styles: Dict[str, Any]) -> Dict[str, Any]:
+    def _capture_viewports(self, url: str, css_index: Optional[CssIndex] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Collect responsive data and screenshots with one page load per viewport."""
+        responsive_data = {}
+        screenshots = {}
+        if not self.driver:
+            return responsive_data, screenshots
+        if not (self.config.extract_responsive_data or self.config.include_screenshots):
+            return responsive_data, screenshots
+        
+        if not (self.config.discover_breakpoints and css_index is not None):
+            for viewport_name, width, height in self._viewports():
+                try:
+                    self._load_page(url, (width, height))
+                    self._wait_for_page_ready()
+                    
+                    if self.config.extract_responsive_data:
+                        responsive_data[viewport_name] = self._measure_viewport(width, height)
+                    if self.config.include_screenshots:
+                        screenshots.update(self._capture_screenshots(viewport_name))
+                        
+                except Exception as e:
+                    print(f"Error capturing {viewport_name} viewport: {e}")
+            
+            return responsive_data, screenshots
+        
+        # Regime probes and screenshot viewports share a load whenever their widths match
+        breakpoints, regimes, probes = self._plan_probes(css_index)
+        snapshots = {}
+        for width, probe in probes:
+            regimes_here = probe['regimes'] if self.config.extract_responsive_data else []
+            names = probe['screenshots'] if self.config.include_screenshots else []
+            if not (regimes_here or names):
+                continue
+            try:
+                self._load_page(url, (width, probe['height']))
+                self._wait_for_page_ready()
+                
+                self._snapshot_regimes(regimes_here, snapshots)
+                for viewport_name in names:
+                    screenshots.update(self._capture_screenshots(viewport_name))
+                    
+            except Exception as e:
+                print(f"Error capturing {width}px viewport: {e}")
+        
+        if self.config.extract_responsive_data:
+            responsive_data = summarize_regimes(breakpoints, regimes, snapshots)
+        return responsive_data, screenshots
+    
+    def _plan_probes(self, css_index: CssIndex) -> Tuple[List[int], List[LayoutRegime], List[Tuple[int, Dict[str, Any]]]]:
+        """Breakpoints, layout regimes and the viewports to visit, widest first.
+        
+        Each viewport entry is (width, {'height', 'regimes', 'screenshots'}):
+        the regimes probed and the named screenshots taken at that width.
+        """
+        viewports = self._viewports()
+        breakpoints = discover_breakpoints(css_index.media_queries)
+        regimes = plan_regimes(
+            breakpoints, [width for _, width, _ in viewports],
+            min_width=self.config.min_probe_width,
+            max_width=self.config.screenshot_width,
+            max_regimes=self.config.max_breakpoint_probes
+        )
+        
+        probes: Dict[int, Dict[str, Any]] = {}
+        for viewport_name, width, height in viewports:
+            probe = probes.setdefault(width, {'height': height, 'regimes': [], 'screenshots': []})
+            probe['screenshots'].append(viewport_name)
+        for regime in regimes:
+            # Off-preset probes borrow the height of the nearest configured viewport
+            _, _, height = min(viewports, key=lambda v: abs(v[1] - regime.probe_width))
+            probe = probes.setdefault(regime.probe_width, {'height': height, 'regimes': [], 'screenshots': []})
+            probe['regimes'].append(regime)
+        return breakpoints, regimes, sorted(probes.items(), reverse=True)
+    
+    def _snapshot_regimes(self, regimes: List[LayoutRegime], snapshots: Dict[str, Dict[str, Any]]):
+        """Record the loaded page's layout for each regime probed at this width."""
+        if not regimes:
+            return
+        snapshot = self.driver.execute_script(LAYOUT_SNAPSHOT_SCRIPT, self.config.max_layout_snapshot_elements)
+        for regime in regimes:
+            snapshots[regime.label] = snapshot
+    
+    def _measure_viewport(self, width: int, height: int) -> Dict[str, Any]:
+        """Capture key measurements of the currently loaded page."""
+        body = self.driver.find_element(By.TAG_NAME, 'body')
+        return {
+            'viewport_size': {'width': width, 'height': height},
+            'body_size': body.size,
+            'scroll_height': self.driver.execute_script("return document.body.scrollHeight"),
+            'visible_elements': len(self.driver.find_elements(By.CSS_SELECTOR, "*:not([style*='display: none'])")),
+        }
+    
+    def _extract_animations(self, css_index: CssIndex) -> Dict[str, Any]:
         """Extract animation and transition information."""
         animations = {
             'css_animations': [],
@@ -485,32 +927,20 @@ class AdvancedWebsiteScraper:
             'transforms': []
         }
         
-        # Combine all CSS
-        all_css = ""
-        if isinstance(styles.get('internal'), list):
-            all_css += " ".join(styles['internal'])
-        if isinstance(styles.get('external'), dict):
-            all_css += " ".join(styles['external'].values())
-        
-        # Find keyframe animations
-        keyframe_pattern = re.compile(r'@keyframes\s+([^{]+)\s*{([^}]+)}', re.MULTILINE)
-        keyframes = keyframe_pattern.findall(all_css)
-        
-        for name, rules in keyframes:
+        # Keyframe animations, with nested frame blocks intact
+        for keyframes in css_index.keyframes:
             animations['css_animations'].append({
-                'name': name.strip(),
-                'rules': rules.strip()
+                'name': keyframes.name,
+                'rules': keyframes.text()
             })
         
-        # Find transitions
-        transition_pattern = re.compile(r'transition[^;]*:[^;]*;', re.IGNORECASE)
-        transitions = transition_pattern.findall(all_css)
-        animations['transitions'] = [t.strip() for t in transitions]
-        
-        # Find transforms
-        transform_pattern = re.compile(r'transform[^;]*:[^;]*;', re.IGNORECASE)
-        transforms = transform_pattern.findall(all_css)
-        animations['transforms'] = [t.strip() for t in transforms]
+        # Transitions and transforms (including longhands and vendor-prefixed forms)
+        animations['transitions'] = list(dict.fromkeys(
+            f"{prop}: {value};" for _, prop, value in css_index.declarations('transition')
+        ))
+        animations['transforms'] = list(dict.fromkeys(
+            f"{prop}: {value};" for _, prop, value in css_index.declarations('transform')
+        ))
         
         return animations
     
@@ -520,7 +950,7 @@ class AdvancedWebsiteScraper:
             return {}
         
         try:
-            self.driver.get(url)
+            self._load_page(url)
             interactions = {
                 'clickable_elements': [],
                 'form_elements': [],
@@ -561,53 +991,7 @@ class AdvancedWebsiteScraper:
             print(f"Error extracting interactions: {e}")
             return {}
     
-    def _extract_assets(self, base_url: str, soup: BeautifulSoup) -> Dict[str, Any]:
-        """Extract information about images and other assets."""
-        assets = {
-            'images': [],
-            'icons': [],
-            'videos': [],
-            'fonts': []
-        }
-        
-        # Extract images
-        for img in soup.find_all('img'):
-            src = img.get('src')
-            if src:
-                assets['images'].append({
-                    'src': urljoin(base_url, src),
-                    'alt': img.get('alt', ''),
-                    'width': img.get('width'),
-                    'height': img.get('height'),
-                    'loading': img.get('loading'),
-                    'sizes': img.get('sizes'),
-                    'srcset': img.get('srcset')
-                })
-        
-        # Extract icons (SVG, icon fonts, etc.)
-        for svg in soup.find_all('svg'):
-            assets['icons'].append({
-                'type': 'svg',
-                'viewBox': svg.get('viewBox'),
-                'width': svg.get('width'),
-                'height': svg.get('height'),
-                'content': str(svg)[:200]  # First 200 chars
-            })
-        
-        # Extract videos
-        for video in soup.find_all('video'):
-            assets['videos'].append({
-                'src': video.get('src'),
-                'poster': video.get('poster'),
-                'width': video.get('width'),
-                'height': video.get('height'),
-                'autoplay': video.get('autoplay') is not None,
-                'controls': video.get('controls') is not None
-            })
-        
-        return assets
-    
-    def _take_screenshots(self, url: str) -> Dict[str, str]:
+    def _take_screenshots(self, url: str) -> Dict[str, Screenshot]:
         """Take screenshots at different viewport sizes."""
         if not self.driver:
             return {}
@@ -615,21 +999,11 @@ class AdvancedWebsiteScraper:
         try:
             screenshots = {}
             
-            viewports = [
-                ('desktop', self.config.screenshot_width, self.config.screenshot_height),
-                ('tablet', self.config.tablet_width, self.config.tablet_height),
-                ('mobile', self.config.mobile_width, self.config.mobile_height)
-            ]
-            
-            for viewport_name, width, height in viewports:
-                self.driver.set_window_size(width, height)
-                self.driver.get(url)
-                time.sleep(3)  # Wait for page to fully load
+            for viewport_name, width, height in self._viewports():
+                self._load_page(url, (width, height))
+                self._wait_for_page_ready()
                 
-                # Take screenshot
-                screenshot = self.driver.get_screenshot_as_png()
-                screenshot_b64 = base64.b64encode(screenshot).decode('utf-8')
-                screenshots[viewport_name] = f"data:image/png;base64,{screenshot_b64}"
+                screenshots.update(self._capture_screenshots(viewport_name))
             
             return screenshots
             
@@ -637,96 +1011,40 @@ class AdvancedWebsiteScraper:
             print(f"Error taking screenshots: {e}")
             return {}
     
-    # Helper methods
-    def _extract_comprehensive_meta(self, soup: BeautifulSoup) -> Dict[str, str]:
-        """Extract comprehensive meta information."""
-        meta = {}
-        
-        # Basic meta tags
-        if soup.title:
-            meta['title'] = soup.title.string
-        
-        meta_tags = {
-            'description': 'description',
-            'keywords': 'keywords',
-            'author': 'author',
-            'viewport': 'viewport',
-            'charset': 'charset'
-        }
-        
-        for key, name in meta_tags.items():
-            tag = soup.find('meta', attrs={'name': name}) or soup.find('meta', attrs={'property': name})
-            if tag:
-                meta[key] = tag.get('content', '')
-        
-        # Open Graph and Twitter meta
-        og_tags = soup.find_all('meta', attrs={'property': re.compile(r'^og:')})
-        for tag in og_tags:
-            meta[tag.get('property')] = tag.get('content', '')
-        
-        twitter_tags = soup.find_all('meta', attrs={'name': re.compile(r'^twitter:')})
-        for tag in twitter_tags:
-            meta[tag.get('name')] = tag.get('content', '')
-        
-        return meta
-    
-    def _extract_detailed_structure(self, soup: BeautifulSoup) -> Dict[str, Any]:
-        """Extract detailed structural information."""
-        structure = {}
-        
-        # Main structural elements
-        structural_elements = ['header', 'nav', 'main', 'article', 'section', 'aside', 'footer']
-        
-        for element_name in structural_elements:
-            elements = soup.find_all(element_name)
-            if elements:
-                structure[element_name] = []
-                for elem in elements:
-                    structure[element_name].append({
-                        'classes': elem.get('class', []),
-                        'id': elem.get('id'),
-                        'children_count': len(elem.find_all(recursive=False)),
-                        'text_content_length': len(elem.get_text(strip=True))
-                    })
-        
-        return structure
-    
-    def _extract_all_elements(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
-        """Extract information about all elements."""
-        elements = []
-        
-        for element in soup.find_all(True)[:200]:  # Limit to first 200 elements
-            if element.name not in ['script', 'style', 'meta', 'link']:
-                elem_info = {
-                    'tag': element.name,
-                    'classes': element.get('class', []),
-                    'id': element.get('id'),
-                    'text_length': len(element.get_text(strip=True)),
-                    'has_children': len(element.find_all(recursive=False)) > 0,
-                    'attributes': {k: v for k, v in element.attrs.items() if k not in ['class', 'id']}
-                }
-                
-                if element.get('style'):
-                    elem_info['inline_styles'] = element.get('style')
-                
-                elements.append(elem_info)
+    def _capture_screenshots(self, viewport_name: str) -> Dict[str, Screenshot]:
+        """Screenshot the current viewport, plus full-page tiles for the desktop view."""
+        screenshots = {viewport_name: self._capture_screenshot()}
+        if viewport_name != 'desktop' or self.config.screenshot_tiles <= 0:
+            return screenshots
         
-        return elements
+        viewport_height, scroll_height = self.driver.execute_script(
+            "return [window.innerHeight, document.documentElement.scrollHeight]"
+        )
+        count = min(self.config.screenshot_tiles + 1, -(-scroll_height // max(viewport_height, 1)))
+        if count <= 1:
+            return screenshots
+        screenshots[viewport_name] = self._capture_screenshot(tile=(1, count))
+        try:
+            for index in range(2, count + 1):
+                self.driver.execute_script("window.scrollTo(0, arguments[0])", (index - 1) * viewport_height)
+                screenshots[f"{viewport_name}_tile{index}"] = self._capture_screenshot(tile=(index, count))
+        finally:
+            self.driver.execute_script("window.scrollTo(0, 0)")
+        return screenshots
     
-    def _generate_css_selector(self, element) -> str:
-        """Generate a CSS selector for an element."""
-        selector_parts = [element.name]
-        
-        if element.get('id'):
-            selector_parts.append(f"#{element.get('id')}")
-        
-        if element.get('class'):
-            classes = element.get('class')
-            if isinstance(classes, list):
-                selector_parts.append('.' + '.'.join(classes))
-        
-        return ''.join(selector_parts)
+    def _capture_screenshot(self, tile: Optional[Tuple[int, int]] = None) -> Screenshot:
+        """Screenshot the current viewport, downscaled and re-encoded for the model."""
+        screenshot = encode_screenshot(
+            self.driver.get_screenshot_as_png(),
+            image_format=self.config.screenshot_format,
+            quality=self.config.screenshot_quality,
+            max_width=self.config.screenshot_max_width,
+            tile=tile
+        )
+        incr('screenshot_bytes', len(screenshot.data))
+        return screenshot
     
+    # Helper methods
     def _generate_selenium_selector(self, element, tag_name: str, element_id: str, element_classes: str) -> str:
         """Generate a unique selector for Selenium elements."""
         if element_id:
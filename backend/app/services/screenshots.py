@@ -0,0 +1,90 @@
+import base64
+import binascii
+import io
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+from PIL import Image
+
+MIME_TYPES = {'png': 'image/png', 'jpeg': 'image/jpeg', 'webp': 'image/webp'}
+
+
+@dataclass
+class Screenshot:
+    """An encoded screenshot kept as raw bytes from capture to model upload."""
+    data: bytes
+    mime_type: str = 'image/png'
+    width: int = 0  # 0 when unknown, e.g. decoded from an old data URI
+    height: int = 0
+    tile: Optional[Tuple[int, int]] = None  # (index, count) for full-page tiles
+
+    def label(self, key: str) -> str:
+        """Prompt label, e.g. 'DESKTOP' or 'DESKTOP, PART 2/3'."""
+        viewport = key.split('_tile')[0].upper()
+        if self.tile is None:
+            return viewport
+        return f"{viewport}, PART {self.tile[0]}/{self.tile[1]}"
+
+    def to_part(self) -> Dict[str, Any]:
+        """Inline image part for Gemini, sent without decoding or re-encoding."""
+        return {'mime_type': self.mime_type, 'data': self.data}
+
+    def to_data_uri(self) -> str:
+        """Data URI for callers that still expect the old string format."""
+        return f"data:{self.mime_type};base64,{base64.b64encode(self.data).decode('ascii')}"
+
+    @classmethod
+    def from_data_uri(cls, uri: str) -> Optional['Screenshot']:
+        header, _, payload = uri.partition(',')
+        if not header.startswith('data:image') or ';base64' not in header:
+            return None
+        try:
+            data = base64.b64decode(payload)
+        except (binascii.Error, ValueError):
+            return None
+        return cls(data, header[5:].split(';')[0])
+
+
+def as_screenshot(value: Any) -> Optional[Screenshot]:
+    """Normalize a screenshot from the current or older context formats.
+
+    Accepts Screenshot objects, raw PNG bytes and base64 data URIs (scrape
+    cache entries written before screenshots were kept as bytes).
+    """
+    if isinstance(value, Screenshot):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return Screenshot(bytes(value))
+    if isinstance(value, str):
+        return Screenshot.from_data_uri(value)
+    return None
+
+
+def encode_screenshot(png: bytes, image_format: str = 'webp', quality: int = 80, max_width: int = 0,
+                      tile: Optional[Tuple[int, int]] = None) -> Screenshot:
+    """Downscale a PNG capture to max_width and re-encode it.
+
+    A PNG that needs no downscaling is passed through untouched.
+    """
+    image_format = image_format.lower()
+    if image_format == 'jpg':
+        image_format = 'jpeg'
+    if image_format not in MIME_TYPES:
+        raise ValueError(f"Unsupported screenshot format: {image_format}")
+
+    with Image.open(io.BytesIO(png)) as image:
+        width, height = image.size
+        if image_format == 'png' and not (max_width and width > max_width):
+            return Screenshot(png, MIME_TYPES['png'], width, height, tile)
+
+        if max_width and width > max_width:
+            height = max(1, round(height * max_width / width))
+            width = max_width
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        if image_format == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        buffer = io.BytesIO()
+        options = {'optimize': True} if image_format == 'png' else {'quality': quality}
+        image.save(buffer, format=image_format.upper(), **options)
+    return Screenshot(buffer.getvalue(), MIME_TYPES[image_format], width, height, tile)
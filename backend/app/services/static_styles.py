@@ -0,0 +1,412 @@
+import re
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+from app.services.breakpoints import media_matches
+from app.services.css_index import COLOR_PATTERN, CssIndex, parse_declaration
+
+# Selectors that depend on interaction state or style pseudo-elements never apply to a static snapshot
+DYNAMIC_SELECTOR = re.compile(
+    r'(?<!\\)(?:::|:(?:hover|focus|focus-within|focus-visible|active|visited|target|before|after|first-line'
+    r'|first-letter|placeholder|selection|marker|backdrop)\b)',
+    re.IGNORECASE
+)
+# Identifier characters including backslash escapes, e.g. `md\:flex`, `w-1\/2` or `\31 0`
+IDENT = r'(?:[\w-]|\\[0-9a-fA-F]{1,6}\s?|\\[^\n0-9a-fA-F])+'
+ESCAPE_PATTERN = re.compile(r'\\([0-9a-fA-F]{1,6})\s?|\\(.)')
+ID_PATTERN = re.compile(rf'#({IDENT})')
+CLASS_PATTERN = re.compile(rf'\.({IDENT})')
+TAG_PATTERN = re.compile(r'^[a-zA-Z][\w-]*')
+SIMPLE_SELECTOR = re.compile(r'^([#.]?)([\w-]+)$')
+ATTRIBUTE_OR_PSEUDO = re.compile(r'\[[^\]]*\]|(?<![:\\]):[\w-]+')
+TYPE_PATTERN = re.compile(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)')
+VAR_PATTERN = re.compile(r'var\(\s*(--[\w-]+)\s*(?:,\s*([^()]*))?\)')
+
+# Properties a child takes from its parent unless it declares its own
+INHERITED_PROPERTIES = frozenset((
+    'color', 'font-family', 'font-size', 'font-weight', 'font-style', 'line-height', 'letter-spacing',
+    'text-align', 'text-transform', 'visibility', 'white-space', 'word-spacing', 'direction', 'list-style',
+))
+# Tags with no box of their own
+NON_RENDERED_TAGS = frozenset((
+    'head', 'script', 'style', 'link', 'meta', 'title', 'template', 'noscript', 'base',
+))
+BLOCK_TAGS = frozenset((
+    'html', 'body', 'div', 'section', 'article', 'aside', 'header', 'footer', 'main', 'nav', 'p', 'ul', 'ol',
+    'li', 'form', 'figure', 'figcaption', 'blockquote', 'pre', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'address', 'details', 'fieldset', 'dl', 'dt', 'dd', 'table',
+))
+# The few user-agent defaults prompts care about; everything else is left undeclared
+UA_DEFAULTS = {
+    'body': {'margin': '8px'},
+    'h1': {'font-size': '2em', 'font-weight': 'bold'},
+    'h2': {'font-size': '1.5em', 'font-weight': 'bold'},
+    'h3': {'font-size': '1.17em', 'font-weight': 'bold'},
+    'h4': {'font-weight': 'bold'},
+    'h5': {'font-size': '0.83em', 'font-weight': 'bold'},
+    'h6': {'font-size': '0.67em', 'font-weight': 'bold'},
+    'a': {'color': '#0000ee', 'text-decoration': 'underline'},
+    'strong': {'font-weight': 'bold'},
+    'b': {'font-weight': 'bold'},
+    'em': {'font-style': 'italic'},
+    'i': {'font-style': 'italic'},
+    'button': {'display': 'inline-block'},
+    'img': {'display': 'inline-block'},
+    'table': {'display': 'table'},
+    'li': {'display': 'list-item'},
+}
+# Client-side app mount points, empty until JavaScript renders into them
+MOUNT_POINT_IDS = ('root', 'app', '__next', '__nuxt', '___gatsby', 'svelte')
+NOSCRIPT_WARNING = re.compile(r'enable javascript|javascript (?:is )?(?:required|disabled)', re.IGNORECASE)
+
+
+def needs_javascript(soup: BeautifulSoup, min_text_chars: int = 200) -> Optional[str]:
+    """Why a page needs a browser to render, or None if its HTML is already the page.
+
+    Looks for framework markers of client-side rendering: empty app mount
+    points, Angular bootstrapping without server rendering, noscript
+    warnings, and script-driven pages with almost no text in their HTML.
+    """
+    for mount_id in MOUNT_POINT_IDS:
+        mount = soup.find(id=mount_id)
+        if mount is not None and len(mount.get_text(strip=True)) < min_text_chars // 4:
+            return f"empty #{mount_id} mount point"
+    if soup.find(attrs={'ng-app': True}) is not None:
+        return "AngularJS ng-app"
+    if soup.find(attrs={'ng-version': True}) is not None and soup.find(attrs={'ng-server-context': True}) is None:
+        return "client-rendered Angular"
+    for noscript in soup.find_all('noscript'):
+        if NOSCRIPT_WARNING.search(noscript.get_text()):
+            return "noscript asks for JavaScript"
+
+    body = soup.body
+    if body is None:
+        return "no <body>"
+    if soup.find('script') is not None:
+        text = sum(len(s) for s in body.find_all(string=True)
+                   if s.parent is not None and s.parent.name not in NON_RENDERED_TAGS and s.strip())
+        if text < min_text_chars:
+            return f"only {text} characters of server-rendered text"
+    return None
+
+
+def specificity(selector: str) -> Tuple[int, int, int]:
+    """Approximate (ids, classes/attributes/pseudo-classes, types) specificity."""
+    return (
+        len(ID_PATTERN.findall(selector)),
+        len(CLASS_PATTERN.findall(selector)) + len(ATTRIBUTE_OR_PSEUDO.findall(selector)),
+        len(TYPE_PATTERN.findall(selector)),
+    )
+
+
+def css_unescape(identifier: str) -> str:
+    """Decode CSS escapes, so `md\\:flex` becomes the class name `md:flex`."""
+    if '\\' not in identifier:
+        return identifier
+
+    def decode(match: re.Match) -> str:
+        if match.group(2) is not None:
+            return match.group(2)
+        codepoint = int(match.group(1), 16)
+        if codepoint == 0 or codepoint > 0x10FFFF or 0xD800 <= codepoint <= 0xDFFF:
+            return '\ufffd'
+        return chr(codepoint)
+    return ESCAPE_PATTERN.sub(decode, identifier)
+
+
+def rightmost_compound(selector: str) -> str:
+    """The compound selector after the last top-level combinator, without its arguments.
+
+    Escaped characters are kept as written and never read as combinators or brackets.
+    """
+    depth, kept, i = 0, [], 0
+    while i < len(selector):
+        char = selector[i]
+        if char == '\\':
+            escape = ESCAPE_PATTERN.match(selector, i)
+            end = escape.end() if escape else i + 1
+            if depth == 0:
+                kept.append(selector[i:end])
+            i = end
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth = max(0, depth - 1)
+        elif depth == 0 and char in ' >+~':
+            kept = []
+        elif depth == 0:
+            kept.append(char)
+        i += 1
+    return ''.join(kept)
+
+
+def selector_for(tag: Tag) -> str:
+    """Element key in the same form the browser computed-styles script uses."""
+    if tag.get('id'):
+        return '#' + tag['id']
+    classes = tag.get('class') or []
+    if classes:
+        return tag.name + '.' + '.'.join(classes[:2])
+    return tag.name
+
+
+class StaticCascade:
+    """Approximate computed styles for a parsed document from its stylesheets alone.
+
+    Rules are bucketed by the id, class or tag of their rightmost compound
+    selector, as browsers do, so each element is only matched against rules
+    that could apply to it. The cascade honours media conditions at the
+    given width, specificity, source order, !important, inline styles,
+    inheritance and custom properties. Values stay as declared: relative
+    units are not resolved and layout-dependent values are unknown.
+    """
+
+    def __init__(self, soup: BeautifulSoup, css_index: CssIndex, viewport_width: int = 1920):
+        self.soup = soup
+        self.custom_properties = css_index.custom_properties
+        self._by_id: Dict[str, List[tuple]] = {}
+        self._by_class: Dict[str, List[tuple]] = {}
+        self._by_tag: Dict[str, List[tuple]] = {}
+        self._universal: List[tuple] = []
+        self._compiled: Dict[str, Any] = {}
+        self._specified: Dict[int, Dict[str, str]] = {}
+        self._computed: Dict[int, Dict[str, str]] = {}
+        self._first: Optional[Dict[str, Tag]] = None
+
+        order = 0
+        applies: Dict[str, bool] = {}
+        for rule in css_index.rules:
+            for condition in rule.media:
+                if condition not in applies:
+                    applies[condition] = media_matches(condition, viewport_width)
+            if not all(applies[condition] for condition in rule.media):
+                continue
+            for selector in rule.selectors:
+                if DYNAMIC_SELECTOR.search(selector):
+                    continue
+                entry = (specificity(selector), order, selector, rule.declarations)
+                order += 1
+                compound = rightmost_compound(selector)
+                id_match = ID_PATTERN.search(compound)
+                class_match = CLASS_PATTERN.search(compound)
+                tag_match = TAG_PATTERN.match(compound)
+                if id_match:
+                    self._by_id.setdefault(css_unescape(id_match.group(1)), []).append(entry)
+                elif class_match:
+                    self._by_class.setdefault(css_unescape(class_match.group(1)), []).append(entry)
+                elif tag_match:
+                    self._by_tag.setdefault(tag_match.group().lower(), []).append(entry)
+                else:
+                    self._universal.append(entry)
+
+    def specified(self, tag: Tag) -> Dict[str, str]:
+        """Cascaded declared values of one element, before inheritance."""
+        key = id(tag)
+        if key in self._specified:
+            return self._specified[key]
+
+        candidates = list(self._universal)
+        candidates.extend(self._by_tag.get(tag.name, ()))
+        if tag.get('id'):
+            candidates.extend(self._by_id.get(tag['id'], ()))
+        for class_name in tag.get('class') or ():
+            candidates.extend(self._by_class.get(class_name, ()))
+
+        normal: Dict[str, str] = {}
+        important: Dict[str, str] = {}
+        for _, _, selector, declarations in sorted(candidates, key=lambda entry: entry[:2]):
+            if not self._matches(selector, tag):
+                continue
+            for prop, value, is_important in declarations:
+                (important if is_important else normal)[prop] = value
+
+        for part in (tag.get('style') or '').split(';'):
+            declaration = parse_declaration(part)
+            if declaration is not None:
+                (important if declaration[2] else normal)[declaration[0]] = declaration[1]
+        normal.update(important)
+        self._specified[key] = normal
+        return normal
+
+    def computed(self, tag: Tag) -> Dict[str, str]:
+        """Declared values plus user-agent defaults and inherited properties."""
+        key = id(tag)
+        if key in self._computed:
+            return self._computed[key]
+
+        # Resolve ancestors top-down without recursion; documents can be very deep
+        chain = []
+        current = tag
+        while isinstance(current, Tag) and current.name != '[document]' and id(current) not in self._computed:
+            chain.append(current)
+            current = current.parent
+        parent_style = self._computed.get(id(current), {}) if isinstance(current, Tag) else {}
+
+        for element in reversed(chain):
+            style = {'display': 'block' if element.name in BLOCK_TAGS else 'inline'}
+            style.update(UA_DEFAULTS.get(element.name, {}))
+            style.update(self.specified(element))
+            for prop in INHERITED_PROPERTIES:
+                if prop in parent_style and style.get(prop, 'inherit') == 'inherit':
+                    style[prop] = parent_style[prop]
+            style = {
+                prop: self._resolve_vars(value) for prop, value in style.items()
+                if value not in ('inherit', 'initial', 'unset')
+            }
+            # Only after var() resolution can a color be read out of the shorthand
+            if 'background-color' not in style and 'background' in style:
+                color = COLOR_PATTERN.search(style['background'])
+                if color:
+                    style['background-color'] = color.group()
+            self._computed[id(element)] = style
+            parent_style = style
+        return self._computed[key]
+
+    def select_one(self, selector: str) -> Optional[Tag]:
+        """First match of selector; plain tag, .class and #id lookups use a one-pass index."""
+        simple = SIMPLE_SELECTOR.match(selector)
+        if simple is None:
+            try:
+                return self.soup.select_one(selector)
+            except Exception:
+                return None
+        if self._first is None:
+            self._first = {}
+            for tag in self.soup.find_all(True):
+                self._first.setdefault(tag.name, tag)
+                if tag.get('id'):
+                    self._first.setdefault('#' + tag['id'], tag)
+                for class_name in tag.get('class') or ():
+                    self._first.setdefault('.' + class_name, tag)
+        prefix, name = simple.groups()
+        return self._first.get(prefix + (name if prefix else name.lower()))
+
+    def is_rendered(self, tag: Tag) -> bool:
+        if tag.name in NON_RENDERED_TAGS or tag.has_attr('hidden'):
+            return False
+        for parent in tag.parents:
+            if parent.name in NON_RENDERED_TAGS or parent.has_attr('hidden'):
+                return False
+        return self.computed(tag).get('display') != 'none'
+
+    def computed_styles(self, properties: Sequence[str], limit: int) -> Dict[str, Dict[str, str]]:
+        """Same shape as the browser computed-styles extraction, over the first limit elements."""
+        skipped = ('', 'none', 'auto')
+        computed_styles = {}
+        for tag in self.soup.find_all(True, limit=limit):
+            if not self.is_rendered(tag):
+                continue
+            style = self.computed(tag)
+            values = {prop: style[prop] for prop in properties if style.get(prop, '') not in skipped}
+            if values:
+                computed_styles[selector_for(tag)] = values
+        return computed_styles
+
+    def measurements(self, selectors: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """Declared box dimensions of the first match of each selector."""
+        measurements = {}
+        for selector in selectors:
+            tag = self.select_one(selector)
+            if tag is None:
+                continue
+            style = self.specified(tag)
+            box = {prop: style[prop] for prop in ('width', 'height', 'max-width', 'min-height', 'margin', 'padding')
+                   if prop in style}
+            if box:
+                measurements[selector] = box
+        return measurements
+
+    def typography(self, selectors: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """Text styles of the first match of each selector."""
+        properties = ('font-family', 'font-size', 'font-weight', 'font-style', 'line-height', 'letter-spacing',
+                      'text-transform', 'text-decoration', 'color')
+        typography = {}
+        for selector in selectors:
+            tag = self.select_one(selector)
+            if tag is not None:
+                style = self.computed(tag)
+                typography[selector] = {prop: style[prop] for prop in properties if prop in style}
+        return typography
+
+    def layout_structure(self, container_selector: str) -> Dict[str, Any]:
+        """Grid, flex and positioned containers, as in the browser layout extraction minus geometry."""
+        layout = {
+            'page_structure': {},
+            'grid_systems': [],
+            'flexbox_containers': [],
+            'positioning': {}
+        }
+        try:
+            containers = self.soup.select(container_selector)
+        except Exception:
+            return layout
+        for container in containers:
+            style = self.computed(container)
+            display = style.get('display', '')
+            position = style.get('position', 'static')
+            container_info = {'tag': container.name, 'display': display, 'position': position}
+            if 'grid' in display:
+                container_info['grid-template-columns'] = style.get('grid-template-columns')
+                layout['grid_systems'].append(container_info)
+            elif 'flex' in display:
+                container_info['flex-direction'] = style.get('flex-direction', 'row')
+                layout['flexbox_containers'].append(container_info)
+            if position in ('absolute', 'fixed', 'relative', 'sticky'):
+                classes = ' '.join(container.get('class') or []) or 'no-class'
+                layout['positioning'][f"{container.name}_{classes}"] = {
+                    prop: style.get(prop) for prop in ('position', 'top', 'left', 'right', 'bottom', 'z-index')
+                }
+        return layout
+
+    def _matches(self, selector: str, tag: Tag) -> bool:
+        compiled = self._compiled.get(selector)
+        if compiled is None:
+            try:
+                compiled = soupsieve.compile(selector)
+            except Exception:
+                compiled = False  # Selector syntax soupsieve does not support
+            self._compiled[selector] = compiled
+        if compiled is False:
+            return False
+        try:
+            return compiled.match(tag)
+        except Exception:
+            return False
+
+    def _resolve_vars(self, value: str) -> str:
+        if 'var(' not in value:
+            return value
+        for _ in range(5):  # Custom properties may reference each other
+            resolved = VAR_PATTERN.sub(
+                lambda m: self.custom_properties.get(m.group(1), (m.group(2) or '').strip()), value
+            )
+            if resolved == value:
+                break
+            value = resolved
+        return value
+
+
+def static_interactions(soup: BeautifulSoup, limit: int = 20) -> Dict[str, Any]:
+    """Clickable and form elements from the HTML, without geometry."""
+    interactions = {
+        'clickable_elements': [],
+        'form_elements': [],
+        'hover_effects': []
+    }
+    for element in soup.select('a, button, [onclick], [role="button"]')[:limit]:
+        interactions['clickable_elements'].append({
+            'tag': element.name,
+            'text': element.get_text(strip=True)[:50],
+            'href': element.get('href') if element.name == 'a' else None,
+        })
+    for element in soup.select('input, textarea, select, button[type="submit"]'):
+        interactions['form_elements'].append({
+            'tag': element.name,
+            'type': element.get('type'),
+            'placeholder': element.get('placeholder'),
+            'name': element.get('name'),
+        })
+    return interactions
@@ -0,0 +1,72 @@
+import hashlib
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator, List
+
+from app.services.prompt_builder import estimate_tokens
+
+
+@dataclass
+class FakeUsage:
+    prompt_token_count: int
+    candidates_token_count: int
+
+
+@dataclass
+class FakeResponse:
+    text: str
+    usage_metadata: FakeUsage
+
+
+class FakeGeminiModel:
+    """Deterministic stand-in for genai.GenerativeModel.
+
+    The reply depends only on the prompt text, so repeated runs do identical
+    work. latency simulates the model round trip; tokens_per_second, when set,
+    adds time proportional to the reply length as a real model would.
+    """
+
+    def __init__(self, latency: float = 0.0, tokens_per_second: float = 0.0, response_sections: int = 40):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.response_sections = response_sections
+        self.calls = 0
+
+    def generate_content(self, prompt: Any, stream: bool = False):
+        parts = prompt if isinstance(prompt, list) else [prompt]
+        text_parts = [part for part in parts if isinstance(part, str)]
+        prompt_text = ''.join(text_parts)
+        html = self._render(hashlib.sha256(prompt_text.encode('utf-8')).hexdigest())
+        usage = FakeUsage(estimate_tokens(prompt_text), estimate_tokens(html))
+        self.calls += 1
+
+        time.sleep(self.latency)
+        if stream:
+            return self._stream(html, usage)
+        if self.tokens_per_second:
+            time.sleep(usage.candidates_token_count / self.tokens_per_second)
+        return FakeResponse(html, usage)
+
+    def _stream(self, html: str, usage: FakeUsage) -> Iterator[FakeResponse]:
+        chunks = self._chunks(html, 256)
+        for chunk in chunks:
+            if self.tokens_per_second:
+                time.sleep(estimate_tokens(chunk) / self.tokens_per_second)
+            yield FakeResponse(chunk, usage)
+
+    def _render(self, digest: str) -> str:
+        sections = '\n'.join(
+            f'<section class="s{i}" style="padding: {int(digest[i % 64], 16)}px"><h2>Section {i}</h2>'
+            f'<p>{digest}</p></section>'
+            for i in range(self.response_sections)
+        )
+        return (
+            "```html\n<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"UTF-8\">\n"
+            "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\">\n"
+            f"<title>{digest[:12]}</title>\n<style>body {{ margin: 0; }}</style>\n</head>\n<body>\n"
+            f"{sections}\n</body>\n</html>\n```"
+        )
+
+    @staticmethod
+    def _chunks(text: str, size: int) -> List[str]:
+        return [text[i:i + size] for i in range(0, len(text), size)]
@@ -0,0 +1,191 @@
+import base64
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+# 1x1 transparent PNG, served for every fixture image
+PIXEL_PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=='
+)
+
+# path -> (content type, body)
+Site = Dict[str, Tuple[str, bytes]]
+
+
+def _page(title: str, head: str, body: str) -> bytes:
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<meta name="description" content="{title} benchmark fixture">
+<title>{title}</title>
+{head}
+</head>
+<body>
+{body}
+</body>
+</html>""".encode('utf-8')
+
+
+def _css(text: str) -> Tuple[str, bytes]:
+    return 'text/css; charset=utf-8', text.encode('utf-8')
+
+
+def small_static() -> Site:
+    """A typical landing page: landmarks, a few sections and one stylesheet."""
+    sections = '\n'.join(
+        f'<section class="feature" id="feature-{i}"><h2>Feature {i}</h2>'
+        f'<p>Short description of feature {i} for the fixture page.</p>'
+        f'<a class="button" href="/small_static/feature-{i}">Learn more</a></section>'
+        for i in range(6)
+    )
+    body = f"""<header class="site-header"><nav><a href="/">Home</a><a href="/about">About</a></nav></header>
+<main><h1>Small static page</h1>{sections}</main>
+<footer class="site-footer"><p>&copy; Fixture Inc.</p></footer>"""
+    css = """
+body { margin: 0; font-family: Helvetica, Arial, sans-serif; color: #222; }
+.site-header { display: flex; justify-content: space-between; padding: 16px 32px; background: #0b3d91; }
+.site-header a { color: #fff; margin-right: 16px; text-decoration: none; }
+main { max-width: 960px; margin: 0 auto; padding: 32px; }
+.feature { padding: 24px 0; border-bottom: 1px solid #eee; }
+.button { display: inline-block; padding: 8px 16px; border-radius: 4px; background: #fc3d21; color: #fff; transition: background 0.2s ease; }
+.button:hover { background: #d12e15; }
+.site-footer { padding: 24px; text-align: center; background: #f5f5f5; }
+@media (max-width: 768px) { main { padding: 16px; } }
+"""
+    return {
+        '/small_static/index.html': ('text/html; charset=utf-8', _page(
+            'Small static', '<link rel="stylesheet" href="/small_static/site.css">', body)),
+        '/small_static/site.css': _css(css),
+    }
+
+
+def css_heavy(rules: int = 3000) -> Site:
+    """Several large stylesheets with @import chains, media queries and keyframes."""
+    palette = ['#1abc9c', '#2ecc71', '#3498db', '#9b59b6', '#34495e', '#f1c40f', '#e67e22', '#e74c3c']
+    sheets = {}
+    for sheet in range(3):
+        lines = []
+        for i in range(rules // 3):
+            color = palette[(i + sheet) % len(palette)]
+            lines.append(
+                f'.c{sheet}-{i} {{ color: {color}; background-color: rgba({i % 255}, {sheet * 40}, 120, 0.{i % 9 + 1}); '
+                f'padding: {i % 24}px; transition: opacity 0.{i % 5 + 1}s ease-in-out; }}'
+            )
+            if i % 50 == 0:
+                lines.append(f'@media (min-width: {480 + (i % 7) * 160}px) {{ .c{sheet}-{i} {{ margin: {i % 16}px; }} }}')
+            if i % 200 == 0:
+                lines.append(f'@keyframes pulse{sheet}-{i} {{ 0% {{ opacity: 0; }} 100% {{ opacity: 1; }} }}')
+        sheets[f'/css_heavy/sheet{sheet}.css'] = _css('\n'.join(lines))
+    sheets['/css_heavy/base.css'] = _css(
+        '@import url("/css_heavy/sheet1.css");\n@import "/css_heavy/sheet2.css";\n'
+        'body { margin: 0; font-family: Georgia, serif; }'
+    )
+    elements = '\n'.join(f'<div class="c0-{i} c1-{i}"><span>Item {i}</span></div>' for i in range(300))
+    head = ('<link rel="stylesheet" href="/css_heavy/sheet0.css">\n'
+            '<link rel="stylesheet" href="/css_heavy/base.css">\n'
+            '<style>.inline-a { color: #123456; } .inline-b { animation: pulse0-0 1s infinite; }</style>')
+    sheets['/css_heavy/index.html'] = ('text/html; charset=utf-8', _page(
+        'CSS heavy', head, f'<main class="inline-a">{elements}</main>'))
+    return sheets
+
+
+def deep_dom(depth: int = 120, breadth: int = 25) -> Site:
+    """A deeply nested tree plus many wide sibling lists."""
+    nested = ''.join(f'<div class="level level-{i}">' for i in range(depth))
+    nested += '<p>Deepest node</p>' + '</div>' * depth
+    lists = '\n'.join(
+        '<section><ul>' + ''.join(f'<li class="row"><a href="#r{s}-{i}">Row {s}.{i}</a> <em>detail</em></li>'
+                                  for i in range(breadth)) + '</ul></section>'
+        for s in range(breadth * 2)
+    )
+    css = '.level { padding-left: 1px; } .row { display: flex; gap: 4px; } section { margin: 8px 0; }'
+    return {
+        '/deep_dom/index.html': ('text/html; charset=utf-8', _page(
+            'Deep DOM', '<link rel="stylesheet" href="/deep_dom/dom.css">',
+            f'<header><h1>Deep DOM</h1></header><main>{nested}{lists}</main><footer>end</footer>')),
+        '/deep_dom/dom.css': _css(css),
+    }
+
+
+def image_heavy(images: int = 80) -> Site:
+    """A gallery with many images, srcsets, inline SVG icons and a video."""
+    site: Site = {}
+    figures = []
+    for i in range(images):
+        site[f'/image_heavy/img/{i}.png'] = ('image/png', PIXEL_PNG)
+        figures.append(
+            f'<figure class="tile"><img src="img/{i}.png" alt="Image {i}" width="320" height="240" loading="lazy" '
+            f'srcset="img/{i}.png 1x, img/{i}.png 2x">'
+            f'<svg viewBox="0 0 24 24" width="24" height="24"><circle cx="12" cy="12" r="{i % 10 + 1}"/></svg>'
+            f'<figcaption>Caption {i}</figcaption></figure>'
+        )
+    css = ('.gallery { display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; }'
+           '.tile img { width: 100%; height: auto; } .tile figcaption { font-size: 12px; color: #666; }')
+    site['/image_heavy/gallery.css'] = _css(css)
+    site['/image_heavy/index.html'] = ('text/html; charset=utf-8', _page(
+        'Image heavy', '<link rel="stylesheet" href="/image_heavy/gallery.css">',
+        '<main class="gallery">' + ''.join(figures) + '</main>'
+        '<video src="/image_heavy/clip.mp4" poster="img/0.png" width="640" height="360" controls></video>'))
+    return site
+
+
+FIXTURES: Dict[str, Callable[[], Site]] = {
+    'small_static': small_static,
+    'css_heavy': css_heavy,
+    'deep_dom': deep_dom,
+    'image_heavy': image_heavy,
+}
+
+
+@lru_cache(maxsize=None)
+def build_corpus() -> Site:
+    """Every fixture site merged into one path table."""
+    corpus: Site = {}
+    for build in FIXTURES.values():
+        corpus.update(build())
+    return corpus
+
+
+class FixtureServer:
+    """Serves the fixture corpus from a local threaded HTTP server on a free port."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        corpus = build_corpus()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                entry = corpus.get(self.path.split('?', 1)[0])
+                if entry is None:
+                    self.send_error(404)
+                    return
+                content_type, body = entry
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url_for(self, fixture: str) -> str:
+        return f"{self.base_url}/{fixture}/index.html"
+
+    def __enter__(self) -> 'FixtureServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,293 @@
+"""Benchmark the scrape and clone pipeline against local fixture sites.
+
+Run from the backend directory:
+
+    python -m benchmarks.run --iterations 5 --concurrency 4
+    python -m benchmarks.run --compare benchmarks/results/<base>.json
+
+Fixture pages are served from a local HTTP server and generation uses a
+deterministic fake model, so no network access or API key is needed. Chrome
+is used when available. Without it the scraper falls back to html-only
+extraction (no computed styles, layout or screenshots), exactly as it does in
+production; such runs are not comparable with browser runs, so the report
+records each fixture's render modes and flags html-only results.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, List, Optional, Tuple
+
+from app.services.driver_pool import DriverPool, DriverPoolConfig
+from app.services.instrumentation import Span, peak_rss_bytes, span
+from app.services.llm_cloner import HighPrecisionLLMCloner, PrecisionCloneConfig
+from app.services.scraper import AdvancedWebsiteScraper, ScrapingConfig
+from benchmarks.fake_model import FakeGeminiModel
+from benchmarks.fixtures import FIXTURES, FixtureServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None for no samples."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return round(ordered[rank - 1], 3)
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'mean': round(sum(values) / len(values), 3) if values else None,
+    }
+
+
+def collect_stages(root: Span) -> Dict[str, List[float]]:
+    """Durations (ms) of every span in a tree, grouped by span name."""
+    stages: Dict[str, List[float]] = {}
+    pending = list(root.children)
+    while pending:
+        current = pending.pop()
+        stages.setdefault(current.name, []).append(current.duration * 1000)
+        pending.extend(current.children)
+    return stages
+
+
+def parse_options(pairs: List[str]) -> Dict[str, Any]:
+    """KEY=VALUE pairs with JSON-decoded values where possible (true, 3, "x")."""
+    options = {}
+    for pair in pairs:
+        key, _, raw = pair.partition('=')
+        try:
+            options[key] = json.loads(raw)
+        except json.JSONDecodeError:
+            options[key] = raw
+    return options
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Benchmark:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.scrape_config = ScrapingConfig(**parse_options(args.scrape_option))
+        self.clone_config = PrecisionCloneConfig(**parse_options(args.clone_option))
+        self.model = FakeGeminiModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second)
+        self.driver_pool = None
+        if not args.no_pool:
+            self.driver_pool = DriverPool(DriverPoolConfig(
+                max_size=args.concurrency, warm_size=0,
+                window_width=self.scrape_config.screenshot_width,
+                window_height=self.scrape_config.screenshot_height
+            ))
+
+    async def clone(self, url: str, trace_memory: bool = False) -> Tuple[Span, Dict[str, float]]:
+        """Scrape and clone url once; returns the span tree and per-stage Python heap peaks (KB)."""
+        scraper = AdvancedWebsiteScraper(self.scrape_config, driver_pool=self.driver_pool)
+        cloner = HighPrecisionLLMCloner(self.clone_config, model=self.model)
+        memory = {}
+        with span('bench.clone', url=url) as root:
+            if trace_memory:
+                tracemalloc.reset_peak()
+            context = await asyncio.to_thread(scraper.scrape_comprehensive, url)
+            root.attributes['render_mode'] = (context.get('render_mode') or {}).get('mode')
+            if trace_memory:
+                memory['scrape'] = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.reset_peak()
+            await cloner.generate_pixel_perfect_html(context)
+            if trace_memory:
+                memory['clone'] = tracemalloc.get_traced_memory()[1] / 1024
+        return root, memory
+
+    async def latency(self, server: FixtureServer, fixture: str) -> Dict[str, Any]:
+        """Sequential runs of one fixture: per-stage latency and memory."""
+        url = server.url_for(fixture)
+        for _ in range(self.args.warmup):
+            await self.clone(url)
+
+        totals: List[float] = []
+        stages: Dict[str, List[float]] = {}
+        memory: Dict[str, List[float]] = {}
+        counters: Dict[str, float] = {}
+        rss_deltas: List[float] = []
+        render_modes: Dict[str, int] = {}
+        for _ in range(self.args.iterations):
+            root, heap = await self.clone(url, trace_memory=self.args.trace_memory)
+            totals.append(root.duration * 1000)
+            mode = root.attributes.get('render_mode') or 'unknown'
+            render_modes[mode] = render_modes.get(mode, 0) + 1
+            for name, durations in collect_stages(root).items():
+                stages.setdefault(name, []).extend(durations)
+            for name, peak in heap.items():
+                memory.setdefault(name, []).append(peak)
+            for name, value in root.totals.items():
+                counters[name] = counters.get(name, 0) + value
+            if root.rss_delta is not None:
+                rss_deltas.append(root.rss_delta / (1024 * 1024))
+
+        if 'html-only' in render_modes:
+            print(f"Warning: {fixture} ran html-only (browser unavailable); timings are not comparable "
+                  "with browser runs", file=sys.stderr)
+        return {
+            'url': url,
+            'render_modes': render_modes,
+            'html_only': 'html-only' in render_modes,
+            'total_ms': summarize(totals),
+            'stages_ms': {name: summarize(values) for name, values in sorted(stages.items())},
+            'heap_peak_kb': {name: summarize(values) for name, values in memory.items()},
+            'rss_delta_mb': summarize(rss_deltas),
+            'process_rss_peak_mb': round(peak_rss_bytes() / (1024 * 1024), 1),
+            'counters_per_run': {name: round(value / self.args.iterations, 2) for name, value in counters.items()},
+        }
+
+    async def throughput(self, server: FixtureServer, fixtures: List[str]) -> Dict[str, Any]:
+        """All fixtures round-robin at the configured concurrency."""
+        urls = [server.url_for(fixtures[i % len(fixtures)]) for i in range(self.args.throughput_pages)]
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies: List[float] = []
+        failures = 0
+
+        async def one(url: str) -> None:
+            nonlocal failures
+            async with semaphore:
+                try:
+                    root, _ = await self.clone(url)
+                    latencies.append(root.duration * 1000)
+                except Exception as e:
+                    failures += 1
+                    print(f"Throughput run failed for {url}: {e}", file=sys.stderr)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(url) for url in urls))
+        elapsed = time.perf_counter() - started
+        return {
+            'concurrency': self.args.concurrency,
+            'pages': len(urls),
+            'failures': failures,
+            'seconds': round(elapsed, 3),
+            'pages_per_second': round(len(latencies) / elapsed, 3) if elapsed else None,
+            'latency_ms': summarize(latencies),
+        }
+
+    async def run(self) -> Dict[str, Any]:
+        fixtures = self.args.fixtures or list(FIXTURES)
+        if self.args.trace_memory:
+            tracemalloc.start()
+        try:
+            with FixtureServer() as server:
+                results = {}
+                for fixture in fixtures:
+                    print(f"Benchmarking {fixture}...", file=sys.stderr)
+                    results[fixture] = await self.latency(server, fixture)
+                throughput = await self.throughput(server, fixtures) if self.args.throughput_pages else None
+        finally:
+            if self.args.trace_memory:
+                tracemalloc.stop()
+            if self.driver_pool is not None:
+                self.driver_pool.close()
+
+        return {
+            'commit': git_commit(),
+            'timestamp': time.time(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'settings': {
+                key: value for key, value in vars(self.args).items()
+                if key not in ('output', 'compare')
+            },
+            'html_only': any(result['html_only'] for result in results.values()),
+            'fixtures': results,
+            'throughput': throughput,
+        }
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float) -> List[str]:
+    """Print p50/p95 changes between two result files; returns the regressions."""
+    regressions = []
+    print(f"{'metric':<60} {'base':>10} {'head':>10} {'change':>8}")
+    for fixture, head_result in head.get('fixtures', {}).items():
+        base_result = base.get('fixtures', {}).get(fixture)
+        if base_result is None:
+            continue
+        if base_result.get('html_only') != head_result.get('html_only'):
+            print(f"{fixture}: base html_only={base_result.get('html_only')}, "
+                  f"head html_only={head_result.get('html_only')}; render paths differ")
+        pairs = [('total', base_result['total_ms'], head_result['total_ms'])]
+        for stage, stats in head_result['stages_ms'].items():
+            if stage in base_result['stages_ms']:
+                pairs.append((stage, base_result['stages_ms'][stage], stats))
+        for name, before, after in pairs:
+            for pct in ('p50', 'p95'):
+                if not before.get(pct) or after.get(pct) is None:
+                    continue
+                change = after[pct] / before[pct] - 1
+                label = f"{fixture}.{name}.{pct}"
+                flag = ' !' if change > threshold else ''
+                print(f"{label:<60} {before[pct]:>10.1f} {after[pct]:>10.1f} {change:>+8.1%}{flag}")
+                if change > threshold:
+                    regressions.append(label)
+
+    if base.get('throughput') and head.get('throughput'):
+        before, after = base['throughput']['pages_per_second'], head['throughput']['pages_per_second']
+        if before and after is not None:
+            change = after / before - 1
+            print(f"{'throughput.pages_per_second':<60} {before:>10.3f} {after:>10.3f} {change:>+8.1%}")
+            if change < -threshold:
+                regressions.append('throughput.pages_per_second')
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixtures', nargs='*', choices=list(FIXTURES), help='Fixtures to run (default: all)')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--throughput-pages', type=int, default=16, help='Pages in the concurrent run (0 to skip)')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='Simulated seconds per model call')
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help='Simulated model output rate')
+    parser.add_argument('--scrape-option', action='append', default=[], metavar='KEY=VALUE')
+    parser.add_argument('--clone-option', action='append', default=[], metavar='KEY=VALUE')
+    parser.add_argument('--no-pool', action='store_true', help='Start a browser per scrape instead of pooling')
+    parser.add_argument('--trace-memory', action='store_true', help='Track Python heap peaks per stage (slower)')
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', metavar='BASE', help='Compare against an earlier result file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown reported as a regression')
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(Benchmark(args).run())
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{result['commit'] or int(result['timestamp'])}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), result, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.scrape_executor import ExecutorSaturated, ScrapeExecutor
+
+
+class FakeScraper:
+    def __init__(self, release=None):
+        self.release = release
+
+    def scrape_comprehensive(self, url):
+        if self.release is not None:
+            self.release.wait(5)
+        return {'url': url}
+
+
+class FakeCloner:
+    async def generate_pixel_perfect_html(self, design_context):
+        return f"<html>{design_context['url']}</html>"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No lifespan: the tests install only the state each endpoint touches
+    main.app.state.scrape_executor = ScrapeExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+    monkeypatch.setattr(main, 'build_pipeline', lambda *args, **kwargs: (FakeScraper(release), FakeCloner()))
+    yield TestClient(main.app), release
+    release.set()
+    main.app.state.scrape_executor.shutdown()
+
+
+def test_executor_rejects_beyond_workers_plus_queue():
+    executor = ScrapeExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    futures = [executor.submit_from_thread(release.wait, 5) for _ in range(2)]
+    with pytest.raises(ExecutorSaturated) as excinfo:
+        executor.submit_from_thread(release.wait, 5)
+    assert excinfo.value.retry_after >= 1
+    assert executor.stats()['rejected'] == 1
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    executor.submit_from_thread(lambda: None).result(timeout=5)
+    executor.shutdown()
+
+
+def test_saturated_clone_answers_503_with_retry_after(client):
+    client, release = client
+    main.app.state.scrape_executor.submit_from_thread(release.wait, 5)
+
+    response = client.post('/api/clone', json={'url': 'http://site.test/'})
+    assert response.status_code == 503
+    assert int(response.headers['Retry-After']) >= 1
+
+    stream = client.post('/api/clone/stream', json={'url': 'http://site.test/'})
+    assert stream.status_code == 503
+    assert 'Retry-After' in stream.headers
+
+
+def test_clone_runs_once_a_worker_is_free(client):
+    client, release = client
+    release.set()
+    response = client.post('/api/clone', json={'url': 'http://site.test/'})
+    assert response.status_code == 200
+    assert response.json()['html'] == '<html>http://site.test/</html>'
+
+
+class DelayedScraper:
+    """Scrapes finish in the order of their delay, not the order requested."""
+
+    DELAYS = {'http://site.test/slow': 0.3, 'http://site.test/medium': 0.15, 'http://site.test/fast': 0.0}
+
+    def scrape_comprehensive(self, url):
+        time.sleep(self.DELAYS.get(url, 0))
+        if url == 'http://site.test/broken':
+            raise RuntimeError('connection refused')
+        return {'url': url}
+
+
+def test_batch_streams_in_completion_order_with_request_indexes(monkeypatch):
+    main.app.state.scrape_executor = ScrapeExecutor(max_workers=4, max_queue=4)
+    monkeypatch.setattr(main, 'build_pipeline', lambda *args, **kwargs: (DelayedScraper(), FakeCloner()))
+    urls = ['http://site.test/slow', 'http://site.test/medium', 'http://site.test/fast',
+            'http://site.test/broken', 'http://site.test/fast']
+    try:
+        response = TestClient(main.app).post('/api/clone/batch', json={'urls': urls, 'max_concurrency': 4})
+    finally:
+        main.app.state.scrape_executor.shutdown()
+
+    events = [json.loads(line) for line in response.text.splitlines()]
+    results, summary = events[:-1], events[-1]
+    # Duplicates are cloned once; each result carries its position in the deduplicated request
+    assert [(r['index'], r['url']) for r in sorted(results, key=lambda r: r['index'])] == list(enumerate(urls[:4]))
+    assert [r['url'] for r in results if r['status'] == 'ok'] == [
+        'http://site.test/fast', 'http://site.test/medium', 'http://site.test/slow'
+    ]
+    assert next(r for r in results if r['status'] == 'error')['detail'] == 'connection refused'
+    assert summary['event'] == 'summary'
+    assert (summary['total'], summary['succeeded'], summary['failed']) == (4, 3, 1)
@@ -0,0 +1,90 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.services.asset_fetcher import AssetFetcher, FetchTooLarge, StylesheetCache
+
+SHEETS = {
+    '/a.css': '@import "b.css"; @import url(c.css); a { color: red; }',
+    '/b.css': '@import "d.css"; b { color: blue; }',
+    '/c.css': '@import "a.css"; c { color: green; }',  # Cycle back to a.css
+    '/d.css': '@import "e.css"; d { margin: 0; }',
+    '/e.css': 'e { margin: 1px; }',
+    '/inline.css': 'i { padding: 0; }',
+    '/big.css': 'x' * 5000,
+}
+
+
+@pytest.fixture
+def server():
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            requested.append(self.path)
+            body = SHEETS.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/css')
+            if self.path == '/big.css':
+                # No Content-Length, so only the streamed byte count can stop it
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.end_headers()
+                for start in range(0, len(body), 1000):
+                    chunk = body[start:start + 1000].encode()
+                    self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+                self.wfile.write(b'0\r\n\r\n')
+                return
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{httpd.server_address[1]}', requested
+    httpd.shutdown()
+
+
+def test_imports_are_followed_breadth_first_once_each(server):
+    base, requested = server
+    fetcher = AssetFetcher(requests.Session())
+    sheets = fetcher.fetch_stylesheets([f'{base}/a.css'], max_bytes=10000, max_import_depth=2,
+                                       inline_sources=[(f'{base}/', '@import "inline.css";')])
+
+    assert sorted(sheets) == [f'{base}{path}' for path in ('/a.css', '/b.css', '/c.css', '/d.css', '/inline.css')]
+    # a.css and inline.css, then b.css and c.css, then d.css; e.css is past the depth limit
+    assert requested.index('/d.css') > max(requested.index('/b.css'), requested.index('/c.css'))
+    assert requested.count('/a.css') == 1
+
+
+def test_size_cap_stops_streamed_and_declared_bodies(server):
+    base, _ = server
+    fetcher = AssetFetcher(requests.Session())
+    with pytest.raises(FetchTooLarge):
+        fetcher.fetch_text(f'{base}/big.css', max_bytes=2500)
+    with pytest.raises(FetchTooLarge):
+        fetcher.fetch_text(f'{base}/e.css', max_bytes=5)
+
+    sheets = fetcher.fetch_stylesheets([f'{base}/big.css', f'{base}/missing.css'], max_bytes=2500)
+    assert sheets[f'{base}/big.css'].startswith('/* CSS file too large or unavailable')
+    assert sheets[f'{base}/missing.css'].startswith('/* CSS file too large or unavailable')
+    assert fetcher.bytes_fetched == 0
+
+
+def test_shared_cache_downloads_each_sheet_once(server):
+    base, requested = server
+    cache = StylesheetCache()
+    for _ in range(2):
+        AssetFetcher(requests.Session(), stylesheet_cache=cache).fetch_stylesheets([f'{base}/e.css'], 10000)
+    assert requested == ['/e.css']
@@ -0,0 +1,72 @@
+from app.services.breakpoints import (
+    diff_layouts,
+    discover_breakpoints,
+    media_matches,
+    plan_regimes,
+    render_breakpoint_table,
+    summarize_regimes,
+)
+
+
+def snapshot(width, elements, scroll_height=1000):
+    return {'viewport': {'width': width}, 'scroll_height': scroll_height, 'elements': elements}
+
+
+def test_breakpoints_from_min_max_and_range_queries():
+    queries = ['(min-width: 768px)', 'screen and (max-width: 767.98px)', '(width >= 64em)', '(400px < width <= 600px)']
+    assert discover_breakpoints(queries) == [401, 601, 768, 1024]
+    assert media_matches('screen and (min-width: 768px)', 800)
+    assert not media_matches('print, (prefers-color-scheme: dark)', 800)
+    assert media_matches('not print', 800)
+
+
+def test_regimes_probe_preferred_widths_and_merge_past_the_limit():
+    regimes = plan_regimes([768, 1024], preferred_widths=[1920, 768, 375], max_width=1920)
+    assert [(r.label, r.probe_width) for r in regimes] == [
+        ('>=1024px', 1920), ('768-1023px', 768), ('<=767px', 375)
+    ]
+
+    merged = plan_regimes([500, 520, 768, 1024], preferred_widths=[1920], max_width=1920, max_regimes=3)
+    assert len(merged) == 3
+    assert merged[0].contains(1920) and merged[-1].contains(320)
+
+
+def test_diff_keeps_only_real_layout_changes():
+    desktop = snapshot(1920, {
+        'nav.menu': {'visible': True, 'display': 'flex', 'flex-direction': 'row', 'box': [0, 0, 1920, 60]},
+        'main.content': {'visible': True, 'display': 'block', 'box': [0, 60, 960, 900]},
+        'aside.sidebar': {'visible': True, 'display': 'block', 'box': [960, 60, 300, 900]},
+        'button.burger': {'visible': False, 'display': 'none', 'box': [0, 0, 0, 0]},
+        'h1': {'visible': True, 'display': 'block', 'font-size': '48px', 'box': [0, 60, 600, 50]},
+    })
+    mobile = snapshot(375, {
+        'nav.menu': {'visible': True, 'display': 'flex', 'flex-direction': 'column', 'box': [0, 0, 375, 240]},
+        'main.content': {'visible': True, 'display': 'block', 'box': [0, 240, 187, 1400]},  # Fluid: 50% of the viewport
+        'aside.sidebar': {'visible': False, 'display': 'none', 'box': [0, 0, 0, 0]},
+        'button.burger': {'visible': True, 'display': 'block', 'box': [320, 10, 40, 40]},
+        'h1': {'visible': True, 'display': 'block', 'font-size': '32px', 'box': [0, 240, 340, 40]},
+    })
+
+    diff = diff_layouts(desktop, mobile)
+    assert diff['hidden'] == ['aside.sidebar']
+    assert diff['shown'] == ['button.burger']
+    assert diff['changed'] == {
+        'nav.menu': {'flex-direction': ['row', 'column'], 'height': [60, 240]},
+        'h1': {'font-size': ['48px', '32px'], 'width': [600, 340]},
+    }
+
+
+def test_summary_diffs_every_regime_against_the_widest():
+    regimes = plan_regimes([768], preferred_widths=[1920, 375], max_width=1920)
+    snapshots = {
+        '>=768px': snapshot(1920, {'aside': {'visible': True, 'box': [0, 0, 300, 900]}}, scroll_height=1200),
+        '<=767px': snapshot(375, {'aside': {'visible': False, 'box': [0, 0, 0, 0]}}, scroll_height=2400),
+    }
+    summary = summarize_regimes([768], regimes, snapshots)
+
+    assert summary['base_regime'] == '>=768px'
+    assert list(summary['diffs']) == ['<=767px']
+    assert summary['diffs']['<=767px']['hidden'] == ['aside']
+    table = render_breakpoint_table(summary)
+    assert '<=767px | 375px | 2400px | 0 changed, 1 hidden, 0 shown' in table
+    assert '  <=767px aside: hidden' in table
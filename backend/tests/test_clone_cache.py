@@ -0,0 +1,29 @@
+import os
+
+from app.services.clone_cache import CloneCache
+
+
+def disk_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(directory) for name in names)
+
+
+def test_disk_total_tracks_puts_replacements_and_expiry(tmp_path):
+    cache = CloneCache(str(tmp_path), max_memory_entries=0)
+    cache.put('aa1', '<html>one</html>')
+    cache.put('bb2', '<html>two</html>')
+    cache.put('aa1', '<html>one, regenerated</html>')
+    assert cache.stats()['disk_bytes'] == disk_size(tmp_path)
+
+    cache.ttl_seconds = 0
+    assert cache.get('bb2') is None
+    assert cache.stats()['disk_bytes'] == disk_size(tmp_path)
+    assert cache.stats()['disk_bytes'] is not None
+
+
+def test_disk_is_evicted_to_the_byte_budget(tmp_path):
+    cache = CloneCache(str(tmp_path), max_memory_entries=0, max_disk_bytes=200)
+    for i in range(10):
+        cache.put(f'k{i}', 'x' * 60)
+    assert disk_size(tmp_path) <= 200
+    assert cache.stats()['disk_bytes'] == disk_size(tmp_path)
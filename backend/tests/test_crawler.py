@@ -0,0 +1,99 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.services.crawler import CrawlConfig, SiteCrawler, normalize_url
+from app.services.design_context import DesignContext
+from app.services.scrape_executor import ScrapeExecutor
+
+LINKS = {
+    '/': ['/docs/', '/docs', '/about?utm_source=x#team'],
+    '/docs/': ['/'],
+    '/about?utm_source=x': [],
+}
+
+
+class FakeCrawler(SiteCrawler):
+    """Crawler whose page scrapes read a link table instead of launching a browser."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetched = []
+        self.active = 0
+        self.peak = 0
+        self._count_lock = threading.Lock()
+
+    def _scrape_page(self, url):
+        with self._count_lock:
+            self.fetched.append(url)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._count_lock:
+            self.active -= 1
+        path = url.split('site.test', 1)[1]
+        html = ''.join(f'<a href="{link}">x</a>' for link in LINKS.get(path, []))
+        return DesignContext(url=url, soup=BeautifulSoup(html, 'html.parser'))
+
+
+def test_normalize_url():
+    assert normalize_url('HTTP://Site.test:80/a/../b/?utm_source=x&b=2&a=1#f') == 'http://site.test/b?a=1&b=2'
+    assert normalize_url('mailto:someone@site.test') is None
+
+
+def test_pages_are_fetched_as_linked_and_deduped_by_normalized_url():
+    crawler = FakeCrawler(CrawlConfig(use_sitemap=False))
+    result = crawler.crawl('http://site.test/')
+
+    assert sorted(crawler.fetched) == ['http://site.test/', 'http://site.test/about?utm_source=x',
+                                       'http://site.test/docs/']
+    assert result.depths['http://site.test/docs/'] == 1
+
+
+def test_host_slot_is_taken_before_admission():
+    executor = ScrapeExecutor(max_workers=4, max_queue=4)
+    crawler = FakeCrawler(CrawlConfig(use_sitemap=False, max_workers=4, per_host_concurrency=1),
+                          scrape_executor=executor)
+    crawler.crawl('http://site.test/')
+
+    assert crawler.peak == 1
+    # Every admitted page was running, none sat on a worker waiting for the host
+    assert executor.stats()['submitted'] == len(crawler.fetched)
+
+
+@pytest.fixture
+def sitemap_server():
+    body = ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f'<url><loc>http://site.test/p{i}/</loc></url>' for i in range(500))
+            + '</urlset>').encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/xml')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}', len(body)
+    server.shutdown()
+
+
+def test_sitemap_is_capped_by_url_count_and_size(sitemap_server):
+    base, size = sitemap_server
+    crawler = FakeCrawler(CrawlConfig(max_pages=5))
+    crawler._origin = ('http', 'site.test')  # The origin the sitemap lists
+    assert len(crawler._sitemap_urls(base + '/')) == 20
+
+    crawler.config.max_sitemap_bytes = size // 2
+    assert crawler._sitemap_urls(base + '/') == []
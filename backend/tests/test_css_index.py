@@ -0,0 +1,33 @@
+from app.services.css_index import parse_stylesheet
+
+
+def declarations(css):
+    return {prop: value for rule in parse_stylesheet(css).rules for prop, value, _ in rule.declarations}
+
+
+def test_font_face_data_uri_is_one_value():
+    index = parse_stylesheet(
+        '@font-face{font-family:X;src:url(data:font/woff2;base64,AAAA) format("woff2");font-display:swap}'
+    )
+    assert index.font_faces == [{
+        'font-family': 'X',
+        'src': 'url(data:font/woff2;base64,AAAA) format("woff2")',
+        'font-display': 'swap',
+    }]
+
+
+def test_svg_data_uri_keeps_semicolons_and_braces():
+    css = (".icon{background:url(data:image/svg+xml;charset=utf8,%3Csvg%3E{fill:red;}%3C/svg%3E) no-repeat;"
+           "color:#fff}")
+    assert declarations(css) == {
+        'background': 'url(data:image/svg+xml;charset=utf8,%3Csvg%3E{fill:red;}%3C/svg%3E) no-repeat',
+        'color': '#fff',
+    }
+
+
+def test_quoted_url_and_escaped_paren():
+    css = '.a{background-image:url("x;y).png")}.b{background:URL(a\\)b.png)}'
+    assert declarations(css) == {
+        'background-image': 'url("x;y).png")',
+        'background': 'URL(a\\)b.png)',
+    }
@@ -0,0 +1,15 @@
+from app.services.design_context import DesignContext
+
+
+def test_to_dict_leaves_out_raw_page_and_stylesheet_text():
+    context = DesignContext(
+        url='http://site.test/',
+        html='<html></html>',
+        styles={'internal': ['body{color:red}'], 'external': {'http://site.test/a.css': 'p{margin:0}'}},
+        colors={'text': ['red']},
+    )
+
+    data = context.to_dict()
+    assert 'styles' not in data and 'html' not in data
+    assert data['colors'] == {'text': ['red']}
+    assert context.to_dict(include_blobs=True)['styles']['internal'] == ['body{color:red}']
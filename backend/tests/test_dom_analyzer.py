@@ -0,0 +1,74 @@
+import pytest
+
+from app.services.dom_analyzer import DomAnalyzer, generate_css_selector, make_soup
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>Shop</title>
+<style>body { margin: 0; }</style>
+<script>var x = "<p>not text</p>";</script>
+</head><body>
+<header class="top bar" id="hd"><nav><a href="/">Home</a> <a href="/a"> About </a></nav></header>
+<main>
+  <section style="color: red"><h1>Title</h1><!-- a comment --><p>Some <b>bold</b> text</p>
+    <template><p>templated</p></template>
+    <ruby>漢<rt>kan</rt></ruby>
+    <img src="/a.png" alt="A">
+  </section>
+  <article><section><p>Nested</p></section></article>
+  %s
+</main>
+<aside></aside>
+<footer>  Footer  <script>ignored()</script></footer>
+</body></html>
+""" % ''.join(f'<div class="item"><span>Item {i}</span></div>' for i in range(150))
+
+
+def baseline_structure(soup):
+    """The per-element extraction DomAnalyzer replaced."""
+    structure = {}
+    for name in ('header', 'nav', 'main', 'article', 'section', 'aside', 'footer'):
+        elements = soup.find_all(name)
+        if elements:
+            structure[name] = [{
+                'classes': elem.get('class', []),
+                'id': elem.get('id'),
+                'children_count': len(elem.find_all(recursive=False)),
+                'text_content_length': len(elem.get_text(strip=True))
+            } for elem in elements]
+    return structure
+
+
+def baseline_elements(soup):
+    elements = []
+    for element in soup.find_all(True)[:200]:
+        if element.name not in ['script', 'style', 'meta', 'link']:
+            elem_info = {
+                'tag': element.name,
+                'classes': element.get('class', []),
+                'id': element.get('id'),
+                'text_length': len(element.get_text(strip=True)),
+                'has_children': len(element.find_all(recursive=False)) > 0,
+                'attributes': {k: v for k, v in element.attrs.items() if k not in ['class', 'id']}
+            }
+            if element.get('style'):
+                elem_info['inline_styles'] = element.get('style')
+            elements.append(elem_info)
+    return elements
+
+
+@pytest.mark.parametrize('parser', ['html.parser', 'lxml'])
+def test_single_pass_matches_the_per_element_extractors(parser):
+    url = 'http://site.test/shop/'
+    analysis = DomAnalyzer(url).analyze(make_soup(PAGE, parser))
+
+    # The old scraper resolved image URLs before extracting anything
+    soup = make_soup(PAGE, parser)
+    for img in soup.find_all('img'):
+        img['src'] = 'http://site.test/a.png'
+
+    assert analysis.structure == baseline_structure(soup)
+    assert analysis.elements == baseline_elements(soup)
+    assert analysis.inline_styles == [
+        {'element': el.name, 'selector': generate_css_selector(el), 'styles': el.get('style')}
+        for el in soup.find_all(style=True)
+    ]
@@ -0,0 +1,58 @@
+import pytest
+
+from app.services import driver_pool
+from app.services.browser_scripts import NETWORK_TRACKER_SCRIPT
+from app.services.driver_pool import DriverPool, DriverPoolConfig, DriverPoolTimeout, PooledDriver
+
+
+class FakeDriver:
+    def __init__(self, options=None):
+        self.cdp = []
+        self.urls = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.cdp.append((command, params))
+        return {}
+
+    def execute_script(self, script, *args):
+        return 1
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def set_window_size(self, width, height):
+        pass
+
+    def quit(self):
+        pass
+
+
+class FakePool(DriverPool):
+    def _create(self):
+        return PooledDriver(FakeDriver())
+
+
+def test_release_clears_every_origin_through_devtools():
+    pool = FakePool(DriverPoolConfig(max_size=1, warm_size=0))
+    pooled = pool.acquire()
+    pool.release(pooled, pages=1)
+
+    commands = [command for command, _ in pooled.driver.cdp]
+    assert commands == ['Network.clearBrowserCookies', 'Network.clearBrowserCache', 'Storage.clearDataForOrigin']
+    assert pooled.driver.cdp[2][1]['origin'] == '*'
+    assert pooled.driver.urls == ['about:blank']
+    assert pool.acquire() is pooled
+
+
+def test_acquire_times_out_when_every_driver_is_leased():
+    pool = FakePool(DriverPoolConfig(max_size=1, warm_size=0))
+    pool.acquire()
+    with pytest.raises(DriverPoolTimeout):
+        pool.acquire(timeout=0.05)
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_new_drivers_track_in_flight_requests(monkeypatch):
+    monkeypatch.setattr(driver_pool.webdriver, 'Chrome', FakeDriver)
+    driver = driver_pool.create_chrome_driver()
+    assert driver.cdp == [('Page.addScriptToEvaluateOnNewDocument', {'source': NETWORK_TRACKER_SCRIPT})]
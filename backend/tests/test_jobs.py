@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from app.services.jobs import QUEUED, RUNNING, SUCCEEDED, JobStore, JobWorkerPool
+from app.services.scrape_executor import ExecutorSaturated
+
+
+def test_live_leases_survive_another_process_starting(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    first, second = JobStore(path, lease_seconds=60), JobStore(path, lease_seconds=60)
+    job = first.create('http://site.test/', {}, max_attempts=3)
+    assert first.claim().id == job.id
+
+    assert second.requeue_expired() == 0
+    assert second.get(job.id).status == RUNNING
+
+
+def test_expired_lease_is_requeued_and_the_old_owner_cannot_finish(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    first, second = JobStore(path, lease_seconds=0.01), JobStore(path, lease_seconds=60)
+    job = first.create('http://site.test/', {}, max_attempts=3)
+    first.claim()
+    time.sleep(0.02)
+
+    assert second.requeue_expired() == 1
+    assert second.get(job.id).status == QUEUED
+    assert second.claim().id == job.id
+
+    first.succeed(job.id, '<html>stale</html>')
+    second.succeed(job.id, '<html>fresh</html>')
+    assert second.get(job.id).status == SUCCEEDED
+    assert second.result(job.id) == '<html>fresh</html>'
+
+
+def test_renew_extends_only_own_leases(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    first, second = JobStore(path, lease_seconds=0.05), JobStore(path, lease_seconds=60)
+    job = first.create('http://site.test/', {}, max_attempts=3)
+    first.claim()
+    second.renew([job.id])
+    time.sleep(0.06)
+    assert second.requeue_expired() == 1
+
+
+def test_worker_pool_runs_jobs_and_requeues_saturation_without_an_attempt(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+    calls = []
+
+    async def handler(job, set_stage):
+        calls.append(job.url)
+        set_stage('working')
+        if len(calls) == 1:
+            raise ExecutorSaturated(retry_after=0)
+        return f'<html>{job.url}</html>'
+
+    async def run():
+        pool = JobWorkerPool(store, handler, workers=1, poll_interval=0.01)
+        job = store.create('http://site.test/', {}, max_attempts=1)
+        pool.start()
+        try:
+            for _ in range(200):
+                if store.get(job.id).status == SUCCEEDED:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await pool.stop()
+        return store.get(job.id)
+
+    job = asyncio.run(run())
+    assert job.status == SUCCEEDED
+    assert job.attempts == 1
+    assert calls == ['http://site.test/', 'http://site.test/']
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.design_context import DesignContext
+from app.services.instrumentation import span
+from app.services.llm_cloner import HighPrecisionLLMCloner, PrecisionCloneConfig
+from benchmarks.fake_model import FakeGeminiModel
+
+CONTEXT = {
+    'url': 'http://site.test/',
+    'html': '<p>x</p>',
+    'computed_styles': {'body': {'color': 'red'}},
+    'measurements': {},
+    'colors': {},
+    'typography': {},
+    'layout_structure': {},
+    'elements': [],
+}
+
+
+class OverlapModel(FakeGeminiModel):
+    """Fake model that records how many calls were in flight at once."""
+
+    def __init__(self, fail_first: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.fail_first = fail_first
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, stream=False):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            failing = self.fail_first and self.calls == 0
+            self.calls += failing
+        try:
+            if failing:
+                time.sleep(self.latency)
+                raise RuntimeError('quota exceeded')
+            return super().generate_content(prompt, stream)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+async def collect(cloner):
+    return [event async for event in cloner.stream_pixel_perfect_html(CONTEXT)]
+
+
+def test_stream_counts_tokens_under_a_span():
+    cloner = HighPrecisionLLMCloner(PrecisionCloneConfig(multi_pass_generation=False), model=FakeGeminiModel())
+
+    async def run():
+        with span('request') as root:
+            events = await collect(cloner)
+        return root, events
+
+    root, events = asyncio.run(run())
+    assert events[-1][0] == 'done'
+    assert [child.name for child in root.children] == ['clone.single_pass']
+    assert root.children[0].counters['llm_calls'] == 1
+    assert root.totals['response_tokens'] > 0
+
+
+def test_trickling_stream_hits_the_overall_deadline():
+    # ~40 tokens per second against a reply of several thousand tokens
+    model = FakeGeminiModel(tokens_per_second=40)
+    config = PrecisionCloneConfig(multi_pass_generation=False, pass_timeout_seconds=0.5)
+    cloner = HighPrecisionLLMCloner(config, model=model)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(collect(cloner))
+
+
+def test_draft_passes_run_concurrently():
+    model = OverlapModel(latency=0.2)
+    cloner = HighPrecisionLLMCloner(PrecisionCloneConfig(), model=model)
+    html, fell_back = asyncio.run(cloner._multi_pass_generation(DesignContext.from_dict(CONTEXT)))
+
+    # Structure and visual drafts overlapped, then the refinement ran alone
+    assert model.peak == 2
+    assert model.calls == 3
+    assert not fell_back and html.startswith('<!DOCTYPE html>')
+
+
+def test_one_failed_draft_still_refines_and_reports_the_fallback():
+    model = OverlapModel(fail_first=True, latency=0.05)
+    cloner = HighPrecisionLLMCloner(PrecisionCloneConfig(), model=model)
+
+    html, fell_back = asyncio.run(cloner._multi_pass_generation(DesignContext.from_dict(CONTEXT)))
+    assert html and fell_back
@@ -0,0 +1,50 @@
+from app.services.prompt_builder import PromptBuilder, intern_styles, render_interned_styles
+
+
+def test_budget_stops_at_the_first_section_that_overflows():
+    builder = PromptBuilder(token_budget=40, count_tokens=len, min_section_tokens=1000)
+    builder.add('A', 'a' * 10, priority=0)
+    builder.add('B', 'b' * 50, priority=1)
+    builder.add('C', 'c', priority=2)
+    prompt = builder.build('H')
+
+    assert 'aaaaaaaaaa' in prompt
+    assert 'B\n' not in prompt
+    # C would fit, but it ranks below the section that overflowed
+    assert 'C\n' not in prompt
+
+
+def test_overflowing_section_is_cut_at_a_line_boundary():
+    builder = PromptBuilder(token_budget=40, count_tokens=len, min_section_tokens=10)
+    builder.add('A', 'a' * 10, priority=0)
+    builder.add('B', '\n'.join(['bbbb'] * 20), priority=1)
+    builder.add('C', 'c', priority=2)
+    prompt = builder.build('H')
+
+    assert len(prompt) <= 40
+    assert '... (truncated)' in prompt
+    assert 'bbbb\n' in prompt and 'bbbbb' not in prompt
+    assert 'C\n' not in prompt
+
+
+def test_admitted_sections_keep_insertion_order():
+    builder = PromptBuilder(token_budget=1000)
+    builder.add('LOW', 'x', priority=5).add('HIGH', 'y', priority=0).add('EMPTY', '', priority=0)
+    assert builder.build('H', 'F') == 'H\nLOW\nx\n\nHIGH\ny\n\nF'
+
+
+def test_identical_groups_are_interned_and_defaults_dropped():
+    styles = {
+        'h1': {'font-size': '32px', 'color': 'red', 'width': '100px', 'opacity': '1'},
+        'h2': {'font-size': '32px', 'color': 'red', 'width': '50px'},
+    }
+    classes, selectors = intern_styles(styles)
+
+    assert selectors['h1'][1] == selectors['h2'][1] == 'type1'
+    assert classes['type1'] == {'font-size': '32px', 'color': 'red'}
+    assert selectors['h1'][0] != selectors['h2'][0]
+    assert not any('opacity' in declarations for declarations in classes.values())
+
+    rendered = render_interned_styles(styles)
+    assert '.type1 { font-size: 32px; color: red }' in rendered
+    assert 'h1 -> .type1 { width: 100px }' in rendered
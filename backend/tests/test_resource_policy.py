@@ -0,0 +1,32 @@
+from app.services.resource_policy import TRACKER_DOMAINS, domain_patterns, matches_domain, registrable_domain
+
+
+def test_registrable_domain():
+    assert registrable_domain('www.segment.com') == 'segment.com'
+    assert registrable_domain('shop.example.co.uk') == 'example.co.uk'
+    assert registrable_domain('localhost') == 'localhost'
+
+
+def test_target_site_is_never_blocked():
+    patterns = domain_patterns(TRACKER_DOMAINS, 'https://www.segment.com/pricing')
+    assert not any('segment.com' in pattern for pattern in patterns)
+    assert '*://segment.io/*' in patterns
+    assert '*://*.google-analytics.com/*' in patterns
+
+
+def test_first_party_subdomains_on_the_list_are_kept():
+    patterns = domain_patterns(TRACKER_DOMAINS, 'https://google.com/')
+    assert not any('adservice.google.com' in pattern for pattern in patterns)
+    patterns = domain_patterns(TRACKER_DOMAINS, 'https://www.facebook.com/')
+    assert not any('facebook.com' in pattern for pattern in patterns)
+    assert '*://facebook.net/*' in patterns
+
+
+def test_without_target_every_domain_is_blocked():
+    assert len(domain_patterns(TRACKER_DOMAINS)) == 2 * len(TRACKER_DOMAINS)
+
+
+def test_matches_domain_honours_path_prefixes():
+    assert matches_domain('https://www.facebook.com/tr?id=1', TRACKER_DOMAINS)
+    assert not matches_domain('https://www.facebook.com/page', TRACKER_DOMAINS)
+    assert not matches_domain('https://notdoubleclick.net/x', TRACKER_DOMAINS)
@@ -0,0 +1,77 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.design_context import DesignContext
+from app.services.scrape_cache import ScrapeCache
+from app.services.scraper import AdvancedWebsiteScraper, ScrapingConfig
+
+PAGE = '<html><head><style>h1 { color: red; }</style></head><body><h1>Hello</h1></body></html>'
+
+
+@pytest.fixture
+def origin():
+    state = {'etag': '"v1"', 'body': PAGE.encode(), 'conditional': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state['conditional'].append(self.headers.get('If-None-Match'))
+            if self.headers.get('If-None-Match') == state['etag']:
+                self.send_response(304)
+                self.send_header('ETag', state['etag'])
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('ETag', state['etag'])
+            self.send_header('Content-Length', str(len(state['body'])))
+            self.end_headers()
+            self.wfile.write(state['body'])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/', state
+    server.shutdown()
+
+
+def scrape(url, cache):
+    config = ScrapingConfig(render_mode='static', include_screenshots=False)
+    return AdvancedWebsiteScraper(config, scrape_cache=cache).scrape_comprehensive(url)
+
+
+def test_unchanged_document_reuses_the_cached_scrape(origin, tmp_path):
+    url, state = origin
+    cache = ScrapeCache(str(tmp_path))
+
+    first = scrape(url, cache)
+    second = scrape(url, cache)
+
+    assert state['conditional'] == [None, '"v1"']
+    assert cache.stats()['revalidated'] == 1
+    assert second.computed_styles == first.computed_styles
+    assert second.soup.h1.get_text() == 'Hello'
+
+
+def test_changed_document_is_scraped_again(origin, tmp_path):
+    url, state = origin
+    cache = ScrapeCache(str(tmp_path))
+    scrape(url, cache)
+
+    state['etag'], state['body'] = '"v2"', PAGE.replace('Hello', 'Changed').encode()
+    context = scrape(url, cache)
+
+    assert cache.stats()['modified'] == 1
+    assert context.soup.h1.get_text() == 'Changed'
+    assert state['conditional'][-1] == '"v1"'
+
+
+def test_entries_without_validators_are_not_stored(tmp_path):
+    cache = ScrapeCache(str(tmp_path))
+    key = ScrapeCache.key('http://site.test/', ScrapingConfig())
+    cache.put(key, DesignContext(url='http://site.test/'), etag=None, last_modified=None)
+    assert cache.get(key) is None
+    assert cache.stats()['stores'] == 0
@@ -0,0 +1,65 @@
+from bs4 import BeautifulSoup
+
+from app.services.asset_fetcher import cascade_order
+from app.services.css_index import build_css_index, parse_stylesheet
+from app.services.dom_analyzer import DomAnalyzer
+from app.services.static_styles import StaticCascade, css_unescape, rightmost_compound
+
+
+def cascade(html, css):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup, StaticCascade(soup, parse_stylesheet(css))
+
+
+def test_css_unescape():
+    assert css_unescape('md\\:flex') == 'md:flex'
+    assert css_unescape('w-1\\/2') == 'w-1/2'
+    assert css_unescape('\\31 0') == '10'
+
+
+def test_rightmost_compound_keeps_escapes():
+    assert rightmost_compound('.a > .md\\:flex:not(.b)') == '.md\\:flex:not'
+    assert rightmost_compound('div .\\31 0') == '.\\31 0'
+
+
+def test_escaped_class_names_are_bucketed_decoded():
+    soup, styles = cascade(
+        '<div class="md:flex w-1/2">x</div>',
+        '.md\\:flex{display:flex}.w-1\\/2{width:50%}.md{display:none}.w-1{width:1px}'
+    )
+    computed = styles.computed(soup.div)
+    assert computed['display'] == 'flex'
+    assert computed['width'] == '50%'
+
+
+def test_escaped_colon_is_not_a_dynamic_pseudo_class():
+    soup, styles = cascade('<a class="hover:underline">x</a>', '.hover\\:underline{text-decoration:none}')
+    assert styles.computed(soup.a)['text-decoration'] == 'none'
+
+
+def test_background_color_read_after_var_resolution():
+    soup, styles = cascade(
+        '<div class="card">x</div>',
+        ':root{--surface:#112233}.card{background:var(--surface) no-repeat}'
+    )
+    assert styles.computed(soup.div)['background-color'] == '#112233'
+
+
+def test_style_block_overrides_earlier_link():
+    html = ('<head><link rel="stylesheet" href="/a.css"><style>.x{color:blue}</style></head>'
+            '<body><p class="x">x</p></body>')
+    soup = BeautifulSoup(html, 'html.parser')
+    analysis = DomAnalyzer('http://site.test/').analyze(soup)
+    sheets = {
+        'http://site.test/a.css': '@import "base.css";.x{color:red}',
+        'http://site.test/base.css': '.x{color:green;font-weight:bold}',
+    }
+    sources = [('http://site.test/', analysis.internal_css[key]) if kind == 'internal' else (key, None)
+               for kind, key in analysis.css_sources]
+    ordered = cascade_order('http://site.test/', sources, sheets)
+    assert ordered == [sheets['http://site.test/base.css'], sheets['http://site.test/a.css'], '.x{color:blue}']
+
+    styles = StaticCascade(soup, build_css_index(ordered, cache=None))
+    computed = styles.computed(soup.p)
+    assert computed['color'] == 'blue'
+    assert computed['font-weight'] == 'bold'
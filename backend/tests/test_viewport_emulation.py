@@ -0,0 +1,57 @@
+from app.services.scraper import AdvancedWebsiteScraper, ScrapingConfig
+
+
+class NoDevToolsDriver:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url):
+        self.calls.append(('get', url))
+
+    def set_window_size(self, width, height):
+        self.calls.append(('window', width, height))
+
+
+class FakeDriver(NoDevToolsDriver):
+    def execute_cdp_cmd(self, command, params):
+        self.calls.append((command, params.get('width'), params.get('height')))
+        return {}
+
+
+def scraper_with(driver, **options):
+    scraper = AdvancedWebsiteScraper(ScrapingConfig(**options))
+    scraper.driver = driver
+    scraper._window_size = (scraper.config.screenshot_width, scraper.config.screenshot_height)
+    return scraper
+
+
+def test_viewport_changes_on_a_loaded_page_use_devtools():
+    driver = FakeDriver()
+    scraper = scraper_with(driver)
+    url = 'http://site.test/'
+
+    assert scraper._load_page(url) is True
+    assert scraper._load_page(url) is False  # Same document, same viewport
+    assert scraper._load_page(url, (768, 1024)) is False
+    assert scraper._load_page(url, (375, 667)) is False
+    assert scraper.page_loads == 1
+    assert driver.calls == [
+        ('get', url),
+        ('Emulation.setDeviceMetricsOverride', 768, 1024),
+        ('Emulation.setDeviceMetricsOverride', 375, 667),
+    ]
+
+    # A new document drops the override before navigating
+    assert scraper._load_page('http://site.test/other') is True
+    assert driver.calls[-2:] == [('Emulation.clearDeviceMetricsOverride', None, None), ('get', 'http://site.test/other')]
+    assert scraper._emulated_viewport is None
+
+
+def test_viewport_changes_reload_without_devtools_or_when_disabled():
+    for driver, options in ((NoDevToolsDriver(), {}), (FakeDriver(), {'emulate_viewports': False})):
+        scraper = scraper_with(driver, **options)
+        scraper._load_page('http://site.test/')
+        scraper._load_page('http://site.test/', (768, 1024))
+
+        assert scraper.page_loads == 2
+        assert driver.calls[-2:] == [('window', 768, 1024), ('get', 'http://site.test/')]